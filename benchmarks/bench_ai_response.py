@@ -0,0 +1,64 @@
+"""
+Benchmark the server time of one AI explorer response for the broadest query ("all matches"):
+executing the query through ibis/DuckDB as the app does, then the charts' and logger's work on
+the result. Compares the original per-output pattern (each of the three charts and the logger
+copying the result before aggregating it) with one summarize_matches() call shared by all.
+Run from the repo root with: python benchmarks/bench_ai_response.py
+"""
+
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import ibis
+import pandas as pd
+from create_parquet import dataset_files, dataset_metadata
+from utils import TeamSeasonIndex, compact_dtypes, summarize_matches
+
+
+def legacy_outputs(df: pd.DataFrame):
+    """What ai_plot_result, ai_plot_goals, ai_plot_season and the logger each did per response."""
+    d = df.copy()
+    d["Result"].value_counts()
+    d = df.copy()
+    d["FullTimeHomeGoals"].mean(), d["FullTimeAwayGoals"].mean()
+    d = df.copy()
+    d["Season"].value_counts().sort_index()
+    d = df.copy()
+    f"returned {len(d)} rows; cols: {','.join(list(d.columns)[:6])}"
+
+
+def best_ms(fn, repeat: int = 20) -> float:
+    """Best-of-`repeat` wall time of fn() in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    con = ibis.duckdb.connect()
+    tbl = con.read_parquet(dataset_files(), hive_partitioning=True)
+    index = TeamSeasonIndex(dataset_metadata()["team_seasons"])
+
+    def execute():
+        return compact_dtypes(tbl.execute(), index.teams, index.seasons)
+
+    df = execute()
+    query_ms = best_ms(execute, repeat=5)
+    legacy_ms = best_ms(lambda: legacy_outputs(df))
+    shared_ms = best_ms(lambda: summarize_matches(df))
+
+    print(f"all matches: {len(df):,} rows x {len(df.columns)} columns")
+    print(f"  {'execute query + compact dtypes':36s} {query_ms:8.2f} ms")
+    print(f"  {'legacy: copy + aggregate per output':36s} {legacy_ms:8.2f} ms")
+    print(f"  {'summarize_matches (once)':36s} {shared_ms:8.2f} ms")
+    print(f"  {'per response before':36s} {query_ms + legacy_ms:8.2f} ms")
+    print(f"  {'per response now':36s} {query_ms + shared_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark loading every match into a worker: decoding the parquet dataset (load_matches) against
+mapping the build's Arrow IPC file (open_matches_arrow + arrow_matches). The processed dataset is
+repeated 1x, 10x and 50x in a temporary build; each load runs in a fresh process, which reports its
+load time and how much its RSS and its private (unshared) memory grew.
+Run from the repo root with: python benchmarks/bench_arrow_mmap.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, SRC)
+
+import pandas as pd
+from create_parquet import _write_arrow, _write_manifest, _write_partitions, load_matches
+
+
+def memory_kb() -> dict:
+    """This process's RSS and private memory in kB, from /proc/self/smaps_rollup."""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as fh:
+        for line in fh:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Private_Clean:", "Private_Dirty:"):
+                fields[parts[0][:-1]] = int(parts[1])
+    return dict(rss=fields["Rss"], private=fields["Private_Clean"] + fields["Private_Dirty"])
+
+
+def child(mode: str, processed: str):
+    """Load the matches one way and print load time and memory growth as JSON."""
+    from create_parquet import arrow_matches, open_matches_arrow
+
+    before = memory_kb()
+    start = time.perf_counter()
+    df = load_matches(processed) if mode == "parquet" else arrow_matches(open_matches_arrow(processed))
+    # Touch every column, as the AI explorer's summaries do
+    df.select_dtypes("number").sum()
+    ms = (time.perf_counter() - start) * 1000
+    after = memory_kb()
+    print(json.dumps(dict(
+        rows=len(df), ms=ms, rss=after["rss"] - before["rss"], private=after["private"] - before["private"],
+    )))
+
+
+def build(processed: str, copies: int):
+    """A build of the processed dataset repeated `copies` times, with its Arrow file."""
+    df = load_matches()
+    df = pd.concat([df] * copies, ignore_index=True)
+    files = _write_partitions(df, processed, 1)
+    _write_manifest(dict(version=1, files=files, arrow=[_write_arrow(processed, files, 1)]), processed)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        child(*sys.argv[1:])
+        sys.exit()
+
+    print(f"{'copies':>6} {'rows':>8} {'load':>8} {'load ms':>8} {'RSS MB':>8} {'private MB':>11}")
+    for copies in (1, 10, 50):
+        with tempfile.TemporaryDirectory() as processed:
+            build(processed, copies)
+            for mode in ("parquet", "arrow"):
+                out = subprocess.run(
+                    [sys.executable, __file__, mode, processed], capture_output=True, text=True, check=True,
+                )
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"{copies:>6} {r['rows']:>8,} {mode:>8} {r['ms']:>8.1f} "
+                      f"{r['rss'] / 1024:>8.1f} {r['private'] / 1024:>11.1f}")
@@ -0,0 +1,55 @@
+"""
+Benchmark concurrent dashboard-style filter queries through the DuckDB cursor pool: every
+(team, season) of the processed dataset, run from a thread pool, once with a single cursor (all
+queries serialized, as on one shared connection) and once with one cursor per core. Prints
+throughput and the pool's wait metrics.
+Run from the repo root with: python benchmarks/bench_db_pool.py
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import ibis
+from create_parquet import dataset_files, dataset_metadata
+from db import CursorPool, configure
+from utils import TeamSeasonIndex
+
+
+def run(con, pairs, cursors: int) -> dict:
+    """Query every (team, season) pair through `cursors` pooled cursors; returns pool stats."""
+    pool = CursorPool(con, cursors)
+
+    def query(pair):
+        team, season = pair
+        with pool.checkout():
+            t = pool.table("epl_matches")
+            return t.filter(((t.HomeTeam == team) | (t.AwayTeam == team)) & (t.Season == season)).execute()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=cursors) as ex:
+        list(ex.map(query, pairs))
+    return dict(seconds=time.perf_counter() - start, **pool.stats())
+
+
+if __name__ == "__main__":
+    con = ibis.duckdb.connect()
+    configure(con)
+    files = [str(f) for f in dataset_files()]
+    con.create_view(
+        "epl_matches",
+        con.sql(f"SELECT * FROM read_parquet({files}, hive_partitioning = true)"),
+        overwrite=True,
+    )
+    index = TeamSeasonIndex(dataset_metadata()["team_seasons"])
+    pairs = [(team, season) for team, seasons in index.team_seasons.items() for season in seasons]
+
+    print(f"{len(pairs)} filter queries, {os.cpu_count()} cores")
+    for cursors in sorted({1, os.cpu_count() or 1}):
+        s = run(con, pairs, cursors)
+        print(
+            f"  {cursors:2d} cursor(s): {s['seconds']:6.2f} s, {len(pairs) / s['seconds']:7.1f} queries/s, "
+            f"{s['waits']} waits, max wait {s['max_wait'] * 1000:.1f} ms"
+        )
@@ -0,0 +1,53 @@
+"""
+Benchmark get_team_matches against the original two-mask/concat implementation.
+Times one call per team over all matches in data/processed.
+Run from the repo root with: python benchmarks/bench_team_matches.py
+"""
+
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pandas as pd
+from create_parquet import load_matches
+from utils import get_team_matches
+
+
+def legacy_get_team_matches(df: pd.DataFrame, team: str) -> pd.DataFrame:
+    """The implementation get_team_matches replaced, kept here as the baseline."""
+    home = df[df["HomeTeam"] == team].copy()
+    away = df[df["AwayTeam"] == team].copy()
+    home["venue"] = "Home"
+    home["goals_for"] = home["FullTimeHomeGoals"]
+    home["goals_against"] = home["FullTimeAwayGoals"]
+    home["win"] = (home["FullTimeResult"] == "H").astype(int)
+    away["venue"] = "Away"
+    away["goals_for"] = away["FullTimeAwayGoals"]
+    away["goals_against"] = away["FullTimeHomeGoals"]
+    away["win"] = (away["FullTimeResult"] == "A").astype(int)
+    return pd.concat([home, away]).sort_values("MatchDate").reset_index(drop=True)
+
+
+def per_call_ms(fn, teams, repeat: int = 5) -> float:
+    """Best-of-`repeat` mean milliseconds per call of fn(team) over all teams."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for team in teams:
+            fn(team)
+        best = min(best, time.perf_counter() - start)
+    return best / len(teams) * 1000
+
+
+def main():
+    df = load_matches()
+    teams = sorted(set(df["HomeTeam"]) | set(df["AwayTeam"]))
+
+    print(f"{len(df):,} matches, {len(teams)} teams")
+    print(f"legacy get_team_matches:        {per_call_ms(lambda t: legacy_get_team_matches(df, t), teams):8.3f} ms/call")
+    print(f"get_team_matches:               {per_call_ms(lambda t: get_team_matches(df, t), teams):8.3f} ms/call")
+
+
+if __name__ == "__main__":
+    main()
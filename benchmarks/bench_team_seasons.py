@@ -0,0 +1,99 @@
+"""
+Benchmark building the team <-> season lookups at app startup on a synthetic dataset of
+10 leagues x 20 teams x 50 seasons (190,000 matches), built with the real create_parquet pipeline.
+Compares the original per-team mask loop over the materialized matches with TeamSeasonIndex,
+built from the matches in one group-by or read from the build manifest as the app does.
+Run from the repo root with: python benchmarks/bench_team_seasons.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numpy as np
+import pandas as pd
+from create_parquet import build_full, dataset_metadata, load_matches
+from utils import TeamSeasonIndex
+
+LEAGUES = 10
+TEAMS_PER_LEAGUE = 20
+SEASONS = 50
+
+
+def synthetic_matches(seed: int = 0) -> pd.DataFrame:
+    """A double round-robin per league and season, in the raw CSV's column layout."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for s in range(SEASONS):
+        season = f"{1975 + s}/{(1976 + s) % 100:02d}"
+        start = pd.Timestamp(f"{1975 + s}-08-01")
+        for league in range(LEAGUES):
+            teams = [f"League {league} Team {t}" for t in range(TEAMS_PER_LEAGUE)]
+            for i, home in enumerate(teams):
+                for j, away in enumerate(teams):
+                    if i != j:
+                        rows.append((season, start + pd.Timedelta(days=(i * 7 + j) % 280), home, away))
+    df = pd.DataFrame(rows, columns=["Season", "MatchDate", "HomeTeam", "AwayTeam"])
+    n = len(df)
+    df["FullTimeHomeGoals"] = rng.poisson(1.5, n)
+    df["FullTimeAwayGoals"] = rng.poisson(1.1, n)
+    df["FullTimeResult"] = np.select(
+        [df["FullTimeHomeGoals"] > df["FullTimeAwayGoals"], df["FullTimeHomeGoals"] < df["FullTimeAwayGoals"]],
+        ["H", "A"], "D",
+    )
+    df["HalfTimeResult"] = "D"
+    df["MatchDate"] = df["MatchDate"].dt.strftime("%Y-%m-%d")
+    return df
+
+
+def legacy_team_seasons(df: pd.DataFrame) -> dict:
+    """The module-level loop TeamSeasonIndex replaced, kept here as the baseline."""
+    all_teams = sorted(set(df["HomeTeam"].tolist() + df["AwayTeam"].tolist()))
+    team_seasons = {}
+    for team in all_teams:
+        team_seasons[team] = sorted(df[
+            (df["HomeTeam"] == team) | (df["AwayTeam"] == team)
+        ]["Season"].unique().tolist())
+    return team_seasons
+
+
+def best_ms(fn, repeat: int = 3) -> float:
+    """Best-of-`repeat` wall time of fn() in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = os.path.join(tmp, "matches.csv")
+        processed = os.path.join(tmp, "processed")
+        synthetic_matches().to_csv(raw, index=False)
+        build_full(raw, processed)
+
+        df = load_matches(processed)
+        legacy = legacy_team_seasons(df)
+        index = TeamSeasonIndex.from_matches(df)
+        assert index.team_seasons == legacy
+        assert TeamSeasonIndex(dataset_metadata(processed)["team_seasons"]).team_seasons == legacy
+
+        load_ms = best_ms(lambda: load_matches(processed))
+        timings = {
+            "legacy loop (matches already loaded)": best_ms(lambda: legacy_team_seasons(df), repeat=1),
+            "TeamSeasonIndex.from_matches (loaded)": best_ms(lambda: TeamSeasonIndex.from_matches(df)),
+            "TeamSeasonIndex from manifest": best_ms(
+                lambda: TeamSeasonIndex(dataset_metadata(processed)["team_seasons"])
+            ),
+        }
+
+    print(f"{len(df):,} matches, {len(index.teams)} teams, {len(index.seasons)} seasons")
+    print(f"  {'load all matches into pandas':40s} {load_ms:10.1f} ms")
+    for name, ms in timings.items():
+        print(f"  {name:40s} {ms:10.1f} ms")
+    print(f"  {'startup before (load + loop)':40s} {load_ms + timings['legacy loop (matches already loaded)']:10.1f} ms")
+    print(f"  {'startup now (manifest)':40s} {timings['TeamSeasonIndex from manifest']:10.1f} ms")
@@ -0,0 +1,42 @@
+"""
+Memory report for the processed match data: the original object/int64 schema
+against the compact categorical/int8 schema written by create_parquet.py.
+Run from the repo root with: python benchmarks/memory_report.py
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pandas as pd
+from utils import compact_dtypes
+
+
+def legacy_frame() -> pd.DataFrame:
+    """Load the raw CSV the way create_parquet.py did before the compact schema."""
+    df = pd.read_csv("data/raw/epl_final.csv")
+    df.columns = df.columns.str.strip()
+    for col in ("Season", "HomeTeam", "AwayTeam", "FullTimeResult"):
+        df[col] = df[col].astype(str).str.strip()
+    df["MatchDate"] = pd.to_datetime(df["MatchDate"])
+    df["Result"] = df["FullTimeResult"].map({"H": "Home team win", "A": "Away team win", "D": "Draw"})
+    return df
+
+
+def main():
+    before = legacy_frame()
+    after = compact_dtypes(before)
+
+    per_col = pd.DataFrame({
+        "before_bytes": before.memory_usage(deep=True, index=False),
+        "after_bytes":  after.memory_usage(deep=True, index=False),
+        "after_dtype":  after.dtypes.astype(str),
+    })
+    print(per_col.to_string())
+    print()
+    print(f"{'':22}{'before':>12}{'after':>12}")
+    print(f"{'matches frame':22}{before.memory_usage(deep=True).sum():>12,}{after.memory_usage(deep=True).sum():>12,}")
+
+
+if __name__ == "__main__":
+    main()
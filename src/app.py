@@ -1,6 +1,5 @@
-from shiny import App, ui, render, reactive
-import matplotlib.pyplot as plt
-from matplotlib.patches import Wedge
+from shiny import App, ui, render, reactive, req
+from shiny.types import SilentException
 import pandas as pd
 import json
 import sys
@@ -8,6 +7,10 @@ import os
 import base64
 import datetime
 import pathlib
+import atexit
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import ibis
 
@@ -18,35 +21,34 @@ from querychat import QueryChat
 # SETUP: Ensure sys.path includes src directory for local imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-try:
-    from utils import get_team_matches, assign_period
-except ImportError:
-    # Fallback implementations if utils.py is not available
-    def get_team_matches(df: pd.DataFrame, team: str) -> pd.DataFrame:
-        home = df[df["HomeTeam"] == team].copy()
-        away = df[df["AwayTeam"] == team].copy()
-        home["venue"] = "Home"
-        home["goals_for"] = home["FullTimeHomeGoals"]
-        home["goals_against"] = home["FullTimeAwayGoals"]
-        home["win"] = (home["FullTimeResult"] == "H").astype(int)
-        away["venue"] = "Away"
-        away["goals_for"] = away["FullTimeAwayGoals"]
-        away["goals_against"] = away["FullTimeHomeGoals"]
-        away["win"] = (away["FullTimeResult"] == "A").astype(int)
-        return pd.concat([home, away]).sort_values("MatchDate").reset_index(drop=True)
-
-    def assign_period(df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        n = len(df)
-        if n == 0:
-            df["period"] = pd.Series(dtype=str)
-            return df
-        third = n / 3
-        df["period"] = [
-            "Early" if i < third else ("Mid" if i < 2 * third else "Late")
-            for i in range(n)
-        ]
-        return df
+from cache import LRUCache, normalize_sql
+from create_parquet import (
+    PROCESSED_DIR, arrow_matches, changed_seasons, clean_matches, dataset_files, dataset_metadata,
+    manifest_version, matches_metadata, open_matches_arrow,
+)
+from dashboard import build_snapshot
+from dataset import DatasetManager
+from db import CursorPool, configure, lock_down
+from export import EXPORT_FORMATS, export_filename, stream_export
+from filters import coalesced_filters, resolve_filters, set_filters
+from interaction_log import InteractionLogger, SheetsSink, SegmentedLog, RecentRows, sheet_tail
+from paging import PAGE_ROWS, page_count, page_slice, view_positions
+from plotting import (
+    cached_plot,
+    goals_home_away_figure,
+    winrate_figure,
+    goals_by_period_figure,
+    empty_ai_figure,
+    result_counts_figure,
+    avg_goals_figure,
+    season_counts_figure,
+    PERIODS,
+)
+from sql_guard import GuardedIbisSource, QueryTimeout
+from utils import (
+    get_team_matches, metrics_cube_from_totals, metrics_totals_ibis, summarize_matches, compact_dtypes,
+    TeamSeasonIndex,
+)
 
 
 # ENVIRONMENT SETUP
@@ -64,6 +66,7 @@ except ImportError:
 _LOG_DIR = pathlib.Path("logs")
 _LOG_DIR.mkdir(exist_ok=True)
 _LOG_CSV = _LOG_DIR / "querychat_log.csv"
+_LOG_SEGMENTS_DIR = _LOG_DIR / "querychat"
 
 _GSPREAD_ENABLED = False
 _GSPREAD_WS = None
@@ -122,102 +125,166 @@ def _init_gspread():
 _init_gspread()
 
 if not _GSPREAD_ENABLED:
-    print("ℹ Logs will be written to logs/querychat_log.csv")
-
+    print(f"ℹ Logs will be written to {_LOG_SEGMENTS_DIR}/")
 
-def log_interaction(query: str, response: str, timestamp: str):
-    """Log AI interaction to Google Sheets or local CSV."""
-    row = [timestamp, query or "", response or ""]
 
-    if _GSPREAD_ENABLED and _GSPREAD_WS is not None:
-        try:
-            _GSPREAD_WS.append_row(row, value_input_option="USER_ENTERED")
-            return
-        except Exception as e:
-            print(f"ERROR appending to Google Sheet: {e}")
-
-    # Fallback: write to CSV
+# Local logs are day/size-rotated segments, compacted to zstd parquet once closed. Every worker
+# process writes its own segments in the shared directory. A log from before the segment store
+# (logs/querychat_log.csv) is moved into it on first start, by whichever worker claims it first.
+RECENT_LOG_ROWS = 50
+LOG_SEGMENTS = SegmentedLog(_LOG_SEGMENTS_DIR, capacity=RECENT_LOG_ROWS)
+if _LOG_CSV.exists():
     try:
-        import csv
-        exists = _LOG_CSV.exists()
-        with open(_LOG_CSV, "a", newline="", encoding="utf-8") as fh:
-            writer = csv.writer(fh)
-            if not exists:
-                writer.writerow(["timestamp", "query", "response"])
-            writer.writerow(row)
+        LOG_SEGMENTS.import_csv(_LOG_CSV)
     except Exception as e:
-        print(f"ERROR writing to CSV log: {e}")
+        print(f"ERROR importing {_LOG_CSV} into {_LOG_SEGMENTS_DIR}: {e}")
+
+# The logs tab shows the newest rows without re-reading the whole log: the newest segment is read
+# from the end and cached until it changes; with Sheets, a ring buffer is fed by the writer below
+# and re-read from the tail of the sheet at most every RECENT_LOG_TTL seconds, so rows from the
+# other workers show up too.
+RECENT_LOG_TTL = 15.0
+RECENT_LOGS = (
+    RecentRows(lambda: sheet_tail(_GSPREAD_WS, RECENT_LOG_ROWS), capacity=RECENT_LOG_ROWS, ttl=RECENT_LOG_TTL)
+    if _GSPREAD_ENABLED else LOG_SEGMENTS
+)
 
+# Rows are written by a background thread, in batches, so Sheets latency never blocks a session.
+# If a Sheets append fails the batch goes to the local segments instead.
+INTERACTION_LOG = InteractionLogger(
+    SheetsSink(_GSPREAD_WS) if _GSPREAD_ENABLED else LOG_SEGMENTS,
+    fallback=LOG_SEGMENTS if _GSPREAD_ENABLED else None,
+    on_write=RECENT_LOGS.extend if _GSPREAD_ENABLED else None,
+)
+atexit.register(INTERACTION_LOG.close)
 
-def read_recent_logs(n: int = 50) -> pd.DataFrame:
-    """Read recent logs from Google Sheets or CSV."""
-    if _GSPREAD_ENABLED and _GSPREAD_WS is not None:
-        try:
-            records = _GSPREAD_WS.get_all_records()
-            df = pd.DataFrame(records)
-            if "timestamp" in df.columns:
-                df = df.rename(columns={
-                    "timestamp": "Timestamp",
-                    "query": "Query",
-                    "response": "Response"
-                })
-            return df.sort_values("Timestamp", ascending=False).head(n)
-        except Exception:
-            pass
 
-    if _LOG_CSV.exists():
-        try:
-            df = pd.read_csv(_LOG_CSV)
-            if "timestamp" in df.columns:
-                df = df.rename(columns={
-                    "timestamp": "Timestamp",
-                    "query": "Query",
-                    "response": "Response"
-                })
-            return df.sort_values("Timestamp", ascending=False).head(n)
-        except Exception:
-            return pd.DataFrame()
+def log_interaction(query: str, response: str, timestamp: str, sql: str = ""):
+    """Queue an AI interaction for the background writer (Google Sheets or local log segments)."""
+    INTERACTION_LOG.log([timestamp, query or "", response or "", sql or ""])
 
-    return pd.DataFrame()
+
+def read_recent_logs(n: int = RECENT_LOG_ROWS) -> pd.DataFrame:
+    """Most recent logs from Google Sheets or the local log segments, newest first."""
+    try:
+        return RECENT_LOGS.recent(n)
+    except Exception as e:
+        print(f"ERROR reading recent logs: {e}")
+        return pd.DataFrame()
 
 
 # DATA LOADING
+# Nothing is materialized into pandas at startup: the filter metadata comes from the build
+# manifest, KPIs from an aggregate query, and match rows are queried on demand.
+# One in-process DuckDB database for the whole app. DuckDB runs each query on EPL_DB_THREADS
+# threads (default: every core), within EPL_DB_MEMORY_LIMIT if set; EPL_DB_CURSORS cursors
+# (default: one per core, up to 16) serve the dashboard's worker threads.
+DB_THREADS = int(os.getenv("EPL_DB_THREADS", 0)) or None
+DB_MEMORY_LIMIT = os.getenv("EPL_DB_MEMORY_LIMIT") or None
+DB_CURSORS = int(os.getenv("EPL_DB_CURSORS", 0)) or min(os.cpu_count() or 1, 16)
+
 con = ibis.duckdb.connect()
+configure(con, DB_THREADS, DB_MEMORY_LIMIT)
+
+# The main connection serves the event loop (startup, AI queries); other threads borrow a cursor
+DB_POOL = CursorPool(con, DB_CURSORS)
+
+# The AI explorer runs model-written SQL on this database, so DuckDB may only read the processed
+# data: read_text('.env') and the like fail, and SQL cannot change the setting back
+lock_down(con, [PROCESSED_DIR])
+
+# How often (seconds) the app checks the build manifest for a new dataset version, and how often
+# each session checks whether one was swapped in; 0 turns hot reload off
+DATA_POLL_SECONDS = float(os.getenv("EPL_DATA_POLL_SECONDS", 5))
+
+
+def load_dataset() -> dict:
+    """
+    Everything the app derives from the processed build, loaded on a pooled cursor:
+    - files: the parquet files behind the epl_matches view
+    - meta / index: the manifest's filter metadata and its TeamSeasonIndex
+    - arrow: the build's Arrow IPC copy, memory-mapped (shared by every worker process on the host)
+    - cube: per-(team, season, result) KPI metrics, so KPI cards never re-query DuckDB
+    The epl_matches view is replaced last, once the rest has loaded, so a failed reload leaves the
+    previous dataset in place.
+    """
+    with DB_POOL.checkout() as backend:
+        # Season comes from the partition directory, so DuckDB prunes files on Season filters. The
+        # view reads the files itself (no temp view in between), so every cursor can query it.
+        files = [str(f) for f in dataset_files()]
+        source = backend.sql(f"SELECT * FROM read_parquet({files}, hive_partitioning = true)").relocate("Season")
+        meta = dataset_metadata()
+        index = TeamSeasonIndex(meta["team_seasons"])
+        arrow = open_matches_arrow()
+        # DuckDB scans the mapped Arrow table in place when there is one, so no parquet is decoded
+        totals = metrics_totals_ibis(ibis.memtable(arrow) if arrow is not None else source)
+        cube = metrics_cube_from_totals(backend.execute(totals)) if index.teams else {}
+        backend.create_view("epl_matches", source, overwrite=True)
+    return dict(files=files, meta=meta, index=index, arrow=arrow, cube=cube)
+
+
+def load_csv_dataset() -> dict:
+    """load_dataset() from the raw CSV, for when there is no processed build."""
+    try:
+        df_raw = clean_matches(pd.read_csv("data/raw/epl_final.csv"))
+    except Exception as e:
+        print(f"ERROR: Could not load data: {e}")
+        df_raw = pd.DataFrame()
+    con.con.from_df(df_raw).create("epl_matches")
+    meta = matches_metadata(df_raw)
+    index = TeamSeasonIndex(meta["team_seasons"])
+    cube = metrics_cube_from_totals(metrics_totals_ibis(con.table("epl_matches")).execute()) if index.teams else {}
+    return dict(files=[], meta=meta, index=index, arrow=None, cube=cube)
+
+
+# The current dataset. A new build (python src/create_parquet.py) is loaded in the background and
+# swapped in without a restart; every query reads DATASET.current, and every cache is keyed by
+# DATASET.version.
 try:
-    tbl_all = con.read_parquet("data/processed/epl_final.parquet")
-    df_meta = tbl_all.execute()
+    DATASET = DatasetManager(load_dataset, manifest_version, interval=DATA_POLL_SECONDS)
 except Exception as e:
     print(f"⚠ Could not load parquet: {e}")
-    try:
-        df_meta = pd.read_csv("data/raw/epl_final.csv")
-        tbl_all = con.from_pandas(df_meta)
-    except Exception as e2:
-        print(f"ERROR: Could not load data: {e2}")
-        df_meta = pd.DataFrame()
-        tbl_all = con.from_pandas(df_meta)
+    DATASET = DatasetManager(load_csv_dataset, lambda: None, interval=0)
+atexit.register(DATASET.close)
 
+# Bound to the view by name, so it reads whichever version the view currently points at
+tbl_all = con.table("epl_matches")
+
+
+def dataset_version():
+    """Version of the dataset currently swapped in; the shared caches are cleared when it changes."""
+    return DATASET.version
 
-# UI METADATA
-ALL_TEAMS = sorted(set(df_meta["HomeTeam"].tolist() + df_meta["AwayTeam"].tolist())) if not df_meta.empty else []
-ALL_SEASONS = sorted(df_meta["Season"].unique().tolist()) if not df_meta.empty else []
 
-TEAM_SEASONS = {}
-for team in ALL_TEAMS:
-    seasons = sorted(df_meta[
-        (df_meta["HomeTeam"] == team) | (df_meta["AwayTeam"] == team)
-    ]["Season"].unique().tolist())
-    TEAM_SEASONS[team] = seasons
+def seasons_for(team: str) -> list:
+    """The seasons `team` played, in the current dataset."""
+    return DATASET.current["index"].seasons_for(team)
+
+
+# UI METADATA
+# The dataset the page is built from; open sessions follow later versions (see _follow_dataset)
+UI_DATA = DATASET.current
+SEASON_INDEX = UI_DATA["index"]
+ALL_TEAMS = SEASON_INDEX.teams
 
 # Default season = Arsenal's latest season if available
-DEFAULT_SEASON = TEAM_SEASONS.get("Arsenal", ALL_SEASONS)[-1] if ALL_SEASONS else None
+DEFAULT_TEAM = "Arsenal"
+DEFAULT_SEASON = SEASON_INDEX.latest_season(DEFAULT_TEAM)
 
-DEFAULT_DATE_START = df_meta["MatchDate"].min() if not df_meta.empty else None
-DEFAULT_DATE_END = df_meta["MatchDate"].max() if not df_meta.empty else None
+DEFAULT_DATE_START = pd.Timestamp(UI_DATA["meta"]["min_match_date"]) if UI_DATA["meta"]["min_match_date"] else None
+DEFAULT_DATE_END = pd.Timestamp(UI_DATA["meta"]["max_match_date"]) if UI_DATA["meta"]["max_match_date"] else None
 
 
 # AI INTEGRATION
+# QueryChat queries the epl_matches view on the shared connection, so the AI explorer never needs
+# a copy of the data. Generated SQL runs read-only, capped at AI_ROW_CAP rows and interrupted after
+# AI_QUERY_TIMEOUT seconds (a cross join of the matches would otherwise hold the worker). The AI
+# explorer runs QueryChat's SQL off the event loop, on a pooled cursor (see ai_result_async).
+AI_ROW_CAP = 20_000
+AI_QUERY_TIMEOUT = 10.0
+AI_SOURCE = GuardedIbisSource(tbl_all, "epl_matches", row_cap=AI_ROW_CAP, timeout=AI_QUERY_TIMEOUT)
 qc = QueryChat(
-    df_meta,
+    AI_SOURCE,
     "epl_matches",
     client="anthropic/claude-haiku-4-5"
 )
@@ -291,6 +358,8 @@ html, body, .container-fluid {
 .sidebar label{ font-size:12px; font-weight:600; color:#374151; }
 .sidebar .form-select{ font-size:12px; border-radius:6px; border:1px solid #d1d5db; }
 .btn-reset{ padding:6px 10px; font-size:12px; border-radius:6px; background:#f3f4f6; color:#111827; }
+.pager{ display:flex; align-items:center; justify-content:flex-end; gap:8px; margin-top:8px; font-size:12px; color:#6b7280; }
+.btn-page{ padding:2px 10px; font-size:12px; border-radius:6px; background:#f3f4f6; color:#111827; }
 
 /* AI chat fixed container */
 .ai-sidebar {
@@ -359,16 +428,6 @@ html, body, .container-fluid {
 """)
 
 
-# COLOR SCHEME
-C_HOME = "#472A4B"
-C_AWAY = "#e15759"
-C_GOALS_FOR = "#472A4B"
-C_GOALS_AGAINST = "#e15759"
-C_EARLY = "#472A4B"
-C_MID = "#e15759"
-C_LATE = "#4e79a7"
-
-
 # HELPER FUNCTIONS
 def hero_header():
     """Render the hero header with stadium image and title."""
@@ -399,9 +458,19 @@ def hero_header():
     )
 
 
+def pager_ui(table_id: str):
+    """Prev/next buttons and the row-range label for a server-side paged data grid."""
+    return ui.div(
+        ui.input_action_button(f"{table_id}_prev", "‹ Prev", class_="btn-page"),
+        ui.output_text(f"{table_id}_pager", inline=True),
+        ui.input_action_button(f"{table_id}_next", "Next ›", class_="btn-page"),
+        class_="pager",
+    )
+
+
 def filter_matches_ibis(team: str, season: str, result: str):
     """Build an ibis filter expression for team, season, and result."""
-    expr = tbl_all
+    expr = thread_table()
 
     # Filter by team (home OR away)
     if team:
@@ -429,6 +498,195 @@ def filter_matches_ibis(team: str, season: str, result: str):
     return expr
 
 
+# Executed filter results shared by every session; ~46 teams x 25 seasons x 4 results
+MATCHES_CACHE = LRUCache(max_entries=1024, max_bytes=64 * 1024 * 1024, version=dataset_version)
+
+
+def query_matches(team: str, season: str, result: str) -> pd.DataFrame:
+    """Run filter_matches_ibis and add team-perspective columns, cached across sessions."""
+    def _run():
+        index = DATASET.current["index"]
+        mf = compact_dtypes(filter_matches_ibis(team, season, result).execute(), index.teams, index.seasons)
+        if not mf.empty:
+            mf = get_team_matches(mf, team)
+        return mf
+
+    return MATCHES_CACHE.get_or_compute((team, season, result), _run)
+
+
+# Dashboard snapshots shared by every session, one per (team, season, result)
+SNAPSHOT_CACHE = LRUCache(max_entries=1024, max_bytes=64 * 1024 * 1024, version=dataset_version)
+
+
+def dashboard_snapshot(team: str, season: str, result: str) -> dict:
+    """Every KPI, summary and table of the dashboard tab for a filter (see build_snapshot), cached across sessions."""
+    def _build():
+        data = DATASET.current
+        return build_snapshot(query_matches(team, season, result), data["cube"], team, season, data["index"].seasons)
+
+    return SNAPSHOT_CACHE.get_or_compute((team, season, result), _build)
+
+
+def thread_table():
+    """epl_matches on the calling thread's pooled cursor if it holds one, else tbl_all."""
+    return DB_POOL.table("epl_matches") if DB_POOL.current() is not None else tbl_all
+
+
+# Dashboard queries run off the event loop in a bounded pool shared by every session, one worker
+# per pooled cursor
+DASHBOARD_WORKERS = DB_CURSORS
+DASHBOARD_POOL = ThreadPoolExecutor(max_workers=DASHBOARD_WORKERS, thread_name_prefix="dashboard")
+atexit.register(DASHBOARD_POOL.shutdown, wait=False, cancel_futures=True)
+
+
+def _pooled_snapshot(team: str, season: str, result: str) -> dict:
+    """dashboard_snapshot() with a pooled cursor checked out for its queries."""
+    with DB_POOL.checkout():
+        return dashboard_snapshot(team, season, result)
+
+
+async def dashboard_snapshot_async(team: str, season: str, result: str) -> dict:
+    """
+    dashboard_snapshot() in DASHBOARD_POOL, awaited without blocking the event loop. Cancelling
+    the await drops the work if it has not started; a query already running finishes and is cached.
+    """
+    return await asyncio.wrap_future(DASHBOARD_POOL.submit(_pooled_snapshot, team, season, result))
+
+
+def all_matches() -> pd.DataFrame:
+    """
+    Every match in pandas, ordered by date; shared across sessions. A zero-copy view of the mapped
+    Arrow file when the build wrote one, otherwise queried on first use.
+    """
+    def _load():
+        data = DATASET.current
+        if data["arrow"] is not None:
+            return arrow_matches(data["arrow"])
+        return compact_dtypes(thread_table().order_by("MatchDate").execute(), data["index"].teams, data["index"].seasons)
+
+    return MATCHES_CACHE.get_or_compute("all_matches", _load)
+
+
+# QueryChat results and their summaries, keyed by normalized SQL and shared by every session, so a
+# repeated question is answered without re-running its query
+AI_RESULTS = LRUCache(max_entries=64, max_bytes=128 * 1024 * 1024, version=dataset_version, ttl=3600)
+AI_WARM_QUERIES = 20
+AI_WARM_DAYS = 30
+
+
+def ai_result(sql: str) -> dict:
+    """
+    The result frame ("df"), its summarize_matches() aggregates ("summary") and whether it hit the
+    row cap ("truncated") for a QueryChat SQL query, or for all matches when sql is empty, cached
+    by normalized SQL. The query runs through AI_SOURCE on the calling thread's pooled cursor if it
+    holds one. A query that times out raises QueryTimeout and is not cached.
+    """
+    def _run():
+        if not sql:
+            df, truncated = all_matches(), False
+        else:
+            raw = AI_SOURCE.execute_query(sql, backend=DB_POOL.current())
+            truncated = raw.attrs.get("truncated", False)
+            index = DATASET.current["index"]
+            df = compact_dtypes(raw, index.teams, index.seasons)
+        return dict(df=df, summary=summarize_matches(df), truncated=truncated)
+
+    return AI_RESULTS.get_or_compute(normalize_sql(sql), _run)
+
+
+def _pooled_ai_result(sql: str) -> dict:
+    """ai_result() with a pooled cursor checked out, so its time limit interrupts only that cursor."""
+    with DB_POOL.checkout():
+        return ai_result(sql)
+
+
+async def ai_result_async(sql: str) -> dict:
+    """ai_result() in DASHBOARD_POOL, awaited without blocking the event loop."""
+    return await asyncio.wrap_future(DASHBOARD_POOL.submit(_pooled_ai_result, sql))
+
+
+# A download streams the query's whole result (no row cap) on its own cursor, which it holds until
+# the client has the file, so a slow client never holds one of the pooled cursors
+AI_EXPORT_TIMEOUT = 300.0
+
+
+def ai_export_chunks(sql: str, fmt: str):
+    """
+    The AI explorer's full result for `sql` (all matches when empty) encoded as `fmt`, in byte
+    chunks. A blocking generator; iterate it with iterate_in_pool().
+    """
+    if not sql:
+        yield from stream_export(all_matches(), fmt)
+        return
+    # A plain DuckDB cursor: an ibis backend would change settings, which lock_down() forbids
+    cursor = con.con.cursor()
+    try:
+        yield from stream_export(AI_SOURCE.stream_query(sql, cursor, timeout=AI_EXPORT_TIMEOUT), fmt)
+    finally:
+        cursor.close()
+
+
+async def iterate_in_pool(chunks):
+    """
+    Iterate a blocking generator one item at a time in DASHBOARD_POOL, without blocking the event
+    loop. Stopping early (e.g. the client went away) closes the generator once its step finishes.
+    """
+    done = object()
+    step = None
+    try:
+        while True:
+            step = DASHBOARD_POOL.submit(next, chunks, done)
+            item = await asyncio.wrap_future(step)
+            if item is done:
+                return
+            yield item
+    finally:
+        if step is not None and not step.done():
+            step.add_done_callback(lambda _: DASHBOARD_POOL.submit(chunks.close))
+        else:
+            DASHBOARD_POOL.submit(chunks.close)
+
+
+def warm_ai_results(log: pd.DataFrame, limit: int = AI_WARM_QUERIES) -> int:
+    """Run the most frequent read-only queries in an interaction log so repeats start as hits."""
+    sql = log["sql"].astype(str).str.strip()
+    sql = sql[sql.str.match(r"(?is)(select|with)\b")]
+    keys = sql.map(normalize_sql)
+    first_seen = sql.groupby(keys, sort=False).first()
+    warmed = 0
+    for key in keys.value_counts().index[:limit]:
+        try:
+            _pooled_ai_result(first_seen[key])
+            warmed += 1
+        except Exception as e:
+            print(f"ERROR warming AI result cache: {e}")
+    return warmed
+
+
+def _warm_from_log():
+    """Warm AI_RESULTS from the last AI_WARM_DAYS of the local interaction log."""
+    try:
+        since = datetime.datetime.utcnow() - datetime.timedelta(days=AI_WARM_DAYS)
+        warmed = warm_ai_results(LOG_SEGMENTS.read(start=since))
+        if warmed:
+            print(f"✓ Warmed AI result cache with {warmed} logged queries")
+    except Exception as e:
+        print(f"ERROR warming AI result cache: {e}")
+
+
+# Warm on a background thread so startup does not wait for it. Each query borrows a pooled cursor
+# only while it runs, so dashboard tasks interleave with the warming.
+if ALL_TEAMS:
+    threading.Thread(target=_warm_from_log, name="ai-warm", daemon=True).start()
+
+
+
+# Download format dropdowns: CSV, gzip CSV or parquet, all streamed in chunks
+DOWNLOAD_FORMAT_CHOICES = {fmt: info["label"] for fmt, info in EXPORT_FORMATS.items()}
+
+# Rendered dashboard plots (PNG data URIs) shared by every session
+FIGURE_CACHE = LRUCache(max_entries=512, max_bytes=64 * 1024 * 1024, version=dataset_version)
+
 
 # UI DEFINITION
 
@@ -450,11 +708,14 @@ app_ui = ui.page_fluid(
                     # Sidebar
                     ui.div(
                         ui.div("⚽ Filters", class_="sidebar-title"),
-                        ui.input_select("input_team", "Team", choices=ALL_TEAMS, selected="Arsenal"),
-                        ui.input_select("input_season", "Season", choices=ALL_SEASONS, selected=DEFAULT_SEASON),
+                        ui.input_select("input_team", "Team", choices=ALL_TEAMS, selected=DEFAULT_TEAM),
+                        ui.input_select("input_season", "Season", choices=SEASON_INDEX.seasons_for(DEFAULT_TEAM), selected=DEFAULT_SEASON),
                         ui.input_select("input_result", "Match result", choices=["All", "Win", "Draw", "Loss"], selected="All"),
                         ui.output_ui("out_active_filters"),
                         ui.input_action_button("btn_reset", "Reset filters", class_="btn-reset"),
+                        ui.hr(),
+                        ui.input_select("matches_download_format", "Download format", choices=DOWNLOAD_FORMAT_CHOICES, selected="csv"),
+                        ui.download_button("download_matches", "Download matches"),
                         class_="sidebar",
                     ),
 
@@ -514,6 +775,7 @@ app_ui = ui.page_fluid(
                                 ui.div("Match Details", class_="chart-title"),
                                 ui.div("Filtered match list", class_="chart-subtitle"),
                                 ui.output_data_frame("out_matches_table"),
+                                pager_ui("out_matches_table"),
                                 class_="table-card",
                             ),
                             
@@ -548,6 +810,7 @@ app_ui = ui.page_fluid(
                     
                     ui.hr(),
                     ui.input_action_button("ai_reset", "Reset AI filters", class_="btn-reset"),
+                    ui.input_select("ai_download_format", "Download format", choices=DOWNLOAD_FORMAT_CHOICES, selected="csv"),
                     ui.download_button("download_ai_data", "Download filtered data"),
                     class_="sidebar ai-sidebar",
                 ),
@@ -564,6 +827,7 @@ app_ui = ui.page_fluid(
                             ui.div("Filtered Matches", class_="chart-title"),
                             ui.div("Data returned by the AI filter", class_="chart-subtitle"),
                             ui.output_data_frame("ai_table"),
+                            pager_ui("ai_table"),
                             class_="chart-card",
                         ),
                         ui.div(
@@ -624,6 +888,69 @@ document.addEventListener('DOMContentLoaded', function(){
 )
 
 
+# PAGED TABLES
+
+def paged_table(input, output, table_id: str, frame):
+    """
+    Register data grid `table_id` over the frame returned by `frame()` with server-side paging, in
+    the session whose server() was given `input` and `output`: the grid's sort and filter clicks
+    order the whole frame here, and only the current page is sent, with pager_ui(table_id)'s
+    buttons moving between pages.
+    """
+    page = reactive.value(0)
+
+    def grid_state(name: str) -> tuple:
+        try:
+            return tuple(input[f"{table_id}_{name}"]())
+        except SilentException:
+            return ()
+
+    @reactive.calc
+    def positions():
+        return view_positions(frame(), grid_state("column_sort"), grid_state("column_filter"))
+
+    @reactive.calc
+    def current_page():
+        return page_slice(frame(), positions(), page())
+
+    @reactive.effect
+    def _first_page_on_new_view():
+        positions()
+        page.set(0)
+
+    @reactive.effect
+    @reactive.event(input[f"{table_id}_prev"])
+    def _prev_page():
+        page.set(max(page() - 1, 0))
+
+    @reactive.effect
+    @reactive.event(input[f"{table_id}_next"])
+    def _next_page():
+        page.set(min(page() + 1, page_count(len(positions())) - 1))
+
+    @output(id=table_id)
+    @render.data_frame
+    def grid():
+        # Re-rendered only for a new result; page, sort and filter changes go through update_data
+        df = frame()
+        first = page_slice(df, view_positions(df), 0)
+        return render.DataGrid(first, width="100%", filters=True, summary=False)
+
+    @reactive.effect
+    async def _send_page():
+        await grid.update_data(current_page())
+
+    @output(id=f"{table_id}_pager")
+    @render.text
+    def pager():
+        n = len(positions())
+        if n == 0:
+            return "No rows"
+        p = min(page(), page_count(n) - 1)
+        start = p * PAGE_ROWS
+        return f"Rows {start + 1:,}–{min(start + PAGE_ROWS, n):,} of {n:,} · page {p + 1} of {page_count(n):,}"
+
+
 # SERVER LOGIC
 
 # Track last logged interaction to avoid duplicate logging
@@ -637,23 +964,71 @@ def server(input, output, session):
     # Initialize QueryChat server
     qc_vals = qc.server()
 
+    # The (team, season, result) filters, changed once per user action
+    filters = coalesced_filters(
+        input.input_team, input.input_season, input.input_result,
+        seasons_for, (DEFAULT_TEAM, DEFAULT_SEASON, "All"),
+    )
+
+    # Bumped when a newly swapped-in dataset changes what the dashboard or the AI explorer shows
+    dashboard_refresh = reactive.value(0)
+    ai_refresh = reactive.value(0)
+    # The dataset this session's selects and outputs were last built from
+    shown = dict(data=UI_DATA)
+
+    if DATA_POLL_SECONDS > 0:
+        @reactive.poll(dataset_version, DATA_POLL_SECONDS)
+        def dataset():
+            """The current dataset, re-read when a new version has been swapped in."""
+            return DATASET.current
+
+        @reactive.effect
+        @reactive.event(dataset)
+        def _follow_dataset():
+            """
+            Catch up with a dataset version swapped in while the session is open, refreshing only
+            what it changed: the team and season choices if they changed, the dashboard if the
+            selected or the previous season (the KPI comparison) changed, and the AI explorer's
+            result if any season did.
+            """
+            old, new = shown["data"], dataset()
+            if new is old:
+                return
+            shown["data"] = new
+            team, season, _ = filters()
+            if new["index"].teams != old["index"].teams:
+                ui.update_select("input_team", choices=new["index"].teams, selected=team)
+            if new["index"].seasons_for(team) != old["index"].seasons_for(team):
+                ui.update_select("input_season", choices=new["index"].seasons_for(team), selected=season)
+
+            changed = changed_seasons(old["files"], new["files"])
+            seasons = new["index"].seasons
+            previous = seasons[seasons.index(season) - 1] if season in seasons[1:] else None
+            if changed & {season, previous}:
+                dashboard_refresh.set(dashboard_refresh.get() + 1)
+            if changed:
+                ai_refresh.set(ai_refresh.get() + 1)
+
     # REACTIVE EFFECTS (Side effects like logging)
     @reactive.effect
     @reactive.event(input.input_team)
     def _update_seasons_for_team():
-        """Update available seasons when team changes."""
+        """
+        Update available seasons when team changes. The filters already use the resolved season,
+        so the echoed season input does not recompute anything.
+        """
         team = input.input_team()
-        available = TEAM_SEASONS.get(team, ALL_SEASONS)
-        current_season = input.input_season()
-        selected = current_season if current_season in available else available[-1]
-        ui.update_select("input_season", choices=available, selected=selected)
+        _, selected, _ = resolve_filters(team, input.input_season(), "All", seasons_for)
+        ui.update_select("input_season", choices=seasons_for(team), selected=selected)
         
     @reactive.effect
     @reactive.event(input.btn_reset)
     def _reset_filters():
-        """Reset all filters to defaults when reset button is clicked."""
-        ui.update_select("input_team", selected="Arsenal")
-        ui.update_select("input_season", selected=DEFAULT_SEASON)
+        """Reset all filters to defaults when reset button is clicked, as one filter change."""
+        season = DATASET.current["index"].latest_season(DEFAULT_TEAM)
+        set_filters(filters, (DEFAULT_TEAM, season, "All"))
+        ui.update_select("input_team", selected=DEFAULT_TEAM)
+        ui.update_select("input_season", choices=seasons_for(DEFAULT_TEAM), selected=season)
         ui.update_select("input_result", selected="All")
         
     @reactive.effect
@@ -661,10 +1036,6 @@ def server(input, output, session):
         """Log AI query interactions to Google Sheets or CSV (NO UI RENDERING)."""
         global _last_logged_interaction
         try:
-            df = qc_vals.df()
-            if df is None or df.empty:
-                return
-
             title = ""
             try:
                 title = qc_vals.title() or ""
@@ -674,15 +1045,19 @@ def server(input, output, session):
             if not title.strip():
                 return
 
-            n = len(df)
-            cols = ",".join(list(df.columns)[:6]) if not df.empty else ""
-            response_summary = f"returned {n} rows; cols: {cols}"
+            summary = ai_summary()
+            if summary["n"] == 0:
+                return
+
+            cols = ",".join(summary["columns"][:6])
+            response_summary = f"returned {summary['n']} rows; cols: {cols}"
+            sql = qc_vals.sql() or ""
             ts = datetime.datetime.utcnow().isoformat()
 
             pair = (title, response_summary)
             if pair != _last_logged_interaction:
                 try:
-                    log_interaction(title, response_summary, ts)
+                    log_interaction(title, response_summary, ts, sql)
                     _last_logged_interaction = pair
                 except Exception as e:
                     print(f"ERROR logging AI interaction: {e}")
@@ -697,70 +1072,86 @@ def server(input, output, session):
         qc_vals.title.set(None)
 
     # REACTIVE CALCULATIONS
-    @reactive.calc
-    def matches_filtered():
-        """Filter matches based on inputs using Ibis lazy evaluation."""
-        team = input.input_team()
-        season = input.input_season()
-        result = input.input_result()
+    @reactive.extended_task
+    async def ai_task(sql: str) -> dict:
+        """Run the AI explorer's query in the worker pool."""
+        return await ai_result_async(sql)
 
-        expr = filter_matches_ibis(team, season, result)
-        mf = expr.execute()
+    @reactive.effect
+    def _start_ai():
+        """
+        Start the AI explorer's query when QueryChat's SQL changes (or when a reload changed its
+        data), cancelling any still running or queued for an older query.
+        """
+        ai_refresh()
+        sql = qc_vals.sql() or ""
+        ai_task.cancel()
+        ai_task.invoke(sql)
 
-        if not mf.empty:
-            mf = get_team_matches(mf, team)
+    @reactive.calc
+    def ai_current():
+        """The AI explorer's result and summary, from the shared cache when the SQL was seen before."""
+        if ai_task.status() == "cancelled":
+            req(False, cancel_output="progress")
+        try:
+            return ai_task.result()
+        except QueryTimeout as e:
+            empty = AI_SOURCE.empty_result()
+            return dict(df=empty, summary=summarize_matches(empty), truncated=False, error=str(e))
 
-        return mf
+    @reactive.calc
+    def ai_df():
+        """The AI explorer's current matches in pandas (read-only, shared across sessions)."""
+        return ai_current()["df"]
 
     @reactive.calc
-    def summary_home_away():
-        """Calculate Home vs Away statistics."""
-        mf = matches_filtered()
-        out = {}
-        for venue in ("Home", "Away"):
-            sub = mf[mf["venue"] == venue] if not mf.empty else pd.DataFrame()
-            if sub.empty:
-                out[venue] = dict(win_rate=0, avg_goals_for=0, avg_goals_against=0, n=0)
-            else:
-                out[venue] = dict(
-                    win_rate=sub["win"].mean() * 100,
-                    avg_goals_for=sub["goals_for"].mean(),
-                    avg_goals_against=sub["goals_against"].mean(),
-                    n=len(sub),
-                )
-        return out
+    def ai_summary():
+        """Aggregates of the AI result shared by the AI charts, the title and the logger."""
+        return ai_current()["summary"]
+
+    @reactive.extended_task
+    async def snapshot_task(team: str, season: str, result: str) -> dict:
+        """Build the dashboard snapshot in the worker pool."""
+        return await dashboard_snapshot_async(team, season, result)
+
+    # The filters and dataset version of the snapshot last started. The dashboard plots are keyed
+    # by it rather than by this session's reload counter, so sessions showing the same filters on
+    # the same data share cached figures; it changes only once the matching snapshot is running.
+    snapshot_key = reactive.value(None)
+
+    @reactive.effect
+    def _start_snapshot():
+        """
+        Start the snapshot for new filters (or for the same filters when a reload changed their
+        data), cancelling any still running or queued for old ones.
+        """
+        dashboard_refresh()
+        key = _filter_key()
+        snapshot_task.cancel()
+        snapshot_task.invoke(*key)
+        set_filters(snapshot_key, (key, dataset_version()))
 
     @reactive.calc
-    def summary_period():
-        """Calculate statistics by season period."""
-        mf = assign_period(matches_filtered())
-        out = {}
-        for period in ("Early", "Mid", "Late"):
-            sub = mf[mf["period"] == period] if not mf.empty else pd.DataFrame()
-            if sub.empty:
-                out[period] = dict(avg_goals=0, n=0)
-            else:
-                out[period] = dict(
-                    avg_goals=sub["goals_for"].mean(),
-                    n=len(sub),
-                )
-        return out
+    def snapshot():
+        """
+        The dashboard snapshot for the current filters; every dashboard output reads from it and
+        shows as recalculating while it is built.
+        """
+        # A run is only cancelled to make way for one with newer filters, so keep waiting
+        if snapshot_task.status() == "cancelled":
+            req(False, cancel_output="progress")
+        return snapshot_task.result()
 
     # HELPER FUNCTIONS (used within server)
-    def _metrics_for_season(season: str):
-        """Get metrics for a specific season."""
-        expr = tbl_all.filter(tbl_all.Season == season)
-        df = expr.execute()
-        team = input.input_team()
-        mf = get_team_matches(df, team)
-        if mf.empty:
-            return dict(n=0, win_rate=0.0, avg_goals_for=0.0, avg_goals_against=0.0)
-        return dict(
-            n=len(mf),
-            win_rate=mf["win"].mean() * 100,
-            avg_goals_for=mf["goals_for"].mean(),
-            avg_goals_against=mf["goals_against"].mean(),
-        )
+    def _filter_key():
+        """Current (team, season, result) filters; the dashboard plots depend on nothing else."""
+        return filters()
+
+    def _plot_key():
+        """What the dashboard plots depend on: the filters, and the dataset version they were built on."""
+        key = snapshot_key()
+        req(key)
+        return key
 
     def _pct_change(curr, prev, abs_unit: str = ""):
         """Calculate percentage change with formatting."""
@@ -786,45 +1177,16 @@ def server(input, output, session):
             style="margin-left:6px;",
         )
 
-    def _style_ax(ax):
-        """Apply consistent styling to matplotlib axes."""
-        ax.spines[["top", "right"]].set_visible(False)
-        ax.yaxis.grid(True, linestyle="--", linewidth=0.6, alpha=0.45, zorder=0)
-        ax.set_axisbelow(True)
-        ax.tick_params(axis="both", labelsize=8)
-
-    def _bar_labels(ax, bars):
-        """Add labels above bars in matplotlib charts."""
-        ylim = ax.get_ylim()
-        for bar in bars:
-            h = bar.get_height()
-            ax.text(
-                bar.get_x() + bar.get_width() / 2,
-                h + (ylim[1] - ylim[0]) * 0.02,
-                f"{h:.1f}",
-                ha="center", va="bottom", fontsize=8, fontweight="600",
-            )
-
     # OUTPUTS (UI Rendering - NO SIDE EFFECTS)
     @output
     @render.ui
     def data_context_description():
         """Render the data context description."""
+        team, season, result = _filter_key()
         try:
-            team = input.input_team()
-        except Exception:
-            team = "—"
-        try:
-            season = input.input_season()
-        except Exception:
-            season = "—"
-        try:
-            result = input.input_result()
-        except Exception:
-            result = None
-        try:
-            mf = matches_filtered()
-            data_empty = mf.empty
+            data_empty = snapshot()["n"] == 0
+        except SilentException:
+            raise
         except Exception:
             data_empty = True
 
@@ -852,17 +1214,9 @@ def server(input, output, session):
     @render.ui
     def out_kpi_total():
         """Render total matches KPI."""
-        season = input.input_season()
-        curr = _metrics_for_season(season)["n"]
-        prev = None
-        try:
-            idx = ALL_SEASONS.index(season)
-            if idx > 0:
-                prev = ALL_SEASONS[idx - 1]
-        except Exception:
-            pass
-        prev_n = _metrics_for_season(prev)["n"] if prev else 0
-        comp = _pct_change(curr, prev_n)
+        kpis = snapshot()["kpis"]
+        curr = kpis["current"]["n"]
+        comp = _pct_change(curr, kpis["previous"]["n"])
         comp_ui = comp if comp is not None else ui.span("— vs previous season", class_="kpi-compare")
         return ui.div(
             ui.div(f"{curr}", style="font-size:22px; font-weight:700;"),
@@ -873,17 +1227,9 @@ def server(input, output, session):
     @render.ui
     def out_kpi_winrate():
         """Render win rate KPI."""
-        season = input.input_season()
-        curr = _metrics_for_season(season)["win_rate"]
-        prev = None
-        try:
-            idx = ALL_SEASONS.index(season)
-            if idx > 0:
-                prev = ALL_SEASONS[idx - 1]
-        except Exception:
-            pass
-        prev_val = _metrics_for_season(prev)["win_rate"] if prev else 0.0
-        comp = _pct_change(curr, prev_val)
+        kpis = snapshot()["kpis"]
+        curr = kpis["current"]["win_rate"]
+        comp = _pct_change(curr, kpis["previous"]["win_rate"])
         comp_ui = comp if comp is not None else ui.span("— vs previous season", class_="kpi-compare")
         return ui.div(
             ui.div(f"{curr:.1f}%", style="font-size:22px; font-weight:700;"),
@@ -894,17 +1240,9 @@ def server(input, output, session):
     @render.ui
     def out_kpi_goals_scored():
         """Render average goals scored KPI."""
-        season = input.input_season()
-        curr = _metrics_for_season(season)["avg_goals_for"]
-        prev = None
-        try:
-            idx = ALL_SEASONS.index(season)
-            if idx > 0:
-                prev = ALL_SEASONS[idx - 1]
-        except Exception:
-            pass
-        prev_val = _metrics_for_season(prev)["avg_goals_for"] if prev else 0.0
-        comp = _pct_change(curr, prev_val)
+        kpis = snapshot()["kpis"]
+        curr = kpis["current"]["avg_goals_for"]
+        comp = _pct_change(curr, kpis["previous"]["avg_goals_for"])
         comp_ui = comp if comp is not None else ui.span("— vs previous season", class_="kpi-compare")
         return ui.div(
             ui.div(f"{curr:.2f}", style="font-size:22px; font-weight:700;"),
@@ -915,17 +1253,9 @@ def server(input, output, session):
     @render.ui
     def out_kpi_goals_conceded():
         """Render average goals conceded KPI."""
-        season = input.input_season()
-        curr = _metrics_for_season(season)["avg_goals_against"]
-        prev = None
-        try:
-            idx = ALL_SEASONS.index(season)
-            if idx > 0:
-                prev = ALL_SEASONS[idx - 1]
-        except Exception:
-            pass
-        prev_val = _metrics_for_season(prev)["avg_goals_against"] if prev else 0.0
-        comp = _pct_change(curr, prev_val)
+        kpis = snapshot()["kpis"]
+        curr = kpis["current"]["avg_goals_against"]
+        comp = _pct_change(curr, kpis["previous"]["avg_goals_against"])
         comp_ui = comp if comp is not None else ui.span("— vs previous season", class_="kpi-compare")
         return ui.div(
             ui.div(f"{curr:.2f}", style="font-size:22px; font-weight:700;"),
@@ -937,188 +1267,80 @@ def server(input, output, session):
     def out_active_filters():
         """Render active filter chips (PURE RENDERING ONLY)."""
         parts = []
-        try:
-            team = input.input_team()
-            if team:
-                parts.append(ui.span(f"Team: {team}", class_="chip"))
-        except Exception:
-            pass
-        try:
-            season = input.input_season()
-            if season:
-                parts.append(ui.span(f"Season: {season}", class_="chip"))
-        except Exception:
-            pass
-        try:
-            result = input.input_result()
-            if result and result != "All":
-                parts.append(ui.span(f"Result: {result}", class_="chip"))
-        except Exception:
-            pass
+        team, season, result = _filter_key()
+        if team:
+            parts.append(ui.span(f"Team: {team}", class_="chip"))
+        if season:
+            parts.append(ui.span(f"Season: {season}", class_="chip"))
+        if result and result != "All":
+            parts.append(ui.span(f"Result: {result}", class_="chip"))
 
         if not parts:
             return ui.div(ui.span("No active filters", style="color:#9ca3af; font-size:12px;"))
         return ui.div(*parts, class_="active-filters")
 
     @output
-    @render.plot
+    @cached_plot(key=_plot_key, cache=FIGURE_CACHE)
     def out_goals_home_away():
         """Render Home vs Away goals chart."""
-        s = summary_home_away()
-        venues = ["Home", "Away"]
-        x = range(len(venues))
-        w = 0.35
-
-        fig, ax = plt.subplots(figsize=(5, 3.5))
-        fig.patch.set_facecolor("#fff")
-        ax.set_facecolor("#fff")
-
-        bars_for = ax.bar(
-            [i - w/2 for i in x],
-            [s[v]["avg_goals_for"] for v in venues],
-            width=w, color=C_GOALS_FOR, zorder=3, label="Goals Scored",
-        )
-        bars_against = ax.bar(
-            [i + w/2 for i in x],
-            [s[v]["avg_goals_against"] for v in venues],
-            width=w, color=C_GOALS_AGAINST, zorder=3, label="Goals Conceded",
-        )
-
-        ax.set_xticks(list(x))
-        ax.set_xticklabels([v for v in venues], fontsize=9)
-        ax.set_ylabel("Avg Goals", fontsize=9)
-        ax.set_ylim(0, max(
-            [s[v]["avg_goals_for"] for v in venues] +
-            [s[v]["avg_goals_against"] for v in venues] + [1]
-        ) * 1.35)
-        _style_ax(ax)
-        _bar_labels(ax, list(bars_for) + list(bars_against))
-        ax.legend(fontsize=8, frameon=False, loc="upper right")
-        fig.tight_layout(pad=0.8)
-        return fig
+        return goals_home_away_figure(snapshot()["home_away"])
 
     @output
-    @render.plot
+    @cached_plot(key=_plot_key, cache=FIGURE_CACHE)
     def out_winrate_home_away():
         """Render Home vs Away win rate chart."""
-        s = summary_home_away()
-        venues = ["Home", "Away"]
-        vals = [s[v]["win_rate"] for v in venues]
-
-        fig, axes = plt.subplots(1, 2, figsize=(8, 3.5))
-        fig.patch.set_facecolor("#fff")
-        bg_color = "#e0e4ea"
-
-        for ax, val, color, label in zip(axes, vals, [C_HOME, C_AWAY], venues):
-            ax.set_aspect("equal")
-            ax.axis("off")
-
-            bg = Wedge((0, 0), 1.0, 0, 180, width=0.22, facecolor=bg_color, edgecolor="none", lw=0)
-            ax.add_patch(bg)
-
-            frac = max(0.0, min(float(val) / 100.0 if val is not None else 0.0, 1.0))
-            if frac > 0:
-                start_ang = 180 - 180 * frac
-                fg = Wedge((0, 0), 1.0, start_ang, 180, width=0.22, facecolor=color, edgecolor="none", lw=0)
-                ax.add_patch(fg)
-
-            ax.text(0, -0.08, f"{(val or 0):.1f}%", ha="center", va="center", fontsize=14, fontweight="700", color=color)
-            ax.text(0, -0.32, label, ha="center", va="center", fontsize=10, color="#6b7280")
-
-            ax.set_xlim(-1.15, 1.15)
-            ax.set_ylim(-0.6, 1.05)
-
-        fig.tight_layout(pad=0.6)
-        return fig
+        return winrate_figure(snapshot()["home_away"])
 
     @output
-    @render.plot
+    @cached_plot(key=_plot_key, cache=FIGURE_CACHE)
     def out_goals_by_period():
         """Render goals by season period chart."""
-        mf = assign_period(matches_filtered())
-
-        periods = ["Early", "Mid", "Late"]
-        x = list(range(len(periods)))
-
-        avg_goals = []
-        home_avg = []
-        away_avg = []
-        ns = []
-
-        for p in periods:
-            sub = mf[mf["period"] == p]
-            ns.append(len(sub))
-
-            if sub.empty:
-                avg_goals.append(0)
-                home_avg.append(0)
-                away_avg.append(0)
-            else:
-                avg_goals.append(sub["goals_for"].mean())
-                home_avg.append(sub[sub["venue"] == "Home"]["goals_for"].mean())
-                away_avg.append(sub[sub["venue"] == "Away"]["goals_for"].mean())
-
-        x_labels = [p for i, p in enumerate(periods)]
-
-        fig, ax = plt.subplots(figsize=(9, 3))
-        fig.patch.set_facecolor("#fff")
-        ax.set_facecolor("#fff")
-
-        ax.plot(x, avg_goals, color="#d1d5db", linewidth=2.2, marker="o", label="Overall Avg Goals", zorder=2)
-        ax.plot(x, home_avg, color=C_HOME, linewidth=2.2, marker="o", label="Home Avg Goals", zorder=3)
-        ax.plot(x, away_avg, color=C_AWAY, linewidth=2.2, marker="o", label="Away Avg Goals", zorder=3)
-
-        ax.set_xticks(x)
-        ax.set_xticklabels(x_labels, fontsize=9)
-        ax.set_ylabel("Avg Goals Scored", fontsize=9)
-
-        ymax = max(avg_goals + home_avg + away_avg + [1])
-        ax.set_ylim(0, ymax * 1.4)
-
-        _style_ax(ax)
-        ax.legend(fontsize=8, frameon=False)
+        summary = snapshot()["period"]
+        return goals_by_period_figure(
+            [summary[p]["avg_goals"] for p in PERIODS],
+            [summary[p]["home_avg"] for p in PERIODS],
+            [summary[p]["away_avg"] for p in PERIODS],
+        )
 
-        fig.tight_layout(pad=0.8)
+    @render.download(
+        filename=lambda: export_filename("epl_matches_filtered", input.matches_download_format()),
+        media_type=lambda: EXPORT_FORMATS[input.matches_download_format()]["media_type"],
+    )
+    def download_matches():
+        """Download the match details table, streamed in chunks."""
+        yield from stream_export(matches_table(), input.matches_download_format())
 
-        return fig
+    @reactive.calc
+    def matches_table():
+        """The match details table as displayed (dates are formatted per page)."""
+        return snapshot()["table"]
 
-    @output
-    @render.data_frame
-    def out_matches_table():
-        """Render matches table."""
-        mf = assign_period(matches_filtered()).copy()
-
-        if mf.empty:
-            return render.DataGrid(pd.DataFrame(), width="100%")
-
-        mf["MatchDate"] = mf["MatchDate"].dt.strftime("%Y-%m-%d")
-        display = mf[[
-            "MatchDate", "HomeTeam", "AwayTeam",
-            "FullTimeHomeGoals", "FullTimeAwayGoals", "FullTimeResult",
-            "venue", "goals_for", "goals_against", "win", "period",
-        ]].rename(columns={
-            "MatchDate":         "Date",
-            "HomeTeam":          "Home",
-            "AwayTeam":          "Away",
-            "FullTimeHomeGoals": "HG",
-            "FullTimeAwayGoals": "AG",
-            "FullTimeResult":    "Result Code",
-            "venue":             "Venue",
-            "goals_for":         "Goals For",
-            "goals_against":     "Goals Against",
-            "win":               "Win",
-            "period":            "Period",
-        })
-        return render.DataGrid(display, width="100%")
+    paged_table(input, output, "out_matches_table", matches_table)
 
     # AI EXPLORER OUTPUTS
     @output
     @render.ui
     def ai_title():
         """Render AI title with error handling."""
-        df = qc_vals.df()
         title = qc_vals.title() or "All EPL matches"
-        if df.empty and qc_vals.title():
+        current = ai_current()
+        if current.get("error"):
+            return ui.div(
+                ui.div(title, style="font-size:18px; font-weight:700; margin-bottom:6px;"),
+                ui.div(
+                    f"⚠️ {current['error']}: this query is too expensive to run. Try a narrower question.",
+                    style="background:#fff3cd; border:1px solid #ffc107; border-radius:8px; padding:10px 14px; font-size:13px; color:#856404;"
+                )
+            )
+        if current["truncated"]:
+            return ui.div(
+                ui.div(title, style="font-size:18px; font-weight:700; margin-bottom:6px;"),
+                ui.div(
+                    f"ℹ️ Showing the first {AI_ROW_CAP:,} rows of this query's result.",
+                    style="background:#e7f1ff; border:1px solid #9ec5fe; border-radius:8px; padding:10px 14px; font-size:13px; color:#084298;"
+                )
+            )
+        if ai_summary()["n"] == 0 and qc_vals.title():
             return ui.div(
                 ui.div(title, style="font-size:18px; font-weight:700; margin-bottom:6px;"),
                 ui.div(
@@ -1128,133 +1350,46 @@ def server(input, output, session):
             )
         return ui.div(title, style="font-size:18px; font-weight:700;")
 
-    @output
-    @render.data_frame
-    def ai_table():
-        """Render AI filtered matches table."""
-        return render.DataGrid(qc_vals.df(), width="100%")
+    paged_table(input, output, "ai_table", ai_df)
 
     @output
     @render.plot
     def ai_plot_result():
         """Render AI result distribution chart."""
-        df = qc_vals.df().copy()
-
-        fig, ax = plt.subplots(figsize=(5, 3.5))
-        fig.patch.set_facecolor("#fff")
-        ax.set_facecolor("#fff")
-
-        if df.empty:
-            ax.text(0.5, 0.5, "No matches found for the current AI filter.\nTry a different query.", ha="center", va="center", fontsize=10, color="#6b7280")
-            ax.axis("off")
-            return fig
-
-        counts = df["Result"].value_counts()
-
-        bars = ax.bar(counts.index, counts.values, zorder=3)
-        ax.set_ylabel("Count", fontsize=9)
-        ax.set_xlabel("")
-        ax.spines[["top", "right"]].set_visible(False)
-        ax.yaxis.grid(True, linestyle="--", linewidth=0.6, alpha=0.45, zorder=0)
-        ax.set_axisbelow(True)
-        ax.tick_params(axis="x", labelrotation=10, labelsize=8)
-        ax.tick_params(axis="y", labelsize=8)
-
-        for bar in bars:
-            h = bar.get_height()
-            ax.text(
-                bar.get_x() + bar.get_width() / 2,
-                h + 0.02 * max(counts.values.max(), 1),
-                f"{int(h)}",
-                ha="center",
-                va="bottom",
-                fontsize=8,
-                fontweight="600",
-            )
-
-        fig.tight_layout(pad=0.8)
-        return fig
+        counts = ai_summary()["result_counts"]
+        if counts is None:
+            return empty_ai_figure()
+        return result_counts_figure(counts)
 
     @output
     @render.plot
     def ai_plot_goals():
         """Render AI average goals chart."""
-        df = qc_vals.df().copy()
-
-        fig, ax = plt.subplots(figsize=(5, 3.5))
-        fig.patch.set_facecolor("#fff")
-        ax.set_facecolor("#fff")
-
-        if df.empty:
-            ax.text(0.5, 0.5, "No matches found for the current AI filter.\nTry a different query.", ha="center", va="center", fontsize=10, color="#6b7280")
-            ax.axis("off")
-            return fig
-
-        labels = ["Home Goals", "Away Goals"]
-        vals = [
-            df["FullTimeHomeGoals"].mean(),
-            df["FullTimeAwayGoals"].mean()
-        ]
-
-        bars = ax.bar(labels, vals, zorder=3)
-        ax.set_ylabel("Average Goals", fontsize=9)
-        ax.set_xlabel("")
-        ax.spines[["top", "right"]].set_visible(False)
-        ax.yaxis.grid(True, linestyle="--", linewidth=0.6, alpha=0.45, zorder=0)
-        ax.set_axisbelow(True)
-        ax.tick_params(axis="both", labelsize=8)
-
-        ylim_top = max(vals + [1]) * 1.35
-        ax.set_ylim(0, ylim_top)
-
-        for bar in bars:
-            h = bar.get_height()
-            ax.text(
-                bar.get_x() + bar.get_width() / 2,
-                h + ylim_top * 0.02,
-                f"{h:.2f}",
-                ha="center",
-                va="bottom",
-                fontsize=8,
-                fontweight="600",
-            )
-
-        fig.tight_layout(pad=0.8)
-        return fig
+        summary = ai_summary()
+        if summary["home_goals_mean"] is None:
+            return empty_ai_figure()
+        return avg_goals_figure(summary["home_goals_mean"], summary["away_goals_mean"])
 
     @output
     @render.plot
     def ai_plot_season():
         """Render AI matches by season chart."""
-        df = qc_vals.df().copy()
-
-        fig, ax = plt.subplots(figsize=(5, 3.5))
-        fig.patch.set_facecolor("#fff")
-        ax.set_facecolor("#fff")
-
-        if df.empty:
-            ax.text(0.5, 0.5, "No matches found for the current AI filter.\nTry a different query.", ha="center", va="center", fontsize=10, color="#6b7280")
-            ax.axis("off")
-            return fig
-
-        counts = df["Season"].value_counts().sort_index()
-
-        bars = ax.bar(counts.index.astype(str), counts.values, zorder=3)
-        ax.set_ylabel("Matches", fontsize=9)
-        ax.set_xlabel("Season", fontsize=9)
-        ax.spines[["top", "right"]].set_visible(False)
-        ax.yaxis.grid(True, linestyle="--", linewidth=0.6, alpha=0.45, zorder=0)
-        ax.set_axisbelow(True)
-        ax.tick_params(axis="x", labelrotation=45, labelsize=8)
-        ax.tick_params(axis="y", labelsize=8)
-
-        fig.tight_layout(pad=0.8)
-        return fig
-
-    @render.download(filename="querychat_filtered_epl.csv")
-    def download_ai_data():
-        """Download AI filtered data as CSV."""
-        yield qc_vals.df().to_csv(index=False)
+        counts = ai_summary()["season_counts"]
+        if counts is None:
+            return empty_ai_figure()
+        return season_counts_figure(counts)
+
+    @render.download(
+        filename=lambda: export_filename("querychat_filtered_epl", input.ai_download_format()),
+        media_type=lambda: EXPORT_FORMATS[input.ai_download_format()]["media_type"],
+    )
+    async def download_ai_data():
+        """
+        Download the AI explorer's whole query result, streamed in chunks from the query itself
+        rather than the row-capped frame on screen.
+        """
+        async for chunk in iterate_in_pool(ai_export_chunks(qc_vals.sql() or "", input.ai_download_format())):
+            yield chunk
 
     @output
     @render.data_frame
@@ -0,0 +1,187 @@
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import pandas as pd
+
+
+def sizeof(value) -> int:
+    """
+    Approximate the memory held by a cached value, in bytes.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+# put() without a version: store whatever the current data version is
+_ANY_VERSION = object()
+
+
+class LRUCache:
+    """
+    Process-wide, thread-safe LRU cache bounded by entry count and total bytes.
+
+    If `version` is given it is called on every lookup; when its return value changes
+    (e.g. the dataset manifest version) the cache is cleared before the lookup. A value
+    computed after a miss is only stored if the version is still the one the lookup saw, so a
+    computation that started before a data swap cannot fill the cache for the new version.
+    If `ttl` is given, entries older than `ttl` seconds are treated as misses and removed.
+    Cached values are shared between sessions and must be treated as read-only.
+
+    get_or_compute() is single-flight: while one caller computes a missing key, concurrent
+    callers for the same key (and data version) wait for its result instead of computing it too.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024, version=None,
+                 ttl: float = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._version_fn = version
+        self._version = version() if version else None
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.waits = 0
+
+    def _check_version(self):
+        """Drop every entry if the data version has moved on. Caller holds the lock."""
+        if self._version_fn is None:
+            return
+        current = self._version_fn()
+        if current != self._version:
+            self._data.clear()
+            self._bytes = 0
+            self._version = current
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default on a miss."""
+        return self.lookup(key, default)[0]
+
+    def lookup(self, key, default=None):
+        """
+        Like get(), but also return the data version the lookup saw: `(value, version)`. Pass
+        the version to put() when caching a value computed after a miss.
+        """
+        with self._lock:
+            self._check_version()
+            if key in self._data:
+                value, size, expires = self._data[key]
+                if expires is None or time.monotonic() < expires:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value, self._version
+                del self._data[key]
+                self._bytes -= size
+                self.expirations += 1
+            self.misses += 1
+            return default, self._version
+
+    def put(self, key, value, version=_ANY_VERSION):
+        """
+        Store value under key, evicting least recently used entries to stay within limits.
+        With `version` (from lookup()), the value is dropped if the data version has moved on.
+        """
+        size = sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._check_version()
+            if version is not _ANY_VERSION and version != self._version:
+                return
+            if key in self._data:
+                self._bytes -= self._data.pop(key)[1]
+            expires = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._data[key] = (value, size, expires)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, old_size, _) = self._data.popitem(last=False)
+                self._bytes -= old_size
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, calling compute() and caching its result on a miss. A
+        caller that misses while another is computing the same key waits for that result (or
+        exception) instead.
+        """
+        missing = object()
+        value, version = self.lookup(key, missing)
+        if value is not missing:
+            return value
+
+        flight_key = (version, key)
+        with self._lock:
+            flight = self._inflight.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[flight_key] = Future()
+            else:
+                self.waits += 1
+        if not leader:
+            return flight.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            self.put(key, value, version=version)
+            flight.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                del self._inflight[flight_key]
+
+    def clear(self):
+        """Remove every entry; counters are kept."""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Hit/miss/eviction/expiry counters, single-flight waits and current size, for logging or a
+        metrics endpoint.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                hit_rate=self.hits / lookups if lookups else 0.0,
+                evictions=self.evictions,
+                expirations=self.expirations,
+                waits=self.waits,
+                entries=len(self._data),
+                bytes=self._bytes,
+            )
+
+
+_SQL_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Cache key for a SQL query: whitespace collapsed, unquoted text lower-cased and a trailing
+    semicolon dropped, so reformatted copies of the same query share an entry. Quoted literals
+    and identifiers are kept as written.
+    """
+    parts = _SQL_QUOTED.split(sql or "")
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r"\s+", " ", parts[i].lower())
+    return "".join(parts).strip().rstrip(";").strip()
@@ -1,26 +1,407 @@
+"""
+Build the processed parquet data from data/raw/epl_final.csv.
+
+Run from the repo root:
+    python src/create_parquet.py                # full rebuild
+    python src/create_parquet.py --incremental  # only parse rows appended since the last build
+
+The output is a Hive-partitioned dataset, data/processed/epl_final/Season=<season>/part-<version>.parquet,
+so DuckDB can skip whole files when a query filters on Season. Within each file rows are sorted by
+HomeTeam and written in small row groups, so the row-group statistics can skip most of a file for
+a team filter. Every build writes data/processed/manifest.json, which lists the parquet files the
+app should read, records how far into the raw CSV the last build got, and carries the teams, seasons
+and date range the app needs for its filters, so it can start without scanning the data.
+
+Every build also writes the whole dataset, ordered by date, as one uncompressed Arrow IPC file,
+data/processed/epl_final-<version>.arrow. The app memory-maps it (open_matches_arrow()), so every
+worker process on a host reads the same page-cache copy and converts it to pandas without decoding
+or copying.
+"""
+
+import argparse
+import datetime
+import glob
+import hashlib
+import io
+import json
+import os
+import shutil
+import urllib.parse
+
+import duckdb
 import pandas as pd
+import pyarrow as pa
+
+from utils import TeamSeasonIndex, compact_dtypes
+
+
+RAW_CSV = os.path.join("data", "raw", "epl_final.csv")
+PROCESSED_DIR = os.path.join("data", "processed")
+DATASET_DIR = "epl_final"
+MANIFEST = "manifest.json"
+ARROW_PREFIX = "epl_final-"
+
+# Files written before the dataset was partitioned by Season; removed on the next full build
+LEGACY_OUTPUTS = ["epl_final.parquet", "epl_delta"]
+
+# Three row groups per 380-match season: a HomeTeam filter reads one of them. Smaller groups
+# skip more rows but repeat the team dictionaries and page headers, inflating files several-fold.
+ROW_GROUP_SIZE = 128
+
+# Bytes before the watermark that must be unchanged for an incremental build to be safe
+TAIL_CHECK_BYTES = 4096
+
+
+# ── Cleaning ───────────────────────────────────────────────────────────────────
+def clean_matches(df: pd.DataFrame) -> pd.DataFrame:
+    """Strip, parse and label raw match rows, returning the compact processed schema."""
+    df = df.copy()
+    df.columns               = df.columns.str.strip()
+    df["Season"]             = df["Season"].astype(str).str.strip()
+    df["HomeTeam"]           = df["HomeTeam"].astype(str).str.strip()
+    df["AwayTeam"]           = df["AwayTeam"].astype(str).str.strip()
+    df["FullTimeResult"]     = df["FullTimeResult"].astype(str).str.strip()
+    df["HalfTimeResult"]     = df["HalfTimeResult"].astype(str).str.strip()
+    df["MatchDate"]          = pd.to_datetime(df["MatchDate"])
+    df["FullTimeHomeGoals"]  = pd.to_numeric(df["FullTimeHomeGoals"])
+    df["FullTimeAwayGoals"]  = pd.to_numeric(df["FullTimeAwayGoals"])
+    df["Result"] = df["FullTimeResult"].map({
+        "H": "Home team win",
+        "A": "Away team win",
+        "D": "Draw"
+    })
+
+    # Dictionary-encode teams/seasons/results and downcast the count columns
+    return compact_dtypes(df)
+
+
+# ── Manifest ───────────────────────────────────────────────────────────────────
+def read_manifest(processed_dir: str = PROCESSED_DIR):
+    """Return the build manifest as a dict, or None if no build has written one."""
+    try:
+        with open(os.path.join(processed_dir, MANIFEST), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+_version_cache = {}
+
+
+def manifest_version(processed_dir: str = PROCESSED_DIR):
+    """
+    Current dataset version from the manifest, or None without one. Cheap enough to call per
+    request: the file is only re-read when its modification time changes.
+    """
+    path = os.path.join(processed_dir, MANIFEST)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _version_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        manifest = read_manifest(processed_dir) or {}
+        cached = _version_cache[path] = (mtime, manifest.get("version"))
+    return cached[1]
+
+
+def dataset_files(processed_dir: str = PROCESSED_DIR) -> list:
+    """List the parquet files that make up the processed dataset, in build order."""
+    manifest = read_manifest(processed_dir)
+    if manifest is None:
+        return sorted(glob.glob(os.path.join(processed_dir, DATASET_DIR, "*", "*.parquet")))
+    return [os.path.join(processed_dir, f) for f in manifest["files"]]
+
+
+def changed_seasons(old_files: list, new_files: list) -> set:
+    """
+    Seasons whose partitions differ between two dataset file lists (e.g. before and after a build),
+    from the Season=<season> directory of each file added or removed. An incremental build only
+    adds files for the seasons it appended to; a full build renames every file.
+    """
+    return {
+        urllib.parse.unquote(os.path.basename(os.path.dirname(f)).split("=", 1)[-1])
+        for f in set(old_files) ^ set(new_files)
+    }
+
+
+def _metadata(index: TeamSeasonIndex, min_date, max_date) -> dict:
+    """The filter metadata stored in the manifest: a team/season index and the match date range."""
+    return dict(
+        teams=index.teams,
+        seasons=index.seasons,
+        team_seasons=index.team_seasons,
+        min_match_date=pd.Timestamp(min_date).isoformat() if pd.notna(min_date) else None,
+        max_match_date=pd.Timestamp(max_date).isoformat() if pd.notna(max_date) else None,
+    )
+
+
+def matches_metadata(df: pd.DataFrame) -> dict:
+    """Teams, seasons, each team's seasons and the match date range of a match frame."""
+    if df.empty:
+        return _metadata(TeamSeasonIndex({}), None, None)
+    return _metadata(TeamSeasonIndex.from_matches(df), df["MatchDate"].min(), df["MatchDate"].max())
+
+
+def dataset_metadata(processed_dir: str = PROCESSED_DIR) -> dict:
+    """
+    Filter metadata for the processed dataset. Read from the manifest when the build wrote it;
+    otherwise computed with aggregate queries, without loading the matches into pandas.
+    """
+    manifest = read_manifest(processed_dir) or {}
+    if "metadata" in manifest:
+        return manifest["metadata"]
+
+    files = dataset_files(processed_dir)
+    con = duckdb.connect()
+    pairs = con.execute(
+        "SELECT HomeTeam AS team, Season FROM read_parquet($files, hive_partitioning = true) "
+        "UNION SELECT AwayTeam, Season FROM read_parquet($files, hive_partitioning = true)",
+        {"files": files},
+    ).df()
+    min_date, max_date = con.execute(
+        "SELECT min(MatchDate), max(MatchDate) FROM read_parquet(?, hive_partitioning = true)", [files]
+    ).fetchone()
+    return _metadata(TeamSeasonIndex.from_pairs(pairs), min_date, max_date)
+
+
+def _merge_metadata(old: dict, new: dict) -> dict:
+    """Combine the metadata of the existing dataset with that of newly appended rows."""
+    team_seasons = {
+        team: set(old["team_seasons"].get(team, [])) | set(new["team_seasons"].get(team, []))
+        for team in set(old["team_seasons"]) | set(new["team_seasons"])
+    }
+    min_dates = [d for d in (old["min_match_date"], new["min_match_date"]) if d is not None]
+    max_dates = [d for d in (old["max_match_date"], new["max_match_date"]) if d is not None]
+    return _metadata(TeamSeasonIndex(team_seasons), min(min_dates, default=None), max(max_dates, default=None))
+
+
+def _read_matches(files: list) -> pd.DataFrame:
+    """Read parquet files of the dataset into pandas with the compact schema, ordered by date."""
+    df = duckdb.read_parquet(files, hive_partitioning=True).order("MatchDate").df()
+    return compact_dtypes(df[["Season"] + [c for c in df.columns if c != "Season"]])
+
+
+def load_matches(processed_dir: str = PROCESSED_DIR) -> pd.DataFrame:
+    """Read the whole processed dataset into pandas with the compact schema, ordered by date."""
+    return _read_matches(dataset_files(processed_dir))
+
+
+def _write_arrow(processed_dir: str, files: list, version: int) -> str:
+    """
+    Write the matches in `files` (the parquet files this build wrote) as this version's
+    uncompressed Arrow IPC fragment; return its path relative to processed_dir. Older versions'
+    files are left to _remove_stale().
+    """
+    table = pa.Table.from_pandas(
+        _read_matches([os.path.join(processed_dir, f) for f in files]), preserve_index=False
+    )
+    name = f"{ARROW_PREFIX}{version:05d}.arrow"
+    path = os.path.join(processed_dir, name)
+    with pa.OSFile(path + ".tmp", "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(path + ".tmp", path)
+    return name
+
+
+def _arrow_files(manifest: dict) -> list:
+    """The Arrow fragments a manifest lists, oldest first (manifests before fragments list one file)."""
+    arrow = manifest.get("arrow") or []
+    return [arrow] if isinstance(arrow, str) else arrow
+
+
+def open_matches_arrow(processed_dir: str = PROCESSED_DIR):
+    """
+    The dataset's Arrow IPC fragments as one memory-mapped pyarrow Table (a chunk per fragment),
+    or None if the build did not write them. Reading it allocates nothing: the columns point into
+    the shared page cache.
+    """
+    files = _arrow_files(read_manifest(processed_dir) or {})
+    if not files:
+        return None
+    try:
+        return pa.concat_tables(
+            pa.ipc.open_file(pa.memory_map(os.path.join(processed_dir, f))).read_all() for f in files
+        )
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+
+def arrow_matches(table: pa.Table) -> pd.DataFrame:
+    """
+    A pandas frame over a table from open_matches_arrow(), with the compact schema. With a single
+    fragment, numeric, date and dictionary-code columns are views on the mapped file (read-only);
+    incremental fragments are joined into a private copy until the next full build.
+    """
+    return table.to_pandas(split_blocks=True)
+
+
+def _write_manifest(manifest: dict, processed_dir: str):
+    """Write the manifest atomically so the app never reads a half-written file."""
+    path = os.path.join(processed_dir, MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _remove_stale(processed_dir: str, previous: dict, manifest: dict):
+    """
+    Remove dataset, Arrow and legacy files listed in neither this build's manifest nor the
+    previous one. The previous build's files stay until the next build: workers keep querying
+    them until they notice the new manifest and reload.
+    """
+    keep = {
+        os.path.normpath(os.path.join(processed_dir, f))
+        for m in (previous, manifest) for f in m.get("files", []) + _arrow_files(m)
+    }
+    candidates = glob.glob(os.path.join(processed_dir, DATASET_DIR, "*", "*.parquet"))
+    candidates += glob.glob(os.path.join(processed_dir, f"{ARROW_PREFIX}*.arrow"))
+    for path in candidates:
+        if os.path.normpath(path) not in keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    for part in glob.glob(os.path.join(processed_dir, DATASET_DIR, "*")):
+        if os.path.isdir(part) and not os.listdir(part):
+            os.rmdir(part)
+    for name in LEGACY_OUTPUTS:
+        path = os.path.join(processed_dir, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def _tail_hash(raw: bytes, offset: int) -> str:
+    """Hash the bytes just before `offset`, used to check the CSV was only appended to."""
+    return hashlib.sha256(raw[max(0, offset - TAIL_CHECK_BYTES):offset]).hexdigest()
+
+
+def _write_partitions(df: pd.DataFrame, processed_dir: str, version: int) -> list:
+    """Write df as one part-<version>.parquet file per Season partition; return their paths."""
+    files = []
+    for season, part in df.groupby("Season", observed=True, sort=True):
+        rel = f"{DATASET_DIR}/Season={urllib.parse.quote(str(season), safe='')}/part-{version:05d}.parquet"
+        os.makedirs(os.path.dirname(os.path.join(processed_dir, rel)), exist_ok=True)
+        part = part.drop(columns="Season").sort_values(["HomeTeam", "MatchDate"], kind="stable")
+        part.to_parquet(os.path.join(processed_dir, rel), index=False, row_group_size=ROW_GROUP_SIZE)
+        files.append(rel)
+    return files
+
+
+def _watermark(df: pd.DataFrame) -> dict:
+    """Latest match date and season covered by df, for display and sanity checks."""
+    if df.empty:
+        return dict(max_match_date=None, max_season=None)
+    return dict(
+        max_match_date=df["MatchDate"].max().isoformat(),
+        max_season=str(df["Season"].astype(str).max()),
+    )
+
+
+# ── Builds ─────────────────────────────────────────────────────────────────────
+def build_full(raw_csv: str = RAW_CSV, processed_dir: str = PROCESSED_DIR) -> dict:
+    """
+    Rebuild the whole dataset from the raw CSV as new files, replacing any incremental fragments.
+    The manifest is switched to them only once they are written, so a running app never sees a
+    missing file.
+    """
+    with open(raw_csv, "rb") as fh:
+        raw = fh.read()
+    df_all = clean_matches(pd.read_csv(io.BytesIO(raw)))
+
+    previous = read_manifest(processed_dir) or {}
+    version = previous.get("version", 0) + 1
+    files = _write_partitions(df_all, processed_dir, version)
+
+    manifest = dict(
+        version=version,
+        arrow=[_write_arrow(processed_dir, files, version)],
+        built_at=datetime.datetime.utcnow().isoformat(),
+        raw_bytes=len(raw),
+        raw_rows=len(df_all),
+        header_hash=hashlib.sha256(raw.split(b"\n", 1)[0]).hexdigest(),
+        tail_hash=_tail_hash(raw, len(raw)),
+        files=files,
+        **_watermark(df_all),
+        metadata=matches_metadata(df_all),
+    )
+    _write_manifest(manifest, processed_dir)
+    _remove_stale(processed_dir, previous, manifest)
+    print(f"Full build: {len(df_all)} rows -> {len(files)} season partitions (version {version})")
+    return manifest
+
+
+def build_incremental(raw_csv: str = RAW_CSV, processed_dir: str = PROCESSED_DIR) -> dict:
+    """
+    Parse only the rows appended to the raw CSV since the last build and write them as new
+    part files in their season partitions. Falls back to a full build if there is no manifest or the already
+    processed part of the CSV has changed.
+    """
+    manifest = read_manifest(processed_dir)
+    if manifest is None:
+        print("No manifest found, running a full build.")
+        return build_full(raw_csv, processed_dir)
+
+    offset = manifest["raw_bytes"]
+    with open(raw_csv, "rb") as fh:
+        header = fh.readline()
+        size = os.fstat(fh.fileno()).st_size
+        fh.seek(max(0, offset - TAIL_CHECK_BYTES))
+        before = fh.read(offset - max(0, offset - TAIL_CHECK_BYTES))
+        delta = fh.read()
+
+    unchanged = (
+        size >= offset
+        and hashlib.sha256(header.rstrip(b"\n")).hexdigest() == manifest["header_hash"]
+        and hashlib.sha256(before).hexdigest() == manifest["tail_hash"]
+    )
+    if not unchanged:
+        print("Raw CSV was modified, not just appended to; running a full build.")
+        return build_full(raw_csv, processed_dir)
+
+    # Only take complete lines, in case the CSV is still being written
+    delta = delta[:delta.rfind(b"\n") + 1]
+    if not delta.strip():
+        print(f"No new rows since version {manifest['version']}.")
+        return manifest
+
+    df_new = clean_matches(pd.read_csv(io.BytesIO(header + delta)))
+    metadata = _merge_metadata(dataset_metadata(processed_dir), matches_metadata(df_new))
+    version = manifest["version"] + 1
+    files = _write_partitions(df_new, processed_dir, version)
+
+    new_end = offset + len(delta)
+    previous = manifest
+    manifest = dict(
+        manifest,
+        version=version,
+        built_at=datetime.datetime.utcnow().isoformat(),
+        raw_bytes=new_end,
+        raw_rows=manifest["raw_rows"] + len(df_new),
+        tail_hash=hashlib.sha256((before + delta)[-TAIL_CHECK_BYTES:]).hexdigest(),
+        files=manifest["files"] + files,
+        arrow=_arrow_files(manifest) + [_write_arrow(processed_dir, files, version)],
+        metadata=metadata,
+    )
+    for key, value in _watermark(df_new).items():
+        if value is not None and (manifest.get(key) is None or value > manifest[key]):
+            manifest[key] = value
+    _write_manifest(manifest, processed_dir)
+    _remove_stale(processed_dir, previous, manifest)
+    print(f"Incremental build: {len(df_new)} new rows -> {len(files)} season partitions (version {version})")
+    return manifest
 
 
-# ── Load dataset ───────────────────────────────────────────────────────────────
-df_all = pd.read_csv("data/raw/epl_final.csv")
-df_all.columns               = df_all.columns.str.strip()
-df_all["Season"]             = df_all["Season"].astype(str).str.strip()
-df_all["HomeTeam"]           = df_all["HomeTeam"].astype(str).str.strip()
-df_all["AwayTeam"]           = df_all["AwayTeam"].astype(str).str.strip()
-df_all["FullTimeResult"]     = df_all["FullTimeResult"].astype(str).str.strip()
-df_all["MatchDate"]          = pd.to_datetime(df_all["MatchDate"])
-df_all["FullTimeHomeGoals"]  = pd.to_numeric(df_all["FullTimeHomeGoals"])
-df_all["FullTimeAwayGoals"]  = pd.to_numeric(df_all["FullTimeAwayGoals"])
-df_all["Result"] = df_all["FullTimeResult"].map({
-    "H": "Home team win",
-    "A": "Away team win",
-    "D": "Draw"
-})
-
-df_all["Result"] = df_all["FullTimeResult"].map({
-    "H": "Home team win",
-    "A": "Away team win",
-    "D": "Draw"
-})
-
-df_all.to_parquet("data/processed/epl_final.parquet")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="append only the rows added to the raw CSV since the last build",
+    )
+    args = parser.parse_args()
+    if args.incremental:
+        build_incremental()
+    else:
+        build_full()
@@ -0,0 +1,95 @@
+"""
+The dashboard tab's data for one (team, season, result) filter, computed together.
+
+build_snapshot() takes the filtered team-perspective matches (one query) and the KPI cube and
+returns every KPI, summary and table the dashboard outputs show. A filter change then does the
+shared work once, and every output reads its part of the snapshot.
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils import EMPTY_METRICS, assign_period, period_summary
+
+
+# End-to-end budget in ms for one snapshot (query plus build) of a team's season;
+# tests/test_dashboard.py checks it
+SNAPSHOT_TARGET_MS = 50
+
+VENUES = ["Home", "Away"]
+
+# Match-details columns as displayed, in order
+MATCH_TABLE_COLUMNS = {
+    "MatchDate":         "Date",
+    "HomeTeam":          "Home",
+    "AwayTeam":          "Away",
+    "FullTimeHomeGoals": "HG",
+    "FullTimeAwayGoals": "AG",
+    "FullTimeResult":    "Result Code",
+    "venue":             "Venue",
+    "goals_for":         "Goals For",
+    "goals_against":     "Goals Against",
+    "win":               "Win",
+    "period":            "Period",
+}
+
+
+def venue_summary(matches: pd.DataFrame) -> dict:
+    """
+    Per venue (Home, Away) of a team table: n, win_rate (%), avg_goals_for and avg_goals_against,
+    from np.bincount sums over the venue. A venue with no matches gets zeros.
+    """
+    out = {venue: dict(win_rate=0, avg_goals_for=0, avg_goals_against=0, n=0) for venue in VENUES}
+    if matches.empty:
+        return out
+    away = (matches["venue"] != "Home").to_numpy().astype(int)
+    n = np.bincount(away, minlength=2)
+    sums = {
+        col: np.bincount(away, weights=matches[col].to_numpy(), minlength=2)
+        for col in ("win", "goals_for", "goals_against")
+    }
+    for i, venue in enumerate(VENUES):
+        if n[i]:
+            out[venue] = dict(
+                win_rate=float(sums["win"][i] / n[i] * 100),
+                avg_goals_for=float(sums["goals_for"][i] / n[i]),
+                avg_goals_against=float(sums["goals_against"][i] / n[i]),
+                n=int(n[i]),
+            )
+    return out
+
+
+def season_kpis(cube: dict, team: str, season: str, seasons: list) -> dict:
+    """
+    The KPI cards' metrics for a team: this season's (current) and the season before's (previous)
+    from a metrics_cube_from_totals() dict. previous is EMPTY_METRICS for the first or an unknown season.
+    """
+    idx = seasons.index(season) if season in seasons else 0
+    prev = seasons[idx - 1] if idx > 0 else None
+    return dict(
+        current=cube.get((team, season, "All"), EMPTY_METRICS),
+        previous=cube.get((team, prev, "All"), EMPTY_METRICS) if prev else EMPTY_METRICS,
+    )
+
+
+def match_table(matches: pd.DataFrame) -> pd.DataFrame:
+    """The match details table from an assign_period() team table: MATCH_TABLE_COLUMNS, renamed."""
+    if matches.empty:
+        return pd.DataFrame()
+    return matches[list(MATCH_TABLE_COLUMNS)].rename(columns=MATCH_TABLE_COLUMNS)
+
+
+def build_snapshot(matches: pd.DataFrame, cube: dict, team: str, season: str, seasons: list) -> dict:
+    """
+    Everything the dashboard tab shows for one filter, from the filter's team-perspective matches:
+    n, kpis (season_kpis), home_away (venue_summary), period (period_summary) and table
+    (match_table). Periods are assigned once and shared by the period summary and the table.
+    """
+    with_period = assign_period(matches)
+    return dict(
+        n=len(matches),
+        kpis=season_kpis(cube, team, season, seasons),
+        home_away=venue_summary(matches),
+        period=period_summary(with_period),
+        table=match_table(with_period),
+    )
@@ -0,0 +1,77 @@
+"""
+Hot reload of the processed dataset without restarting the app.
+
+DatasetManager holds the app's current dataset: whatever `load()` builds from the processed data
+(the DuckDB view, filter metadata, KPI cube, ...). A background thread polls the dataset version
+(the build manifest's); when a build writes a new one, the new dataset is loaded on that thread,
+off the request path, and swapped in with one assignment. Requests keep using the old dataset until
+then. Sessions poll `version` and refresh only the outputs the new version changed.
+"""
+
+import threading
+
+
+class DatasetManager:
+    """
+    The current dataset (`current`) and its `version`, reloaded when `version()` changes.
+
+    The first load runs in the constructor. With `interval` > 0 a daemon thread calls check()
+    every `interval` seconds. A load that raises keeps the current dataset (counted in
+    `failures`) and is retried on the next check.
+
+    `current` is replaced before `version`, so code that sees a new version also gets the new
+    dataset. The reverse does not hold: a computation can read the old `current` and finish after
+    the swap. Caches keyed by `version` therefore store a value only under the version they saw
+    before computing it (see LRUCache.lookup()).
+    """
+
+    def __init__(self, load, version, interval: float = 5.0):
+        self._load = load
+        self._version_fn = version
+        self.version = version()
+        self.current = load()
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if interval > 0:
+            self._thread = threading.Thread(
+                target=self._run, args=(interval,), name="dataset-reload", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self, interval: float):
+        while not self._stop.wait(interval):
+            self.check()
+
+    def check(self) -> bool:
+        """Load and swap in the dataset if its version changed; returns whether it was swapped."""
+        with self._lock:
+            version = self._version_fn()
+            if version == self.version:
+                return False
+            try:
+                data = self._load()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                print(f"ERROR reloading dataset version {version}: {e}")
+                return False
+            self.current = data
+            self.version = version
+            self.reloads += 1
+            return True
+
+    def close(self, timeout: float = 5.0):
+        """Stop watching for new versions."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        """Current version, reloads done and failed, and the last load error."""
+        return dict(
+            version=self.version, reloads=self.reloads, failures=self.failures, last_error=self.last_error,
+        )
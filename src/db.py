@@ -0,0 +1,118 @@
+"""
+A cursor pool over the app's single in-process DuckDB database.
+
+The database (and the epl_matches view over the parquet files) is set up once on the main
+connection. Tasks on other threads borrow one of a fixed set of cursors on that database with
+CursorPool.checkout(), since a DuckDB connection must not be used from several threads at once.
+Time spent waiting for a free cursor is counted in stats(). lock_down() then confines the
+database to the processed data, since the AI explorer runs model-written SQL on it.
+"""
+
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import ibis
+
+
+def configure(con, threads: int = None, memory_limit: str = None):
+    """
+    Set DuckDB's worker thread count (default: every core) and memory limit (e.g. "4GB"; default:
+    DuckDB's own, 80% of RAM) for the whole database behind the ibis connection `con`.
+    """
+    con.raw_sql(f"SET threads = {int(threads or os.cpu_count() or 1)}")
+    if memory_limit:
+        con.raw_sql(f"SET memory_limit = '{memory_limit}'")
+
+
+def lock_down(con, allowed_directories: list):
+    """
+    Stop every connection and cursor on the database behind `con` from reading or writing files
+    outside `allowed_directories`, and lock the configuration so SQL cannot turn access back on.
+    Cursors opened afterwards cannot change settings either, so a CursorPool must exist first.
+    """
+    dirs = ", ".join("'" + os.path.abspath(d).replace("'", "''") + "'" for d in allowed_directories)
+    con.raw_sql(f"SET allowed_directories = [{dirs}]")
+    con.raw_sql("SET enable_external_access = false")
+    con.raw_sql("SET lock_configuration = true")
+
+
+class CursorPool:
+    """
+    `size` cursors on the database of the ibis DuckDB connection `con`, each wrapped as an ibis
+    backend, lent out one task at a time.
+
+    checkout() blocks until a cursor is free (or raises queue.Empty after `timeout` seconds). A
+    thread that already holds a cursor gets the same one back, so nested code can check out freely.
+    table(name) returns a table bound to the calling thread's cursor, cached per cursor.
+    """
+
+    def __init__(self, con, size: int):
+        self.size = size
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(ibis.duckdb.from_connection(con.con.cursor()))
+        self._local = threading.local()
+        self._tables = {}
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+
+    @contextmanager
+    def checkout(self, timeout: float = None):
+        """Borrow a cursor (an ibis backend) for the duration of the with block."""
+        held = getattr(self._local, "backend", None)
+        if held is not None:
+            yield held
+            return
+
+        start = time.perf_counter()
+        try:
+            backend = self._idle.get_nowait()
+        except queue.Empty:
+            backend = self._idle.get(timeout=timeout)
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.checkouts += 1
+            if waited > 0.001:
+                self.waits += 1
+            self.wait_seconds += waited
+            self.max_wait = max(self.max_wait, waited)
+
+        self._local.backend = backend
+        try:
+            yield backend
+        finally:
+            self._local.backend = None
+            self._idle.put(backend)
+
+    def current(self):
+        """The cursor checked out by the calling thread, or None."""
+        return getattr(self._local, "backend", None)
+
+    def table(self, name: str):
+        """Table `name` on the calling thread's checked-out cursor."""
+        backend = self.current()
+        if backend is None:
+            raise RuntimeError("table() needs a cursor checked out on this thread")
+        key = (id(backend), name)
+        table = self._tables.get(key)
+        if table is None:
+            table = self._tables[key] = backend.table(name)
+        return table
+
+    def stats(self) -> dict:
+        """Cursors in use, checkouts, checkouts that had to wait, and total/max wait in seconds."""
+        with self._lock:
+            return dict(
+                size=self.size,
+                in_use=self.size - self._idle.qsize(),
+                checkouts=self.checkouts,
+                waits=self.waits,
+                wait_seconds=self.wait_seconds,
+                max_wait=self.max_wait,
+            )
@@ -0,0 +1,111 @@
+"""
+Chunked exports of result frames for the dashboard and AI explorer downloads.
+
+stream_export() yields the file in pieces of `chunk_rows` rows, so the first bytes go out after one
+chunk is encoded and the extra memory an export needs is one chunk, whatever the size of the frame.
+It also takes the chunks themselves (e.g. a query's record batches), so a result never has to be
+held in memory whole.
+Formats are plain CSV, gzip-compressed CSV and zstd-compressed parquet (one row group per chunk).
+"""
+
+import io
+import zlib
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+EXPORT_FORMATS = {
+    "csv":     dict(label="CSV",         extension="csv",     media_type="text/csv"),
+    "csv.gz":  dict(label="CSV (gzip)",  extension="csv.gz",  media_type="application/gzip"),
+    "parquet": dict(label="Parquet",     extension="parquet", media_type="application/vnd.apache.parquet"),
+}
+
+
+def export_filename(stem: str, fmt: str) -> str:
+    """Download filename for an export format, e.g. matches.csv.gz."""
+    return f"{stem}.{EXPORT_FORMATS[fmt]['extension']}"
+
+
+def frame_chunks(df: pd.DataFrame, chunk_rows: int):
+    """Row slices of df (views, not copies); an empty frame yields one empty slice for its header."""
+    if df.empty:
+        yield df
+        return
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _chunks(data, chunk_rows: int):
+    """Chunks of a frame, or the frames of an iterable of chunks as they are."""
+    if isinstance(data, pd.DataFrame):
+        return frame_chunks(data, chunk_rows)
+    return iter(data)
+
+
+def _csv_chunks(df: pd.DataFrame, chunk_rows: int):
+    for i, chunk in enumerate(_chunks(df, chunk_rows)):
+        yield chunk.to_csv(index=False, header=(i == 0)).encode("utf-8")
+
+
+def _gzip_chunks(df: pd.DataFrame, chunk_rows: int):
+    gz = zlib.compressobj(wbits=31)   # 31 = gzip container
+    for piece in _csv_chunks(df, chunk_rows):
+        data = gz.compress(piece)
+        if data:
+            yield data
+    yield gz.flush()
+
+
+class _Drain(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain()."""
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._parts.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _parquet_chunks(df: pd.DataFrame, chunk_rows: int):
+    sink = _Drain()
+    writer = None
+    for chunk in _chunks(df, chunk_rows):
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema, compression="zstd")
+        writer.write_table(table.cast(writer.schema))
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+
+def stream_export(df, fmt: str = "csv", chunk_rows: int = 2_000):
+    """
+    Yield df encoded as `fmt` (a key of EXPORT_FORMATS) in byte chunks of chunk_rows rows. df may
+    also be an iterable of frames with the same columns (at least one), encoded one per chunk.
+    """
+    if fmt == "csv":
+        return _csv_chunks(df, chunk_rows)
+    if fmt == "csv.gz":
+        return _gzip_chunks(df, chunk_rows)
+    if fmt == "parquet":
+        return _parquet_chunks(df, chunk_rows)
+    raise ValueError(f"unknown export format {fmt!r}; expected one of {list(EXPORT_FORMATS)}")
@@ -0,0 +1,45 @@
+"""
+The dashboard's (team, season, result) filters as one reactive state.
+
+The three select inputs change one at a time, and a team change can move the season too (the
+season select is updated to one the team played). Reading the inputs directly made each of those
+steps a separate recompute. coalesced_filters() resolves the season itself and publishes one
+tuple, so every user action is a single state change.
+"""
+
+from shiny import reactive
+
+
+def resolve_filters(team: str, season: str, result: str, seasons_for) -> tuple:
+    """(team, season, result), with the season moved to the team's latest if the team did not play it."""
+    available = seasons_for(team)
+    if available and season not in available:
+        season = available[-1]
+    return (team, season, result)
+
+
+def set_filters(state: reactive.Value, key: tuple) -> bool:
+    """
+    Set `state` to `key` unless it already holds an equal tuple (reactive.Value.set only skips
+    the identical object); returns whether it changed.
+    """
+    with reactive.isolate():
+        if state.get() == key:
+            return False
+    return state.set(key)
+
+
+def coalesced_filters(team, season, result, seasons_for, initial: tuple) -> reactive.Value:
+    """
+    A reactive (team, season, result) value fed by the three filter inputs (callables such as
+    input.input_team). It is set only when the resolved tuple changes: the select updates echoed
+    back by the browser after a season correction or a reset (set_filters() on the state) leave
+    it untouched.
+    """
+    state = reactive.value(initial)
+
+    @reactive.effect
+    def _apply_filters():
+        set_filters(state, resolve_filters(team(), season(), result(), seasons_for))
+
+    return state
@@ -0,0 +1,547 @@
+"""
+Background writer for the AI interaction log.
+
+log_interaction() used to append each row to Google Sheets (a network round-trip) or to the CSV
+on the session's event loop. InteractionLogger instead puts rows on a bounded in-memory queue and
+a writer thread flushes them to a sink in batches, so a slow Sheets API never blocks a session.
+
+A sink is any object with a write_rows(rows) method taking a list of [timestamp, query, response,
+sql] lists; tests can pass a stub in place of SheetsSink. Rows logged before the sql column was
+added have three fields and read back with an empty sql.
+
+Locally the log is a SegmentedLog: day- and size-rotated CSV segments, compacted to zstd parquet
+once closed, so analysis of a time range only opens the segments for those days.
+
+The logs tab reads the newest rows through SegmentedLog.recent() (seeks back from the end of the
+newest segments) or RecentRows (a ring buffer fed by the writer), both cached until the log
+changes, so its cost does not grow with the size of the log.
+"""
+
+import csv
+import collections
+import io
+import itertools
+import os
+import re
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+
+LOG_COLUMNS = ["timestamp", "query", "response", "sql"]
+_LEGACY_WIDTH = 3
+
+
+def _pad(row) -> list:
+    """A log row widened to LOG_COLUMNS, for rows written before the sql column existed."""
+    row = list(row)
+    return row + [""] * (len(LOG_COLUMNS) - len(row))
+
+
+# ── Sinks ──────────────────────────────────────────────────────────────────────
+class CsvSink:
+    """Append rows to a local CSV file, writing the header when the file is new."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def write_rows(self, rows: list):
+        exists = os.path.exists(self.path)
+        with open(self.path, "a", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            if not exists:
+                writer.writerow(LOG_COLUMNS)
+            writer.writerows(rows)
+
+
+class SheetsSink:
+    """Append rows to a gspread worksheet with one append_rows call per batch."""
+
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+
+    def write_rows(self, rows: list):
+        self.worksheet.append_rows(rows, value_input_option="USER_ENTERED")
+
+
+# ── Logger ─────────────────────────────────────────────────────────────────────
+class InteractionLogger:
+    """
+    Bounded queue plus a writer thread that flushes rows to `sink` in batches.
+
+    A batch is written when `batch_size` rows are waiting or `flush_interval` seconds after the
+    oldest waiting row arrived. When the queue holds `max_queue` rows, `drop` decides what gives:
+    "oldest" discards the oldest queued row, "newest" discards the row being logged; both are
+    counted in stats(). If the sink raises, the batch goes to `fallback` (e.g. the local CSV when
+    Sheets is down) or is counted as failed. `on_write(rows)` is called after each written batch.
+    """
+
+    def __init__(self, sink, fallback=None, max_queue: int = 10_000, batch_size: int = 100,
+                 flush_interval: float = 2.0, drop: str = "oldest", on_write=None):
+        if drop not in ("oldest", "newest"):
+            raise ValueError(f"drop must be 'oldest' or 'newest', got {drop!r}")
+        self.sink = sink
+        self.fallback = fallback
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop = drop
+        self.on_write = on_write
+
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._oldest = None
+        self._in_flight = 0
+        self._flushing = False
+        self._closed = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._thread = threading.Thread(target=self._run, name="interaction-log-writer", daemon=True)
+        self._thread.start()
+
+    def log(self, row: list) -> bool:
+        """Queue a row without blocking. Returns False if the row was dropped."""
+        with self._cond:
+            if self._closed:
+                self.dropped += 1
+                return False
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                if self.drop == "newest":
+                    return False
+                self._queue.popleft()
+            if not self._queue:
+                # Wake the writer so it starts the flush_interval clock
+                self._oldest = time.monotonic()
+                self._cond.notify_all()
+            self._queue.append(row)
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def _take_batch(self):
+        """Wait until a batch is due (or we are closing) and take it. Caller holds the lock."""
+        while True:
+            if self._queue:
+                due = self._oldest + self.flush_interval
+                if self._closed or self._flushing or len(self._queue) >= self.batch_size or time.monotonic() >= due:
+                    break
+                self._cond.wait(timeout=max(0.0, due - time.monotonic()))
+            elif self._closed:
+                return None
+            else:
+                self._cond.wait()
+
+        batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+        self._oldest = time.monotonic() if self._queue else None
+        self._flushing = self._flushing and bool(self._queue)
+        self._in_flight = len(batch)
+        return batch
+
+    def _write(self, batch: list):
+        """Write one batch to the sink, falling back on error."""
+        for sink in (self.sink, self.fallback):
+            if sink is None:
+                continue
+            try:
+                sink.write_rows(batch)
+            except Exception as e:
+                print(f"ERROR writing {len(batch)} log rows to {type(sink).__name__}: {e}")
+                continue
+            if self.on_write is not None:
+                self.on_write(batch)
+            return True
+        return False
+
+    def _run(self):
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+            if batch is None:
+                return
+            ok = self._write(batch)
+            with self._cond:
+                if ok:
+                    self.written += len(batch)
+                else:
+                    self.failed += len(batch)
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Write everything queued so far now; returns False if it did not finish within timeout."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if self._queue:
+                self._flushing = True
+                self._cond.notify_all()
+            while self._queue or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._thread.is_alive():
+                    return False
+                self._cond.wait(timeout=remaining)
+        return True
+
+    def close(self, timeout: float = 10.0):
+        """Flush the queue and stop the writer thread; later log() calls are dropped."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        """Queue depth and written/dropped/failed counters, for logging or a metrics endpoint."""
+        with self._cond:
+            return dict(
+                queued=len(self._queue) + self._in_flight,
+                written=self.written,
+                dropped=self.dropped,
+                failed=self.failed,
+            )
+
+
+# ── Recent rows for the logs tab ───────────────────────────────────────────────
+def _recent_frame(rows: list, n: int) -> pd.DataFrame:
+    """The last n rows as the logs-tab DataFrame: Timestamp/Query/Response, newest first."""
+    rows = rows[-n:] if n else []
+    df = pd.DataFrame([_pad(r) for r in reversed(rows)], columns=LOG_COLUMNS)
+    return df.rename(columns={"timestamp": "Timestamp", "query": "Query", "response": "Response", "sql": "SQL"})
+
+
+def tail_csv(path, n: int, block_size: int = 64 * 1024) -> list:
+    """
+    Return the last n data rows of a log CSV, reading backwards from the end in blocks so the
+    cost depends on n, not on the file size.
+    """
+    with open(path, "rb") as fh:
+        pos = fh.seek(0, os.SEEK_END)
+        data = b""
+        # n rows need n + 1 line breaks when the first line read is cut off part-way
+        while pos > 0 and data.count(b"\n") <= n + 1:
+            step = min(block_size, pos)
+            pos -= step
+            fh.seek(pos)
+            data = fh.read(step) + data
+
+    if pos > 0:
+        data = data[data.index(b"\n") + 1:]
+    widths = (_LEGACY_WIDTH, len(LOG_COLUMNS))
+    rows = list(csv.reader(io.StringIO(data.decode("utf-8", errors="replace"))))
+    if pos == 0 and rows and rows[0] in (LOG_COLUMNS, LOG_COLUMNS[:_LEGACY_WIDTH]):
+        rows = rows[1:]
+    if any(len(row) not in widths for row in rows):
+        # A quoted field with a line break straddled the cut; parse the whole file instead
+        with open(path, newline="", encoding="utf-8", errors="replace") as fh:
+            rows = [row for row in csv.reader(fh) if len(row) in widths][1:]
+    return [_pad(row) for row in rows[-n:]] if n else []
+
+
+class RecentRows:
+    """
+    Ring buffer of the newest rows, seeded from storage with `seed()` (e.g. the tail of the Google
+    Sheet) and fed by InteractionLogger's on_write in between. With `ttl`, the first read after
+    ttl seconds seeds it again, so rows written by other workers show up; without, it is seeded
+    once.
+    """
+
+    def __init__(self, seed=None, capacity: int = 50, ttl: float = None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._seed = seed
+        self._seeded_at = None
+        self._rows = collections.deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._frame = None
+
+    def extend(self, rows: list):
+        """Add newly written rows (oldest first)."""
+        with self._lock:
+            self._load_seed()
+            self._rows.extend(rows)
+            self._frame = None
+
+    def _load_seed(self):
+        """Seed the buffer on first use and once ttl has passed. Caller holds the lock."""
+        if self._seed is None:
+            return
+        now = time.monotonic()
+        if self._seeded_at is not None and (self.ttl is None or now - self._seeded_at < self.ttl):
+            return
+        # A failed read keeps the rows we have and is retried after ttl
+        self._seeded_at = now
+        try:
+            rows = self._seed()[-self.capacity:]
+        except Exception as e:
+            print(f"ERROR reading recent log rows: {e}")
+            return
+        self._rows.clear()
+        self._rows.extend(rows)
+        self._frame = None
+
+    def recent(self, n: int = 50) -> pd.DataFrame:
+        """Up to n (at most capacity) newest rows, newest first; treat the result as read-only."""
+        with self._lock:
+            self._load_seed()
+            if self._frame is None:
+                self._frame = _recent_frame(list(self._rows), self.capacity)
+            return self._frame.head(n)
+
+
+def sheet_tail(worksheet, n: int) -> list:
+    """
+    Fetch the last n data rows of the log worksheet by range, without get_all_records() or a
+    whole column. The grid can hold blank rows after the data, so windows are read back from its
+    last row, doubling in size until one reaches the data; the reads stay proportional to n plus
+    the blank rows, not to the size of the log.
+    """
+    end, window = worksheet.row_count, max(n, 1)
+    while end >= 2:
+        start = max(2, end - window + 1)
+        rows = worksheet.get_values(f"A{start}:D{end}")
+        while rows and not any(rows[-1]):
+            rows.pop()
+        if rows:
+            last = start + len(rows) - 1
+            if len(rows) < n and start > 2:
+                rows = worksheet.get_values(f"A{max(2, last - n + 1)}:D{last}")
+            return [_pad(row) for row in rows[-n:]]
+        end, window = start - 1, window * 2
+    return []
+
+
+# ── Rotating segment storage ───────────────────────────────────────────────────
+# <day>_<seq>[_<writer>].csv|parquet; segments written before writers were named have no suffix
+_SEGMENT_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})_(\d{4})(?:_([A-Za-z0-9-]+))?\.(csv|parquet)$")
+
+
+def _row_day(timestamp) -> str:
+    """The YYYY-MM-DD day of an ISO timestamp string; today (UTC) if it has none."""
+    day = str(timestamp)[:10]
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", day):
+        return day
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def _bound(value) -> str:
+    """A time-range bound as an ISO string comparable with the logged timestamps."""
+    return pd.Timestamp(value).isoformat()
+
+
+def default_writer() -> str:
+    """This process's segment name suffix: <hostname>-<pid>, with anything but [A-Za-z0-9-] as '-'."""
+    return re.sub(r"[^A-Za-z0-9-]", "-", f"{socket.gethostname()}-{os.getpid()}")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class SegmentedLog:
+    """
+    Interaction log stored as rotating segments in `directory`, usable as an InteractionLogger sink.
+
+    Rows are appended to an active CSV segment named <YYYY-MM-DD>_<seq>_<writer>.csv after the day
+    of their timestamp. The segment is closed when a row for a later day arrives or the file reaches
+    `max_bytes`, and closed segments are compacted to zstd-compressed parquet with the same name.
+    read(start, end) opens only the segments for days in the range.
+
+    Every worker process shares the directory: each writes and numbers only its own segments
+    (`writer`, by default <hostname>-<pid>) and compacts only those it closed. When the log is
+    opened, CSV segments orphaned by an earlier run (the same writer, or a process on this host
+    that is no longer running) are compacted by whichever process claims them first.
+    """
+
+    def __init__(self, directory, max_bytes: int = 16 * 1024 * 1024, capacity: int = 50,
+                 writer: str = None):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.capacity = capacity
+        self.writer = writer or default_writer()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._active = None
+        self._active_day = None
+        self._signature = None
+        self._frame = None
+        for path in self.segments():
+            if path.suffix == ".csv" and self._orphaned(_SEGMENT_RE.match(path.name).group(3)):
+                self._claim_and_compact(path)
+
+    def _orphaned(self, writer) -> bool:
+        """Whether no running process can still be writing segments named for `writer`."""
+        if writer is None or writer == self.writer:
+            return True
+        host, _, pid = writer.rpartition("-")
+        mine = self.writer.rpartition("-")[0]
+        return host == mine and pid.isdigit() and not _pid_alive(int(pid))
+
+    # ── Writing ──
+    def write_rows(self, rows: list):
+        with self._lock:
+            for day, group in itertools.groupby(rows, key=lambda row: _row_day(row[0])):
+                if self._active is None or day > self._active_day or self._active_size() >= self.max_bytes:
+                    self._roll(max(day, self._active_day or day))
+                CsvSink(self._active).write_rows(list(group))
+
+    def _active_size(self) -> int:
+        try:
+            return self._active.stat().st_size
+        except OSError:
+            return 0
+
+    def _roll(self, day: str):
+        """Close the active segment (if any) and start this writer's next one for `day`."""
+        if self._active is not None:
+            self._compact(self._active)
+        seqs = [int(m.group(2)) for m in map(_SEGMENT_RE.match, os.listdir(self.directory))
+                if m and m.group(1) == day and m.group(3) == self.writer]
+        self._active = self.directory / f"{day}_{max(seqs, default=-1) + 1:04d}_{self.writer}.csv"
+        self._active_day = day
+
+    def _compact(self, path: Path, source: Path = None):
+        """Rewrite a closed CSV segment (read from `source` if given) as zstd parquet and remove the CSV."""
+        source = source or path
+        if not source.exists():
+            return
+        df = pd.read_csv(source, dtype=str, keep_default_na=False).reindex(columns=LOG_COLUMNS, fill_value="")
+        if not df.empty:
+            tmp = path.with_name(f"{path.stem}.{self.writer}.tmp")
+            df.to_parquet(tmp, compression="zstd", index=False)
+            os.replace(tmp, path.with_suffix(".parquet"))
+        source.unlink()
+
+    def _claim_and_compact(self, path: Path):
+        """Compact an orphaned segment unless another process claimed it first (by renaming it)."""
+        claimed = path.with_name(f"{path.name}.{self.writer}.claimed")
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return
+        self._compact(path, claimed)
+
+    def import_csv(self, path) -> bool:
+        """
+        Move a single-file CSV log into day segments, renaming it to <name>.imported. Only the
+        process that claims the file (by renaming it) imports it; returns whether this one did.
+        """
+        path = Path(path)
+        claimed = path.with_name(f"{path.name}.{self.writer}.importing")
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return False
+        df = pd.read_csv(claimed, dtype=str, keep_default_na=False)
+        df.columns = df.columns.str.strip().str.lower()
+        rows = df.reindex(columns=LOG_COLUMNS, fill_value="").sort_values("timestamp", kind="stable").values.tolist()
+        with self._lock:
+            for day, group in itertools.groupby(rows, key=lambda row: _row_day(row[0])):
+                self._roll(day)
+                CsvSink(self._active).write_rows(list(group))
+            if self._active is not None:
+                self._compact(self._active)
+                self._active = self._active_day = None
+        claimed.rename(path.with_name(path.name + ".imported"))
+        return True
+
+    # ── Reading ──
+    def segments(self, start=None, end=None) -> list:
+        """
+        Segment paths ordered by day, sequence and writer, limited to days that overlap [start, end).
+        A segment caught mid-compaction (CSV and parquet both present) is listed once, as parquet.
+        """
+        first = _bound(start)[:10] if start is not None else None
+        stop = _bound(end) if end is not None else None
+        names = set(os.listdir(self.directory))
+        found = []
+        for name in names:
+            m = _SEGMENT_RE.match(name)
+            if not m or (first and m.group(1) < first) or (stop and m.group(1) >= stop):
+                continue
+            if m.group(4) == "csv" and name[:-4] + ".parquet" in names:
+                continue
+            found.append((m.group(1), int(m.group(2)), m.group(3) or "", self.directory / name))
+        return [path for *_, path in sorted(found)]
+
+    @staticmethod
+    def _read_segment(path: Path) -> pd.DataFrame:
+        if path.suffix == ".parquet":
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        return df.reindex(columns=LOG_COLUMNS, fill_value="")
+
+    def _load(self, path: Path) -> pd.DataFrame:
+        """_read_segment(), falling back to the parquet a CSV segment was compacted to since it was listed."""
+        try:
+            return self._read_segment(path)
+        except FileNotFoundError:
+            if path.suffix != ".csv":
+                raise
+            return self._read_segment(path.with_suffix(".parquet"))
+
+    def read(self, start=None, end=None) -> pd.DataFrame:
+        """
+        Logged rows with start <= timestamp < end (either bound may be omitted), oldest first,
+        with timestamp/query/response columns. Rows of different writers are merged by timestamp.
+        """
+        with self._lock:
+            frames = [self._load(path) for path in self.segments(start, end)]
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=LOG_COLUMNS)
+        ts = df["timestamp"].astype(str)
+        keep = pd.Series(True, index=df.index)
+        if start is not None:
+            keep &= ts >= _bound(start)
+        if end is not None:
+            keep &= ts < _bound(end)
+        df = df[keep]
+        return df.iloc[ts[keep].argsort(kind="stable")].reset_index(drop=True)
+
+    def tail(self, n: int) -> list:
+        """The last n rows, reading days newest first until there are enough."""
+        rows = []
+        with self._lock:
+            by_day = itertools.groupby(reversed(self.segments()), key=lambda p: p.name[:10])
+            for _, paths in by_day:
+                if len(rows) >= n:
+                    break
+                day = []
+                for path in paths:
+                    if path.suffix == ".csv":
+                        try:
+                            day += tail_csv(path, n)
+                            continue
+                        except FileNotFoundError:
+                            pass
+                    day += self._load(path).tail(n).values.tolist()
+                day.sort(key=lambda row: str(row[0]))
+                rows = day[-(n - len(rows)):] + rows
+        return rows
+
+    def recent(self, n: int = 50) -> pd.DataFrame:
+        """
+        Up to n (at most capacity) newest rows, newest first, cached until a segment of the newest
+        day changes; treat the result as read-only.
+        """
+        with self._lock:
+            segments = self.segments()
+            newest_day = [p for p in segments if p.name[:10] == segments[-1].name[:10]] if segments else []
+            try:
+                signature = tuple((p.name, p.stat().st_size, p.stat().st_mtime_ns) for p in newest_day)
+            except FileNotFoundError:
+                signature = None
+            if self._frame is None or signature is None or signature != self._signature:
+                self._frame = _recent_frame(self.tail(self.capacity), self.capacity)
+                self._signature = signature
+            return self._frame.head(n)
@@ -0,0 +1,68 @@
+"""
+Server-side paging for the dashboard's data grids.
+
+The full result stays on the server. Sort and filter clicks from the grid's header
+(`<id>_column_sort` / `<id>_column_filter`, in Shiny's ColumnSort / ColumnFilter shape) become
+view_positions(): the row order of the whole result after filtering and sorting. Only one page of
+rows is then taken from it, and dates are formatted for that page alone.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+PAGE_ROWS = 50
+
+
+def _filter_mask(col: pd.Series, value) -> np.ndarray:
+    """Rows of col matching one column filter: a (min, max) range or a case-insensitive substring."""
+    if isinstance(value, (list, tuple)):
+        lo, hi = value
+        mask = col.notna().to_numpy()
+        if lo is not None:
+            mask &= (col >= lo).to_numpy()
+        if hi is not None:
+            mask &= (col <= hi).to_numpy()
+        return mask
+    return col.astype(str).str.contains(str(value), case=False, regex=False).to_numpy()
+
+
+def view_positions(df: pd.DataFrame, sort=(), filters=()) -> np.ndarray:
+    """
+    Row positions of df after applying the grid's column filters, then its sorts. The first
+    sort has the highest precedence; sorts are stable, so ties keep the result's own order.
+    """
+    # Grid state can briefly refer to the previous result's columns; those entries are skipped
+    filters = [f for f in filters if f["col"] < df.shape[1]]
+    sort = [s for s in sort if s["col"] < df.shape[1]]
+    mask = np.ones(len(df), dtype=bool)
+    for f in filters:
+        mask &= _filter_mask(df.iloc[:, f["col"]], f["value"])
+    positions = np.flatnonzero(mask)
+    for s in reversed(sort):
+        col = df.iloc[positions, s["col"]]
+        if isinstance(col.dtype, pd.CategoricalDtype) and not col.dtype.ordered:
+            col = col.astype(str)
+        order = col.reset_index(drop=True).sort_values(
+            ascending=not s["desc"], kind="stable", na_position="last"
+        ).index.to_numpy()
+        positions = positions[order]
+    return positions
+
+
+def page_count(n_rows: int, page_size: int = PAGE_ROWS) -> int:
+    """Number of pages for n_rows rows; at least 1, so an empty result still has a page."""
+    return max(1, math.ceil(n_rows / page_size))
+
+
+def page_slice(df: pd.DataFrame, positions: np.ndarray, page: int, page_size: int = PAGE_ROWS,
+               date_format: str = "%Y-%m-%d") -> pd.DataFrame:
+    """One page of df in view order, with datetime columns formatted as strings for this page only."""
+    page = min(max(page, 0), page_count(len(positions), page_size) - 1)
+    out = df.iloc[positions[page * page_size:(page + 1) * page_size]].reset_index(drop=True)
+    dates = [c for c in out.columns if pd.api.types.is_datetime64_any_dtype(out[c])]
+    if dates:
+        out = out.assign(**{c: out[c].dt.strftime(date_format) for c in dates})
+    return out
@@ -0,0 +1,304 @@
+import threading
+
+from matplotlib.figure import Figure
+from matplotlib.patches import Wedge
+from shiny import render
+from shiny.session import require_active_session
+
+from cache import LRUCache
+from utils import PERIODS
+
+
+# COLOR SCHEME
+C_HOME = "#472A4B"
+C_AWAY = "#e15759"
+C_GOALS_FOR = "#472A4B"
+C_GOALS_AGAINST = "#e15759"
+C_EARLY = "#472A4B"
+C_MID = "#e15759"
+C_LATE = "#4e79a7"
+C_GAUGE_BG = "#e0e4ea"
+
+VENUES = ["Home", "Away"]
+
+EMPTY_AI_MESSAGE = "No matches found for the current AI filter.\nTry a different query."
+
+
+# ── Shared styling ─────────────────────────────────────────────────────────────
+def _new_figure(figsize) -> Figure:
+    """Create a white matplotlib Figure that is not registered with pyplot."""
+    fig = Figure(figsize=figsize)
+    fig.patch.set_facecolor("#fff")
+    return fig
+
+
+def _style_ax(ax):
+    """Apply consistent styling to matplotlib axes."""
+    ax.spines[["top", "right"]].set_visible(False)
+    ax.yaxis.grid(True, linestyle="--", linewidth=0.6, alpha=0.45, zorder=0)
+    ax.set_axisbelow(True)
+    ax.tick_params(axis="both", labelsize=8)
+
+
+# ── Dashboard chart templates ──────────────────────────────────────────────────
+# Each template builds its figure, axes, legend and static artists once; draw() only updates
+# bar heights, line data and text. Templates are kept per thread, and draw() resets the dpi
+# because render.plot scales it by the client's pixel ratio on every render.
+
+class _GoalsHomeAwayChart:
+    """Grouped bars of average goals scored/conceded at home and away."""
+
+    def __init__(self):
+        self.fig = _new_figure((5, 3.5))
+        self.dpi = self.fig.get_dpi()
+        ax = self.ax = self.fig.add_subplot()
+        ax.set_facecolor("#fff")
+
+        x = range(len(VENUES))
+        w = 0.35
+        bars_for = ax.bar([i - w/2 for i in x], [0, 0], width=w, color=C_GOALS_FOR, zorder=3, label="Goals Scored")
+        bars_against = ax.bar([i + w/2 for i in x], [0, 0], width=w, color=C_GOALS_AGAINST, zorder=3, label="Goals Conceded")
+        self.bars = list(bars_for) + list(bars_against)
+        self.labels = [
+            ax.text(bar.get_x() + bar.get_width() / 2, 0, "", ha="center", va="bottom", fontsize=8, fontweight="600")
+            for bar in self.bars
+        ]
+
+        ax.set_xticks(list(x))
+        ax.set_xticklabels(VENUES, fontsize=9)
+        ax.set_ylabel("Avg Goals", fontsize=9)
+        _style_ax(ax)
+        ax.legend(fontsize=8, frameon=False, loc="upper right")
+        self.fig.set_layout_engine("tight", pad=0.8)
+
+    def draw(self, summary: dict) -> Figure:
+        heights = [summary[v]["avg_goals_for"] for v in VENUES] + [summary[v]["avg_goals_against"] for v in VENUES]
+        top = max(heights + [1]) * 1.35
+        self.ax.set_ylim(0, top)
+        for bar, label, h in zip(self.bars, self.labels, heights):
+            bar.set_height(h)
+            label.set_y(h + top * 0.02)
+            label.set_text(f"{h:.1f}")
+        self.fig.set_dpi(self.dpi)
+        return self.fig
+
+
+class _WinRateGauges:
+    """Two semicircular win-rate gauges (home and away) filling from the left."""
+
+    def __init__(self):
+        self.fig = _new_figure((8, 3.5))
+        self.dpi = self.fig.get_dpi()
+        self.gauges = []
+        for i, (color, label) in enumerate(zip([C_HOME, C_AWAY], VENUES)):
+            ax = self.fig.add_subplot(1, 2, i + 1)
+            ax.set_aspect("equal")
+            ax.axis("off")
+            ax.add_patch(Wedge((0, 0), 1.0, 0, 180, width=0.22, facecolor=C_GAUGE_BG, edgecolor="none", lw=0))
+            fg = ax.add_patch(Wedge((0, 0), 1.0, 180, 180, width=0.22, facecolor=color, edgecolor="none", lw=0))
+            value = ax.text(0, -0.08, "", ha="center", va="center", fontsize=14, fontweight="700", color=color)
+            ax.text(0, -0.32, label, ha="center", va="center", fontsize=10, color="#6b7280")
+            ax.set_xlim(-1.15, 1.15)
+            ax.set_ylim(-0.6, 1.05)
+            self.gauges.append((fg, value))
+        self.fig.set_layout_engine("tight", pad=0.6)
+
+    def draw(self, summary: dict) -> Figure:
+        for (fg, value), venue in zip(self.gauges, VENUES):
+            val = summary[venue]["win_rate"]
+            frac = max(0.0, min(float(val) / 100.0 if val is not None else 0.0, 1.0))
+            fg.set_theta1(180 - 180 * frac)
+            fg.set_visible(frac > 0)
+            value.set_text(f"{(val or 0):.1f}%")
+        self.fig.set_dpi(self.dpi)
+        return self.fig
+
+
+class _GoalsByPeriodChart:
+    """Overall, home and away average goals across the Early/Mid/Late season periods."""
+
+    def __init__(self):
+        self.fig = _new_figure((9, 3))
+        self.dpi = self.fig.get_dpi()
+        ax = self.ax = self.fig.add_subplot()
+        ax.set_facecolor("#fff")
+
+        x = list(range(len(PERIODS)))
+        zeros = [0] * len(PERIODS)
+        (overall,) = ax.plot(x, zeros, color="#d1d5db", linewidth=2.2, marker="o", label="Overall Avg Goals", zorder=2)
+        (home,) = ax.plot(x, zeros, color=C_HOME, linewidth=2.2, marker="o", label="Home Avg Goals", zorder=3)
+        (away,) = ax.plot(x, zeros, color=C_AWAY, linewidth=2.2, marker="o", label="Away Avg Goals", zorder=3)
+        self.lines = [overall, home, away]
+
+        ax.set_xticks(x)
+        ax.set_xticklabels(PERIODS, fontsize=9)
+        ax.set_ylabel("Avg Goals Scored", fontsize=9)
+        _style_ax(ax)
+        ax.legend(fontsize=8, frameon=False)
+        self.fig.set_layout_engine("tight", pad=0.8)
+
+    def draw(self, avg_goals: list, home_avg: list, away_avg: list) -> Figure:
+        for line, values in zip(self.lines, [avg_goals, home_avg, away_avg]):
+            line.set_ydata(values)
+        ymax = max(avg_goals + home_avg + away_avg + [1])
+        self.ax.set_ylim(0, ymax * 1.4)
+        self.fig.set_dpi(self.dpi)
+        return self.fig
+
+
+_templates = threading.local()
+
+
+def _template(cls):
+    """Return this thread's instance of a chart template, building it on first use."""
+    chart = getattr(_templates, cls.__name__, None)
+    if chart is None:
+        chart = cls()
+        setattr(_templates, cls.__name__, chart)
+    return chart
+
+
+def goals_home_away_figure(summary: dict) -> Figure:
+    """Home vs Away average goals scored/conceded, from a summary_home_away() dict."""
+    return _template(_GoalsHomeAwayChart).draw(summary)
+
+
+def winrate_figure(summary: dict) -> Figure:
+    """Home vs Away win-rate gauges, from a summary_home_away() dict."""
+    return _template(_WinRateGauges).draw(summary)
+
+
+def goals_by_period_figure(avg_goals: list, home_avg: list, away_avg: list) -> Figure:
+    """Average goals by season period: overall, home and away, one value per PERIODS entry."""
+    return _template(_GoalsByPeriodChart).draw(avg_goals, home_avg, away_avg)
+
+
+# ── AI explorer charts ─────────────────────────────────────────────────────────
+# The AI charts have a varying number of bars, so they are built fresh, but still without pyplot.
+
+def _ai_figure():
+    """A new AI-explorer sized figure and axes."""
+    fig = _new_figure((5, 3.5))
+    ax = fig.add_subplot()
+    ax.set_facecolor("#fff")
+    return fig, ax
+
+
+def empty_ai_figure() -> Figure:
+    """Placeholder shown when the AI filter returns no matches."""
+    fig, ax = _ai_figure()
+    ax.text(0.5, 0.5, EMPTY_AI_MESSAGE, ha="center", va="center", fontsize=10, color="#6b7280")
+    ax.axis("off")
+    return fig
+
+
+def result_counts_figure(counts) -> Figure:
+    """Bar chart of match counts per result label, from a value_counts() Series."""
+    fig, ax = _ai_figure()
+    bars = ax.bar(counts.index, counts.values, zorder=3)
+    ax.set_ylabel("Count", fontsize=9)
+    ax.set_xlabel("")
+    ax.spines[["top", "right"]].set_visible(False)
+    ax.yaxis.grid(True, linestyle="--", linewidth=0.6, alpha=0.45, zorder=0)
+    ax.set_axisbelow(True)
+    ax.tick_params(axis="x", labelrotation=10, labelsize=8)
+    ax.tick_params(axis="y", labelsize=8)
+
+    for bar in bars:
+        h = bar.get_height()
+        ax.text(
+            bar.get_x() + bar.get_width() / 2,
+            h + 0.02 * max(counts.values.max(), 1),
+            f"{int(h)}",
+            ha="center",
+            va="bottom",
+            fontsize=8,
+            fontweight="600",
+        )
+
+    fig.tight_layout(pad=0.8)
+    return fig
+
+
+def avg_goals_figure(home_mean: float, away_mean: float) -> Figure:
+    """Bar chart of average home and away goals."""
+    fig, ax = _ai_figure()
+    labels = ["Home Goals", "Away Goals"]
+    vals = [home_mean, away_mean]
+
+    bars = ax.bar(labels, vals, zorder=3)
+    ax.set_ylabel("Average Goals", fontsize=9)
+    ax.set_xlabel("")
+    ax.spines[["top", "right"]].set_visible(False)
+    ax.yaxis.grid(True, linestyle="--", linewidth=0.6, alpha=0.45, zorder=0)
+    ax.set_axisbelow(True)
+    ax.tick_params(axis="both", labelsize=8)
+
+    ylim_top = max(vals + [1]) * 1.35
+    ax.set_ylim(0, ylim_top)
+
+    for bar in bars:
+        h = bar.get_height()
+        ax.text(
+            bar.get_x() + bar.get_width() / 2,
+            h + ylim_top * 0.02,
+            f"{h:.2f}",
+            ha="center",
+            va="bottom",
+            fontsize=8,
+            fontweight="600",
+        )
+
+    fig.tight_layout(pad=0.8)
+    return fig
+
+
+def season_counts_figure(counts) -> Figure:
+    """Bar chart of match counts per season, from a value_counts() Series sorted by season."""
+    fig, ax = _ai_figure()
+    ax.bar(counts.index.astype(str), counts.values, zorder=3)
+    ax.set_ylabel("Matches", fontsize=9)
+    ax.set_xlabel("Season", fontsize=9)
+    ax.spines[["top", "right"]].set_visible(False)
+    ax.yaxis.grid(True, linestyle="--", linewidth=0.6, alpha=0.45, zorder=0)
+    ax.set_axisbelow(True)
+    ax.tick_params(axis="x", labelrotation=45, labelsize=8)
+    ax.tick_params(axis="y", labelsize=8)
+
+    fig.tight_layout(pad=0.8)
+    return fig
+
+
+# ── Rendering ──────────────────────────────────────────────────────────────────
+class cached_plot(render.plot):
+    """
+    A render.plot that caches the rendered PNG per (output, key(), size, pixel ratio).
+
+    `key` is a callable returning everything the figure depends on (e.g. the filter
+    inputs); it is called reactively, so the output still re-renders when it changes.
+    On a hit the cached image is sent as-is and the plot function is not called.
+    """
+
+    def __init__(self, _fn=None, *, key, cache: LRUCache, **kwargs):
+        super().__init__(_fn, **kwargs)
+        self._key = key
+        self._cache = cache
+
+    async def render(self):
+        session = require_active_session(None)
+        inputs = session.root_scope().input
+        name = session.ns(self.output_id)
+        size = (
+            inputs[".clientdata_pixelratio"](),
+            inputs[f".clientdata_output_{name}_width"](),
+            inputs[f".clientdata_output_{name}_height"](),
+        )
+        key = (name, self._key(), size)
+
+        img, version = self._cache.lookup(key)
+        if img is None:
+            img = await super().render()
+            if img is not None:
+                self._cache.put(key, img, version=version)
+            return img
+        return dict(img)
@@ -0,0 +1,116 @@
+"""
+Read-only, resource-limited execution of QueryChat's generated SQL on the shared DuckDB connection.
+
+QueryChat rejects statements that start with a write keyword. GuardedIbisSource also runs every
+query as a subquery, so only a SELECT can execute, caps the rows it returns, and interrupts DuckDB
+when a query runs past its time limit, so one expensive generated query cannot monopolize the
+worker. A SELECT can still read files (read_text, read_csv, ...), so the database must also be
+locked down with db.lock_down() before generated SQL runs on it.
+"""
+
+import contextlib
+import threading
+
+import pandas as pd
+from querychat._utils import check_query
+from querychat.types import IbisSource
+
+
+class QueryTimeout(Exception):
+    """A generated query was interrupted after running past its time limit."""
+
+
+@contextlib.contextmanager
+def interrupt_after(connection, timeout: float):
+    """Interrupt whatever `connection` (a DuckDB connection or cursor) is running once `timeout` seconds pass."""
+    lock = threading.Lock()
+    state = dict(done=False, fired=False)
+
+    def _interrupt():
+        with lock:
+            if not state["done"]:
+                state["fired"] = True
+                connection.interrupt()
+
+    timer = threading.Timer(timeout, _interrupt)
+    timer.daemon = True
+    timer.start()
+    try:
+        yield
+    except Exception as e:
+        if state["fired"]:
+            raise QueryTimeout(f"Query stopped after {timeout:g} s") from e
+        raise
+    finally:
+        with lock:
+            state["done"] = True
+        timer.cancel()
+
+
+def execute_limited(backend, expr, row_cap: int, timeout: float) -> pd.DataFrame:
+    """
+    Execute an ibis query with at most row_cap rows and a time limit. The result's
+    attrs["truncated"] is True when the query had more rows than the cap.
+    """
+    with interrupt_after(backend.con, timeout):
+        df = expr.limit(row_cap + 1).execute()
+    truncated = len(df) > row_cap
+    if truncated:
+        df = df.iloc[:row_cap]
+    df.attrs["truncated"] = truncated
+    return df
+
+
+def stream_limited(connection, sql: str, batch_rows: int, timeout: float):
+    """
+    Stream a query's result from `connection` (a DuckDB connection or cursor) as pandas frames of at most batch_rows rows, without a
+    row cap. The time limit covers the whole stream; at least one (possibly empty) frame is yielded.
+    """
+    with interrupt_after(connection, timeout):
+        reader = connection.execute(sql).fetch_record_batch(batch_rows)
+        empty = True
+        for batch in reader:
+            empty = False
+            yield batch.to_pandas()
+        if empty:
+            yield reader.schema.empty_table().to_pandas()
+
+
+class GuardedIbisSource(IbisSource):
+    """
+    QueryChat data source over an ibis table that executes queries eagerly through
+    execute_limited(), so the chat's query tool and the dashboard filter are both bounded.
+    """
+
+    def __init__(self, table, table_name: str, row_cap: int = 20_000, timeout: float = 10.0):
+        super().__init__(table, table_name)
+        self.row_cap = row_cap
+        self.timeout = timeout
+
+    def execute_query(self, query: str, backend=None) -> pd.DataFrame:
+        """
+        Run a generated query with the row cap and time limit, on `backend` (e.g. a pooled cursor
+        on the same database) if given, else on the table's own connection.
+        """
+        if backend is None:
+            return execute_limited(self._backend, super().execute_query(query), self.row_cap, self.timeout)
+        check_query(query)
+        return execute_limited(backend, backend.sql(query), self.row_cap, self.timeout)
+
+    def empty_result(self) -> pd.DataFrame:
+        """An empty frame with the table's columns, without querying (e.g. after a QueryTimeout)."""
+        return pd.DataFrame(columns=self._colnames)
+
+    def stream_query(self, query: str, connection, batch_rows: int = 2_000, timeout: float = None):
+        """
+        A generated query's full result, without the row cap, as frames of batch_rows rows from
+        `connection` (a DuckDB cursor on the same database), which the stream holds until it is
+        exhausted or closed (see stream_limited()).
+        """
+        check_query(query)
+        sql = f"SELECT * FROM ({query.strip().rstrip(';')}) AS q"
+        return stream_limited(connection, sql, batch_rows, timeout or self.timeout)
+
+    def test_query(self, query: str, *, require_all_columns: bool = False):
+        with interrupt_after(self._backend.con, self.timeout):
+            return super().test_query(query, require_all_columns=require_all_columns)
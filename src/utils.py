@@ -1,38 +1,288 @@
+import ibis
+import numpy as np
 import pandas as pd
 
 
+VENUE_DTYPE = pd.CategoricalDtype(["Home", "Away"])
+RESULT_CODE_DTYPE = pd.CategoricalDtype(["H", "D", "A"])
+RESULT_LABEL_DTYPE = pd.CategoricalDtype(["Home team win", "Draw", "Away team win"])
+PERIODS = ["Early", "Mid", "Late"]
+
+# Per-match counts are small, so int8 is enough; shots and fouls get int16 for headroom
+COUNT_DTYPES = {
+    "FullTimeHomeGoals": "int8",
+    "FullTimeAwayGoals": "int8",
+    "HalfTimeHomeGoals": "int8",
+    "HalfTimeAwayGoals": "int8",
+    "HomeShots":         "int16",
+    "AwayShots":         "int16",
+    "HomeShotsOnTarget": "int8",
+    "AwayShotsOnTarget": "int8",
+    "HomeCorners":       "int8",
+    "AwayCorners":       "int8",
+    "HomeFouls":         "int16",
+    "AwayFouls":         "int16",
+    "HomeYellowCards":   "int8",
+    "AwayYellowCards":   "int8",
+    "HomeRedCards":      "int8",
+    "AwayRedCards":      "int8",
+}
+
+
+def compact_dtypes(df: pd.DataFrame, teams: list = None, seasons: list = None) -> pd.DataFrame:
+    """
+    Convert match columns to the compact schema: categoricals for teams, seasons and results,
+    and int8/int16 for the count columns.
+
+    Pass the full team and season lists so frames from different queries share one dtype;
+    otherwise the categories are taken from df itself.
+    """
+    if df.empty and len(df.columns) == 0:
+        return df
+    if teams is None:
+        teams = sorted(set(df["HomeTeam"].dropna()) | set(df["AwayTeam"].dropna()))
+    if seasons is None:
+        seasons = sorted(df["Season"].dropna().unique())
+    team_dtype = pd.CategoricalDtype(teams)
+
+    dtypes = {
+        "Season":         pd.CategoricalDtype(seasons, ordered=True),
+        "HomeTeam":       team_dtype,
+        "AwayTeam":       team_dtype,
+        "FullTimeResult": RESULT_CODE_DTYPE,
+        "HalfTimeResult": RESULT_CODE_DTYPE,
+        "Result":         RESULT_LABEL_DTYPE,
+        **COUNT_DTYPES,
+    }
+    return df.astype({col: dtype for col, dtype in dtypes.items() if col in df.columns})
+
+
+def _add_perspective_columns(df: pd.DataFrame, is_home: np.ndarray) -> pd.DataFrame:
+    """
+    Add venue, goals_for, goals_against and win columns given a per-row is_home flag.
+    """
+    home_goals = df["FullTimeHomeGoals"].to_numpy()
+    away_goals = df["FullTimeAwayGoals"].to_numpy()
+    ftr = df["FullTimeResult"].to_numpy(dtype=object)
+    return df.assign(
+        venue=pd.Categorical.from_codes(np.where(is_home, 0, 1), dtype=VENUE_DTYPE),
+        goals_for=np.where(is_home, home_goals, away_goals),
+        goals_against=np.where(is_home, away_goals, home_goals),
+        win=(ftr == np.where(is_home, "H", "A")).astype("int8"),
+    )
+
+
 def get_team_matches(df: pd.DataFrame, team: str) -> pd.DataFrame:
     """
     Return all matches for a given team with venue, goals_for, goals_against, and win columns.
     """
-    home = df[df["HomeTeam"] == team].copy()
-    away = df[df["AwayTeam"] == team].copy()
+    home_mask = (df["HomeTeam"] == team).to_numpy()
+    mask = home_mask | (df["AwayTeam"] == team).to_numpy()
+    out = _add_perspective_columns(df[mask], home_mask[mask])
+    return out.sort_values("MatchDate", kind="stable").reset_index(drop=True)
+
+
+class TeamSeasonIndex:
+    """
+    Which seasons each team played, and which teams played in each season.
+
+    Build it from a match table with from_matches() (one pass over both sides of every match)
+    or directly from the team -> seasons mapping stored in the build manifest. Seasons and teams
+    are sorted, so a team's latest season is the last entry.
+    """
 
-    home["venue"]         = "Home"
-    home["goals_for"]     = home["FullTimeHomeGoals"]
-    home["goals_against"] = home["FullTimeAwayGoals"]
-    home["win"]           = (home["FullTimeResult"] == "H").astype(int)
+    def __init__(self, team_seasons: dict):
+        self.team_seasons = {team: sorted(seasons) for team, seasons in sorted(team_seasons.items())}
+        season_teams = {}
+        for team, seasons in self.team_seasons.items():
+            for season in seasons:
+                season_teams.setdefault(season, []).append(team)
+        self.season_teams = dict(sorted(season_teams.items()))
+        self.teams = list(self.team_seasons)
+        self.seasons = list(self.season_teams)
 
-    away["venue"]         = "Away"
-    away["goals_for"]     = away["FullTimeAwayGoals"]
-    away["goals_against"] = away["FullTimeHomeGoals"]
-    away["win"]           = (away["FullTimeResult"] == "A").astype(int)
+    @classmethod
+    def from_pairs(cls, pairs: pd.DataFrame) -> "TeamSeasonIndex":
+        """Build the index from a frame of (team, Season) pairs; duplicates are allowed."""
+        pairs = pairs[["team", "Season"]].astype(str).drop_duplicates()
+        return cls({team: list(seasons) for team, seasons in pairs.groupby("team", sort=False)["Season"]})
 
-    return pd.concat([home, away]).sort_values("MatchDate").reset_index(drop=True)
+    @classmethod
+    def from_matches(cls, df: pd.DataFrame) -> "TeamSeasonIndex":
+        """
+        Build the index from a match table with HomeTeam, AwayTeam and Season columns, using one
+        np.unique over integer (team, season) codes instead of a scan per team.
+        """
+        if df.empty:
+            return cls({})
+        team_codes, teams = pd.factorize(pd.concat([df["HomeTeam"], df["AwayTeam"]], ignore_index=True))
+        season_codes, seasons = pd.factorize(df["Season"])
+        season_codes = np.tile(season_codes, 2)
+        known = (team_codes >= 0) & (season_codes >= 0)
+        keys = np.unique(team_codes[known] * len(seasons) + season_codes[known])
+        return cls.from_pairs(pd.DataFrame({
+            "team": np.asarray(teams)[keys // len(seasons)],
+            "Season": np.asarray(seasons)[keys % len(seasons)],
+        }))
+
+    def seasons_for(self, team: str) -> list:
+        """Seasons the team played, oldest first; every season if the team is unknown."""
+        return self.team_seasons.get(team, self.seasons)
+
+    def teams_for(self, season: str) -> list:
+        """Teams that played in the season, sorted; empty if the season is unknown."""
+        return self.season_teams.get(season, [])
+
+    def latest_season(self, team: str):
+        """The team's most recent season (the latest overall for an unknown team), or None."""
+        seasons = self.seasons_for(team)
+        return seasons[-1] if seasons else None
+
+
+def period_codes(n: int, buckets: int) -> np.ndarray:
+    """
+    Bucket number (0 to buckets - 1) of each of n consecutive rows split into equal parts: one
+    np.searchsorted of the row positions against the cut points. A row exactly on a cut point
+    goes to the later bucket.
+    """
+    cuts = np.arange(1, buckets) * (n / buckets)
+    return np.searchsorted(cuts, np.arange(n), side="right")
 
 
-def assign_period(df: pd.DataFrame) -> pd.DataFrame:
+def assign_period(df: pd.DataFrame, labels: list = PERIODS, every: int = None, freq: str = None,
+                  date_col: str = "MatchDate") -> pd.DataFrame:
     """
-    Assign Early/Mid/Late period labels to matches based on their position in the DataFrame.
+    Return df with an ordered categorical `period` column.
+
+    By default the rows are split by position into len(labels) equal parts, so a team's season in
+    date order gets Early/Mid/Late. With every=N each run of N rows is one bucket, labelled
+    "1-N", "N+1-2N", ...; a team plays once per matchweek, so this is per-N-matchweek. With freq
+    the buckets are calendar periods of date_col ("M" for monthly), labelled like "2024-08".
     """
-    df = df.copy()
     n = len(df)
-    if n == 0:
-        df["period"] = pd.Series(dtype=str)
-        return df
-    third = n / 3
-    df["period"] = [
-        "Early" if i < third else ("Mid" if i < 2 * third else "Late")
-        for i in range(n)
-    ]
-    return df
\ No newline at end of file
+    if freq is not None:
+        stamps = df[date_col].dt.to_period(freq).astype(str) if n else pd.Series(dtype=str)
+        period = pd.Categorical(stamps, ordered=True)
+    elif every is not None:
+        labels = [f"{start + 1}-{min(start + every, n)}" for start in range(0, n, every)]
+        period = pd.Categorical.from_codes(np.arange(n) // every, categories=labels, ordered=True)
+    else:
+        period = pd.Categorical.from_codes(period_codes(n, len(labels)), categories=labels, ordered=True)
+    return df.assign(period=period)
+
+
+def period_summary(df: pd.DataFrame) -> dict:
+    """
+    Per period of an assign_period() team table: n, and the average goals_for overall (avg_goals),
+    at home (home_avg) and away (away_avg). Sums come from one np.bincount over (period, venue)
+    codes, which is far cheaper than a group-by on a season's few dozen rows. A period or venue
+    with no matches averages 0.
+    """
+    periods = list(df["period"].cat.categories)
+    if df.empty:
+        return {period: dict(n=0, avg_goals=0, home_avg=0, away_avg=0) for period in periods}
+    keys = df["period"].cat.codes.to_numpy() * 2 + (df["venue"] != "Home").to_numpy()
+    goals = np.bincount(keys, weights=df["goals_for"].to_numpy(), minlength=2 * len(periods)).reshape(-1, 2)
+    counts = np.bincount(keys, minlength=2 * len(periods)).reshape(-1, 2)
+
+    def mean(total, n):
+        return float(total / n) if n else 0
+
+    return {
+        period: dict(
+            n=int(counts[i].sum()),
+            avg_goals=mean(goals[i].sum(), counts[i].sum()),
+            home_avg=mean(goals[i, 0], counts[i, 0]),
+            away_avg=mean(goals[i, 1], counts[i, 1]),
+        )
+        for i, period in enumerate(periods)
+    }
+
+
+def summarize_matches(df: pd.DataFrame) -> dict:
+    """
+    Aggregates the AI explorer shows for a query result, computed once per result: n, the column
+    names, result_counts (per Result label, largest first), home/away goal means and
+    season_counts (per Season, in season order).
+
+    Reads the columns in place without copying df. An aggregate whose columns the query did not
+    return, or any aggregate of an empty result, is None.
+    """
+    cols = set(df.columns)
+    summary = dict(
+        n=len(df),
+        columns=list(df.columns),
+        result_counts=None,
+        home_goals_mean=None,
+        away_goals_mean=None,
+        season_counts=None,
+    )
+    if df.empty:
+        return summary
+    if "Result" in cols:
+        counts = df["Result"].value_counts().astype(int)
+        summary["result_counts"] = counts[counts > 0]
+    if {"FullTimeHomeGoals", "FullTimeAwayGoals"} <= cols:
+        summary["home_goals_mean"] = float(df["FullTimeHomeGoals"].mean())
+        summary["away_goals_mean"] = float(df["FullTimeAwayGoals"].mean())
+    if "Season" in cols:
+        counts = df["Season"].value_counts(sort=False).sort_index().astype(int)
+        summary["season_counts"] = counts[counts > 0]
+    return summary
+
+
+EMPTY_METRICS = dict(n=0, win_rate=0.0, avg_goals_for=0.0, avg_goals_against=0.0)
+
+
+def metrics_totals_ibis(tbl):
+    """Aggregate match count, wins and goals per (team, season, Win/Draw/Loss) from both sides of tbl."""
+    sides = []
+    for team, goals_for, goals_against, win_code, loss_code in [
+        ("HomeTeam", "FullTimeHomeGoals", "FullTimeAwayGoals", "H", "A"),
+        ("AwayTeam", "FullTimeAwayGoals", "FullTimeHomeGoals", "A", "H"),
+    ]:
+        sides.append(tbl.select(
+            team=tbl[team],
+            Season=tbl.Season,
+            goals_for=tbl[goals_for].cast("int64"),
+            goals_against=tbl[goals_against].cast("int64"),
+            code=ibis.cases(
+                (tbl.FullTimeResult == win_code, "Win"),
+                (tbl.FullTimeResult == loss_code, "Loss"),
+                else_="Draw",
+            ),
+        ))
+    both = ibis.union(*sides)
+    return both.group_by(["team", "Season", "code"]).aggregate(
+        n=both.count(),
+        wins=(both.code == "Win").cast("int64").sum(),
+        goals_for=both.goals_for.sum(),
+        goals_against=both.goals_against.sum(),
+    )
+
+
+def metrics_cube_from_totals(totals: pd.DataFrame) -> dict:
+    """
+    Precomputed n, win rate and average goals for/against for every (team, season, result), from
+    per-(team, Season, code) totals such as metrics_totals_ibis() returns: code is "Win", "Draw" or
+    "Loss" and the n, wins, goals_for and goals_against columns are sums.
+
+    Keys are (team, season, result) tuples where result is "All", "Win", "Draw" or "Loss";
+    combinations with no matches are absent, so look them up with EMPTY_METRICS as default.
+    """
+    if totals.empty:
+        return {}
+
+    sums = ["n", "wins", "goals_for", "goals_against"]
+    totals = totals.astype({"team": str, "Season": str, "code": str, **{col: "int64" for col in sums}})
+    all_results = totals.groupby(["team", "Season"], sort=False)[sums].sum().reset_index().assign(code="All")
+
+    cube = {}
+    for row in pd.concat([all_results, totals]).itertuples(index=False):
+        cube[(row.team, row.Season, row.code)] = dict(
+            n=int(row.n),
+            win_rate=float(row.wins / row.n * 100),
+            avg_goals_for=float(row.goals_for / row.n),
+            avg_goals_against=float(row.goals_against / row.n),
+        )
+    return cube
@@ -45,3 +45,13 @@ def test_reset_button_clears_filters(page: Page):
     page.click("#btn_reset")
     page.wait_for_timeout(600)
     expect(page.locator("#input_team")).to_have_value("Arsenal")
+
+
+def test_rapid_team_changes_show_last_team(page: Page):
+    """Verifies that switching teams quickly ends on the last team's data, so a stale query
+    that finishes late never overwrites the dashboard."""
+    page.goto(APP_URL)
+    for team in ["Liverpool", "Chelsea", "Everton"]:
+        page.select_option("#input_team", team)
+    expect(page.locator("#data_context_description")).to_contain_text("Everton", timeout=10_000)
+    expect(page.locator("#data_context_description")).not_to_contain_text("Chelsea")
@@ -0,0 +1,168 @@
+"""
+Unit tests for the shared LRU cache in src/cache.py.
+Run with: pytest tests/test_cache.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+from cache import LRUCache, sizeof, normalize_sql
+
+
+# ── LRUCache tests ─────────────────────────────────────────────────────────────
+
+def test_cache_counts_hits_and_misses():
+    """Verifies that repeat lookups are served from the cache and counted, so the
+    hit rate reported for the dashboard queries is accurate."""
+    cache = LRUCache()
+    calls = []
+    for _ in range(3):
+        cache.get_or_compute(("Arsenal", "2024/25", "All"), lambda: calls.append(1) or "value")
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    """Verifies that the entry limit evicts the least recently used key, keeping
+    popular filter combinations such as the Arsenal default cached."""
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_respects_byte_cap():
+    """Verifies that the byte cap bounds memory by evicting old entries and refusing
+    values that are larger than the whole cache."""
+    cache = LRUCache(max_bytes=10)
+    cache.put("a", b"123456")
+    cache.put("b", b"123456")
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 6
+    cache.put("huge", b"x" * 11)
+    assert cache.get("huge") is None
+
+
+def test_cache_clears_when_version_changes():
+    """Verifies that a new data version drops stale results instead of serving
+    matches from before a data refresh."""
+    version = {"v": 1}
+    cache = LRUCache(version=lambda: version["v"])
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    version["v"] = 2
+    assert cache.get("a") is None
+
+
+def test_value_computed_across_version_change_is_not_cached():
+    """Verifies that a value computed from the old dataset, when the version changes between
+    the lookup and the put, is returned but not cached under the new version."""
+    version = {"v": 1}
+    cache = LRUCache(version=lambda: version["v"])
+
+    def compute():
+        version["v"] = 2
+        return "old"
+
+    assert cache.get_or_compute("a", compute) == "old"
+    assert cache.get("a") is None
+    assert cache.get_or_compute("a", lambda: "new") == "new"
+    assert cache.get("a") == "new"
+
+
+def test_concurrent_misses_compute_once():
+    """Verifies that sessions missing the same key at once wait for one computation instead of
+    each running the same query."""
+    cache = LRUCache()
+    calls = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "value"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(cache.get_or_compute, "a", compute)
+        started.wait(5)
+        others = [pool.submit(cache.get_or_compute, "a", compute) for _ in range(3)]
+        results = [first.result()] + [f.result() for f in others]
+    assert results == ["value"] * 4
+    assert calls == [1]
+    assert cache.stats()["waits"] == 3
+
+
+def test_waiters_get_the_computation_error():
+    """Verifies that a failed computation (e.g. a query timeout) is raised to every caller waiting
+    on it, is not cached, and the next miss computes again."""
+    cache = LRUCache()
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.2)
+        raise TimeoutError("query stopped")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(cache.get_or_compute, "a", fail)
+        started.wait(5)
+        waiter = pool.submit(cache.get_or_compute, "a", lambda: "unused")
+        for future in (first, waiter):
+            with pytest.raises(TimeoutError):
+                future.result()
+    assert cache.get_or_compute("a", lambda: "retried") == "retried"
+
+
+def test_cache_expires_entries_after_ttl(monkeypatch):
+    """Verifies that entries older than the TTL are dropped and recomputed, so cached AI
+    results do not outlive their freshness window."""
+    import cache as cache_module
+
+    now = {"t": 100.0}
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now["t"])
+    cache = LRUCache(ttl=60)
+    cache.put("a", b"123")
+    now["t"] += 59
+    assert cache.get("a") == b"123"
+    now["t"] += 2
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["entries"] == 0 and stats["bytes"] == 0
+
+
+def test_normalize_sql_shares_key_across_formatting():
+    """Verifies that reformatted copies of a QueryChat query map to one cache key while
+    different string literals do not."""
+    a = "SELECT *\n  FROM epl_matches\n WHERE HomeTeam = 'Arsenal';"
+    b = "select * from EPL_MATCHES where hometeam = 'Arsenal'"
+    assert normalize_sql(a) == normalize_sql(b) == "select * from epl_matches where hometeam = 'Arsenal'"
+    assert normalize_sql(b) != normalize_sql(b.replace("'Arsenal'", "'arsenal'"))
+    assert normalize_sql("SELECT 'a  b'") == "select 'a  b'"
+
+
+def test_sizeof_dataframe():
+    """Verifies that DataFrames are sized by their deep memory usage, which is what
+    the byte cap is meant to bound."""
+    df = pd.DataFrame({"team": ["Arsenal"] * 100})
+    assert sizeof(df) == df.memory_usage(deep=True).sum()
+
+
+def test_sizeof_rendered_plot():
+    """Verifies that a rendered plot (a dict holding a PNG data URI) is sized by its
+    payload, so the figure cache's byte cap reflects the images it holds."""
+    img = {"src": "data:image/png;base64," + "A" * 5000, "width": "100%", "height": "280px"}
+    assert sizeof(img) > 5000
@@ -0,0 +1,218 @@
+"""
+Unit tests for the full and incremental builds in src/create_parquet.py.
+Run with: pytest tests/test_create_parquet.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import json
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pytest
+from create_parquet import (
+    arrow_matches, build_full, build_incremental, changed_seasons, dataset_files, dataset_metadata, load_matches,
+    matches_metadata, open_matches_arrow, read_manifest,
+)
+
+
+RAW_CSV = os.path.join(os.path.dirname(__file__), "..", "data", "raw", "epl_final.csv")
+
+
+# ── Fixtures ───────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def raw_lines():
+    """Header plus the first 60 match rows of the real raw CSV, as bytes lines."""
+    with open(RAW_CSV, "rb") as fh:
+        return [fh.readline() for _ in range(61)]
+
+
+@pytest.fixture
+def paths(tmp_path, raw_lines):
+    """A raw CSV holding the first 40 matches and an empty processed directory."""
+    raw = tmp_path / "epl_final.csv"
+    raw.write_bytes(b"".join(raw_lines[:41]))
+    return str(raw), str(tmp_path / "processed")
+
+
+# ── Tests ──────────────────────────────────────────────────────────────────────
+
+def test_full_build_writes_manifest(paths):
+    """Verifies that a full build writes one file per season partition and a manifest
+    listing them, since the app locates its data through the manifest."""
+    raw, processed = paths
+    manifest = build_full(raw, processed)
+    assert manifest["files"] == ["epl_final/Season=2000%2F01/part-00001.parquet"]
+    assert manifest["raw_rows"] == 40
+    assert len(load_matches(processed)) == 40
+
+
+def test_incremental_build_appends_only_new_rows(paths, raw_lines):
+    """Verifies that an incremental build parses only the appended rows into a new
+    fragment, so weekly refreshes cost the size of the delta."""
+    raw, processed = paths
+    build_full(raw, processed)
+    with open(raw, "ab") as fh:
+        fh.write(b"".join(raw_lines[41:]))
+
+    manifest = build_incremental(raw, processed)
+    assert manifest["files"][-1] == "epl_final/Season=2000%2F01/part-00002.parquet"
+    assert len(pd.read_parquet(dataset_files(processed)[-1])) == 20
+    assert manifest["raw_rows"] == 60
+
+    full = pd.read_csv(RAW_CSV, nrows=60)
+    loaded = load_matches(processed)
+    assert sorted(loaded["HomeTeam"]) == sorted(full["HomeTeam"].str.strip())
+    assert set(loaded["Season"]) == {"2000/01"}
+
+
+def test_incremental_build_without_new_rows_is_noop(paths):
+    """Verifies that running an incremental build twice does not add empty fragments
+    or bump the dataset version."""
+    raw, processed = paths
+    first = build_full(raw, processed)
+    again = build_incremental(raw, processed)
+    assert again["version"] == first["version"]
+    assert again["files"] == first["files"]
+
+
+def test_partition_pruning_on_season(tmp_path):
+    """Verifies that DuckDB reads only the selected season's partition, so query cost
+    follows the selected season rather than the full archive."""
+    processed = str(tmp_path / "processed")
+    build_full(RAW_CSV, processed)
+    plan = duckdb.connect().execute(
+        "EXPLAIN ANALYZE SELECT count(*) FROM read_parquet(?, hive_partitioning = true) "
+        "WHERE Season = '2010/11'",
+        [dataset_files(processed)],
+    ).fetchall()[0][1]
+    assert "Total Files Read: 1" in plan
+    assert load_matches(processed)["Season"].value_counts()["2010/11"] == 380
+
+
+def test_incremental_build_falls_back_when_csv_rewritten(paths, raw_lines):
+    """Verifies that editing already-processed rows triggers a full rebuild rather than
+    silently keeping stale data."""
+    raw, processed = paths
+    build_full(raw, processed)
+    edited = raw_lines[:39] + [raw_lines[40], raw_lines[39]] + raw_lines[41:45]
+    with open(raw, "wb") as fh:
+        fh.write(b"".join(edited))
+
+    manifest = build_incremental(raw, processed)
+    assert manifest["files"] == ["epl_final/Season=2000%2F01/part-00002.parquet"]
+    assert manifest["raw_rows"] == 44
+    assert read_manifest(processed)["version"] == 2
+
+
+def test_manifest_metadata_tracks_incremental_builds(paths, raw_lines):
+    """Verifies that the manifest's team/season metadata, which the app starts from
+    instead of scanning the data, stays equal to the data after an incremental build."""
+    raw, processed = paths
+    build_full(raw, processed)
+    with open(raw, "ab") as fh:
+        fh.write(b"".join(raw_lines[41:]))
+    manifest = build_incremental(raw, processed)
+
+    assert manifest["metadata"] == matches_metadata(load_matches(processed))
+    assert "Arsenal" in manifest["metadata"]["team_seasons"]
+    assert manifest["metadata"]["seasons"] == ["2000/01"]
+
+
+def test_dataset_metadata_without_manifest_entry(paths):
+    """Verifies that datasets built before the metadata existed get the same metadata
+    from aggregate queries."""
+    raw, processed = paths
+    manifest = build_full(raw, processed)
+    expected = manifest.pop("metadata")
+    with open(os.path.join(processed, "manifest.json"), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh)
+    assert dataset_metadata(processed) == expected
+
+
+def test_arrow_file_is_mapped_without_copies(paths):
+    """Verifies that the build's Arrow IPC file holds the same matches as the parquet dataset
+    and that mapping it into pandas allocates nothing, so worker processes share its pages."""
+    raw, processed = paths
+    manifest = build_full(raw, processed)
+    assert manifest["arrow"] == ["epl_final-00001.arrow"]
+
+    allocated = pa.total_allocated_bytes()
+    df = arrow_matches(open_matches_arrow(processed))
+    assert pa.total_allocated_bytes() == allocated
+    assert not df["FullTimeHomeGoals"].to_numpy().flags.writeable
+    pd.testing.assert_frame_equal(df, load_matches(processed))
+
+
+def test_incremental_build_adds_arrow_fragment(paths, raw_lines):
+    """Verifies that an incremental build writes only the new matches as an Arrow fragment,
+    listed after the earlier ones, so a refresh costs the size of the delta, and that a full
+    build folds the fragments back into one file."""
+    raw, processed = paths
+    build_full(raw, processed)
+    with open(raw, "ab") as fh:
+        fh.write(b"".join(raw_lines[41:]))
+    manifest = build_incremental(raw, processed)
+
+    assert manifest["arrow"] == ["epl_final-00001.arrow", "epl_final-00002.arrow"]
+    delta = pa.ipc.open_file(pa.memory_map(os.path.join(processed, "epl_final-00002.arrow"))).read_all()
+    assert delta.num_rows == 20
+    by = ["MatchDate", "HomeTeam"]
+    pd.testing.assert_frame_equal(
+        arrow_matches(open_matches_arrow(processed)).sort_values(by, ignore_index=True),
+        load_matches(processed).sort_values(by, ignore_index=True),
+        check_categorical=False,
+    )
+
+    assert build_full(raw, processed)["arrow"] == ["epl_final-00003.arrow"]
+    assert open_matches_arrow(processed).num_rows == 60
+
+
+def test_full_build_keeps_files_of_running_app(paths):
+    """Verifies that a full build leaves the files the previous manifest lists in place, so a
+    worker still querying them keeps working until it reloads, and removes them on the build
+    after that."""
+    raw, processed = paths
+    build_full(raw, processed)
+    old_files = dataset_files(processed)
+    view = duckdb.read_parquet(old_files, hive_partitioning=True)
+
+    build_full(raw, processed)
+    assert len(view.df()) == 40
+    assert read_manifest(processed)["files"] == ["epl_final/Season=2000%2F01/part-00002.parquet"]
+
+    build_full(raw, processed)
+    assert not any(os.path.exists(f) for f in old_files)
+    assert len(load_matches(processed)) == 40
+
+
+def test_open_matches_arrow_without_manifest_entry(paths):
+    """Verifies that a dataset built before the Arrow file existed opens as None, so the app
+    falls back to querying the parquet files."""
+    raw, processed = paths
+    manifest = build_full(raw, processed)
+    del manifest["arrow"]
+    with open(os.path.join(processed, "manifest.json"), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh)
+    assert open_matches_arrow(processed) is None
+
+
+def test_changed_seasons_between_builds(paths, raw_lines, tmp_path):
+    """Verifies that the seasons an incremental build touched are found from the file lists, so
+    open sessions refresh only what a reload changed, and that a full build touches every season."""
+    raw, processed = paths
+    build_full(raw, processed)
+    before = dataset_files(processed)
+    with open(raw, "ab") as fh:
+        fh.write(b"".join(raw_lines[41:]))
+    build_incremental(raw, processed)
+    assert changed_seasons(before, dataset_files(processed)) == {"2000/01"}
+    assert changed_seasons(before, before) == set()
+
+    full = str(tmp_path / "full")
+    build_full(RAW_CSV, full)
+    assert len(changed_seasons([], dataset_files(full))) == 25
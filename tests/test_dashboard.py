@@ -0,0 +1,111 @@
+"""
+Unit tests and a latency benchmark for the dashboard snapshot in src/dashboard.py.
+Run with: pytest tests/test_dashboard.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import statistics
+import time
+
+import ibis
+import numpy as np
+import pandas as pd
+import pytest
+from dashboard import SNAPSHOT_TARGET_MS, build_snapshot, season_kpis, venue_summary
+from utils import (
+    EMPTY_METRICS, compact_dtypes, get_team_matches, metrics_cube_from_totals, metrics_totals_ibis,
+)
+
+TEAMS = [f"Team {t:02d}" for t in range(20)]
+SEASONS = [f"{2000 + s}/{(2001 + s) % 100:02d}" for s in range(25)]
+
+
+# ── Fixtures ───────────────────────────────────────────────────────────────────
+
+@pytest.fixture(scope="module")
+def league():
+    """25 seasons of a 20-team double round-robin, in the processed schema."""
+    rng = np.random.default_rng(0)
+    rows = []
+    for s, season in enumerate(SEASONS):
+        start = pd.Timestamp(f"{2000 + s}-08-10")
+        for i, home in enumerate(TEAMS):
+            for j, away in enumerate(TEAMS):
+                if i != j:
+                    rows.append((season, start + pd.Timedelta(days=(i * 7 + j * 3) % 280), home, away))
+    df = pd.DataFrame(rows, columns=["Season", "MatchDate", "HomeTeam", "AwayTeam"])
+    df["FullTimeHomeGoals"] = rng.poisson(1.5, len(df))
+    df["FullTimeAwayGoals"] = rng.poisson(1.1, len(df))
+    df["FullTimeResult"] = np.select(
+        [df["FullTimeHomeGoals"] > df["FullTimeAwayGoals"], df["FullTimeHomeGoals"] < df["FullTimeAwayGoals"]],
+        ["H", "A"], "D",
+    )
+    return compact_dtypes(df.sort_values("MatchDate", kind="stable").reset_index(drop=True), TEAMS, SEASONS)
+
+
+@pytest.fixture(scope="module")
+def cube(league):
+    return metrics_cube_from_totals(metrics_totals_ibis(ibis.memtable(league)).execute())
+
+
+# ── Tests ──────────────────────────────────────────────────────────────────────
+
+def test_venue_summary_matches_per_venue_masks(league):
+    """Verifies that the np.bincount venue summary equals masking the team table per venue,
+    as the Home/Away charts computed it before."""
+    matches = get_team_matches(league[league["Season"] == SEASONS[3]], TEAMS[5])
+    summary = venue_summary(matches)
+    for venue in ["Home", "Away"]:
+        sub = matches[matches["venue"] == venue]
+        assert summary[venue]["n"] == len(sub)
+        assert summary[venue]["win_rate"] == pytest.approx(sub["win"].mean() * 100)
+        assert summary[venue]["avg_goals_against"] == pytest.approx(sub["goals_against"].mean())
+    assert venue_summary(matches.iloc[0:0])["Away"] == dict(win_rate=0, avg_goals_for=0, avg_goals_against=0, n=0)
+
+
+def test_season_kpis_compare_with_previous_season(cube):
+    """Verifies that the KPI cards get this season's and the previous season's metrics, and
+    empty metrics before the first season."""
+    kpis = season_kpis(cube, TEAMS[0], SEASONS[4], SEASONS)
+    assert kpis["current"] == cube[(TEAMS[0], SEASONS[4], "All")]
+    assert kpis["previous"] == cube[(TEAMS[0], SEASONS[3], "All")]
+    assert season_kpis(cube, TEAMS[0], SEASONS[0], SEASONS)["previous"] == EMPTY_METRICS
+    assert season_kpis(cube, "Unknown FC", SEASONS[4], SEASONS)["current"] == EMPTY_METRICS
+
+
+def test_snapshot_has_every_dashboard_output(league, cube):
+    """Verifies that one snapshot carries the KPIs, both summaries and the table, with periods
+    assigned once and shared by the period summary and the table."""
+    matches = get_team_matches(league[league["Season"] == SEASONS[0]], TEAMS[1])
+    snap = build_snapshot(matches, cube, TEAMS[1], SEASONS[0], SEASONS)
+    assert snap["n"] == 38
+    assert sum(p["n"] for p in snap["period"].values()) == 38
+    assert snap["table"]["Period"].value_counts(sort=False).tolist() == [p["n"] for p in snap["period"].values()]
+    assert snap["home_away"]["Home"]["n"] == snap["home_away"]["Away"]["n"] == 19
+    assert list(snap["table"].columns)[:3] == ["Date", "Home", "Away"]
+
+    empty = build_snapshot(matches.iloc[0:0], cube, TEAMS[1], SEASONS[0], SEASONS)
+    assert empty["n"] == 0 and empty["table"].empty
+
+
+def test_snapshot_latency_within_target(league, cube):
+    """Benchmarks one filter change end to end (DuckDB query, team-perspective columns and the
+    snapshot) over every team of a season, and checks the median against SNAPSHOT_TARGET_MS."""
+    con = ibis.duckdb.connect()
+    tbl = con.create_view("epl_matches", ibis.memtable(league), overwrite=True)
+
+    def snapshot(team, season):
+        expr = tbl.filter((tbl.HomeTeam == team) | (tbl.AwayTeam == team)).filter(tbl.Season == season)
+        matches = get_team_matches(compact_dtypes(expr.execute(), TEAMS, SEASONS), team)
+        return build_snapshot(matches, cube, team, season, SEASONS)
+
+    snapshot(TEAMS[0], SEASONS[-1])
+    timings = []
+    for team in TEAMS:
+        start = time.perf_counter()
+        snapshot(team, SEASONS[-1])
+        timings.append((time.perf_counter() - start) * 1000)
+    assert statistics.median(timings) < SNAPSHOT_TARGET_MS
@@ -0,0 +1,101 @@
+"""
+Unit tests for the dataset hot reload in src/dataset.py.
+Run with: pytest tests/test_dataset.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import threading
+import time
+
+import pytest
+from dataset import DatasetManager
+
+
+# ── Fixtures ───────────────────────────────────────────────────────────────────
+
+class Build:
+    """Stands in for the build manifest and load_dataset(): a version and a dataset built from it."""
+
+    def __init__(self):
+        self.version = 1
+        self.loads = 0
+        self.fail = False
+        self.delay = 0.0
+
+    def load(self) -> dict:
+        version = self.version
+        time.sleep(self.delay)
+        if self.fail:
+            raise OSError("manifest lists a missing file")
+        self.loads += 1
+        return dict(version=version)
+
+
+@pytest.fixture
+def build():
+    return Build()
+
+
+# ── Tests ──────────────────────────────────────────────────────────────────────
+
+def test_check_swaps_in_new_version(build):
+    """Verifies that a new build version is loaded and swapped in, and that an unchanged version
+    is not loaded again."""
+    manager = DatasetManager(build.load, lambda: build.version, interval=0)
+    assert manager.current == dict(version=1)
+    assert manager.check() is False
+    assert build.loads == 1
+
+    build.version = 2
+    assert manager.check() is True
+    assert manager.current == dict(version=2)
+    assert manager.version == 2
+    assert manager.stats()["reloads"] == 1
+
+
+def test_failed_load_keeps_current_dataset(build):
+    """Verifies that a build that cannot be loaded leaves the app on the previous dataset and is
+    retried on the next check."""
+    manager = DatasetManager(build.load, lambda: build.version, interval=0)
+    build.version, build.fail = 2, True
+    assert manager.check() is False
+    assert manager.current == dict(version=1)
+    assert manager.version == 1
+    assert manager.stats()["failures"] == 1
+
+    build.fail = False
+    assert manager.check() is True
+    assert manager.current == dict(version=2)
+
+
+def test_requests_keep_old_dataset_while_new_one_loads(build):
+    """Verifies that the new dataset is loaded off the request path: readers see the old dataset
+    until the swap, then the new one, and a new version is never paired with old data."""
+    manager = DatasetManager(build.load, lambda: build.version, interval=0)
+    build.version, build.delay = 2, 0.2
+    reloading = threading.Thread(target=manager.check)
+    reloading.start()
+
+    seen = set()
+    while reloading.is_alive():
+        version = manager.version
+        seen.add((version, manager.current["version"]))
+    reloading.join()
+    assert (1, 1) in seen
+    assert all(data >= version for version, data in seen)
+    assert manager.current == dict(version=2)
+
+
+def test_background_thread_picks_up_new_version(build):
+    """Verifies that the watcher thread reloads a new build without any request asking for it."""
+    manager = DatasetManager(build.load, lambda: build.version, interval=0.01)
+    build.version = 2
+    deadline = time.monotonic() + 5
+    while manager.version != 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    manager.close()
+    assert manager.current == dict(version=2)
+    assert not manager._thread.is_alive()
@@ -0,0 +1,97 @@
+"""
+Unit tests for the DuckDB cursor pool in src/db.py.
+Run with: pytest tests/test_db.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import ibis
+import pandas as pd
+import pytest
+from db import CursorPool, configure
+
+
+# ── Fixtures ───────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def con():
+    """An in-memory database with a persistent epl_matches table, as the app registers it."""
+    con = ibis.duckdb.connect()
+    con.con.from_df(pd.DataFrame({
+        "HomeTeam": ["Arsenal", "Chelsea", "Everton"] * 100,
+        "FullTimeHomeGoals": list(range(300)),
+    })).create("epl_matches")
+    return con
+
+
+# ── Tests ──────────────────────────────────────────────────────────────────────
+
+def test_configure_sets_threads_and_memory_limit(con):
+    """Verifies that the DuckDB thread count and memory limit apply to the database."""
+    configure(con, threads=3, memory_limit="512MB")
+    settings = con.raw_sql("SELECT current_setting('threads'), current_setting('memory_limit')").fetchone()
+    assert settings[0] == 3
+    assert settings[1].replace(" ", "") in ("512.0MiB", "488.2MiB", "512MB")
+
+
+def test_concurrent_queries_each_use_their_own_cursor(con):
+    """Verifies that many threads can query at once through a small pool, which a single shared
+    connection cannot do, and that waiting for a free cursor is counted."""
+    pool = CursorPool(con, size=2)
+    barrier = threading.Barrier(4)
+
+    def task(team):
+        barrier.wait()
+        with pool.checkout():
+            t = pool.table("epl_matches")
+            return int(t.filter(t.HomeTeam == team).FullTimeHomeGoals.sum().execute())
+
+    with ThreadPoolExecutor(4) as ex:
+        totals = list(ex.map(task, ["Arsenal", "Chelsea", "Everton", "Arsenal"] * 10))
+
+    assert totals[:3] == [sum(range(0, 300, 3)), sum(range(1, 300, 3)), sum(range(2, 300, 3))]
+    stats = pool.stats()
+    assert stats["checkouts"] == 40
+    assert stats["in_use"] == 0
+    assert stats["waits"] > 0 and stats["max_wait"] > 0
+
+
+def test_nested_checkout_reuses_the_thread_cursor(con):
+    """Verifies that code that checks out a cursor inside another checkout on the same thread
+    gets the same cursor instead of waiting on itself."""
+    pool = CursorPool(con, size=1)
+    with pool.checkout() as outer:
+        with pool.checkout() as inner:
+            assert inner is outer
+    assert pool.current() is None
+    assert pool.stats()["checkouts"] == 1
+
+
+def test_checkout_times_out_when_pool_is_exhausted(con):
+    """Verifies that a bounded wait gives up instead of blocking forever, and that table()
+    needs a checked-out cursor."""
+    pool = CursorPool(con, size=1)
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with pool.checkout():
+            held.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait(5)
+    with pytest.raises(queue.Empty):
+        with pool.checkout(timeout=0.05):
+            pass
+    release.set()
+    holder.join()
+    with pytest.raises(RuntimeError):
+        pool.table("epl_matches")
@@ -0,0 +1,95 @@
+"""
+Unit tests for the chunked download exports in src/export.py.
+Run with: pytest tests/test_export.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import gzip
+import io
+
+import pandas as pd
+import pytest
+from export import export_filename, stream_export
+from utils import compact_dtypes
+
+
+# ── Fixtures ───────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def matches():
+    """1,000 compact-dtype matches, enough for several export chunks."""
+    n = 1_000
+    return compact_dtypes(pd.DataFrame({
+        "Season":            ["2022-23", "2023-24"] * (n // 2),
+        "MatchDate":         pd.date_range("2022-08-01", periods=n, freq="D"),
+        "HomeTeam":          ["Arsenal", "Chelsea"] * (n // 2),
+        "AwayTeam":          ["Chelsea", "Arsenal"] * (n // 2),
+        "FullTimeHomeGoals": [2, 0] * (n // 2),
+        "FullTimeAwayGoals": [1, 0] * (n // 2),
+        "FullTimeResult":    ["H", "D"] * (n // 2),
+    }))
+
+
+# ── Tests ──────────────────────────────────────────────────────────────────────
+
+def test_csv_export_matches_to_csv_in_chunks(matches):
+    """Verifies that the streamed CSV is byte-for-byte the old single-string download,
+    sent as one piece per chunk of rows."""
+    chunks = list(stream_export(matches, "csv", chunk_rows=100))
+    assert len(chunks) == 10
+    assert b"".join(chunks) == matches.to_csv(index=False).encode("utf-8")
+
+
+def test_gzip_csv_export_decompresses_to_csv(matches):
+    """Verifies that the gzip option is a valid gzip stream of the same CSV."""
+    data = b"".join(stream_export(matches, "csv.gz", chunk_rows=100))
+    assert gzip.decompress(data) == matches.to_csv(index=False).encode("utf-8")
+
+
+def test_parquet_export_round_trips(matches):
+    """Verifies that the parquet option writes one row group per chunk and reads back
+    with the same values and categorical dtypes."""
+    import pyarrow.parquet as pq
+
+    data = b"".join(stream_export(matches, "parquet", chunk_rows=300))
+    assert pq.ParquetFile(io.BytesIO(data)).num_row_groups == 4
+    back = pd.read_parquet(io.BytesIO(data))
+    pd.testing.assert_frame_equal(back, matches, check_dtype=False, check_categorical=False)
+    assert isinstance(back["HomeTeam"].dtype, pd.CategoricalDtype)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "csv.gz", "parquet"])
+def test_empty_frame_exports_header_only(matches, fmt):
+    """Verifies that an empty result still downloads a readable file with its columns."""
+    data = b"".join(stream_export(matches.iloc[0:0], fmt))
+    if fmt == "parquet":
+        back = pd.read_parquet(io.BytesIO(data))
+    else:
+        back = pd.read_csv(io.BytesIO(data), compression="gzip" if fmt == "csv.gz" else None)
+    assert list(back.columns) == list(matches.columns)
+    assert back.empty
+
+
+@pytest.mark.parametrize("fmt", ["csv", "csv.gz", "parquet"])
+def test_export_of_chunk_iterable_matches_frame_export(matches, fmt):
+    """Verifies that exporting a result given as an iterable of chunks, as a streamed query
+    yields them, produces the same file as exporting the whole frame."""
+    chunks = (matches.iloc[i:i + 300] for i in range(0, len(matches), 300))
+    streamed = b"".join(stream_export(chunks, fmt))
+    whole = b"".join(stream_export(matches, fmt))
+    if fmt == "parquet":
+        pd.testing.assert_frame_equal(pd.read_parquet(io.BytesIO(streamed)), pd.read_parquet(io.BytesIO(whole)))
+    elif fmt == "csv.gz":
+        assert gzip.decompress(streamed) == gzip.decompress(whole)
+    else:
+        assert streamed == whole
+
+
+def test_unknown_format_and_filenames():
+    """Verifies that filenames follow the chosen format and unknown formats are rejected."""
+    assert export_filename("epl_matches_filtered", "csv.gz") == "epl_matches_filtered.csv.gz"
+    with pytest.raises(ValueError):
+        stream_export(pd.DataFrame(), "xlsx")
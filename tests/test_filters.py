@@ -0,0 +1,99 @@
+"""
+Unit tests for the coalesced dashboard filters in src/filters.py.
+Run with: pytest tests/test_filters.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import asyncio
+
+import pytest
+from shiny import reactive
+from filters import coalesced_filters, resolve_filters, set_filters
+
+
+SEASONS = {
+    "Arsenal":   ["2021-22", "2022-23", "2023-24"],
+    "Burnley":   ["2021-22", "2023-24"],
+    "Brentford": ["2021-22", "2022-23"],
+}
+DEFAULTS = ("Arsenal", "2023-24", "All")
+
+
+# ── Fixtures ───────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def session():
+    """Three filter inputs, the coalesced filters over them, and a dashboard recompute counter."""
+    inputs = {name: reactive.value(value) for name, value in zip(("team", "season", "result"), DEFAULTS)}
+    filters = coalesced_filters(inputs["team"], inputs["season"], inputs["result"], SEASONS.get, DEFAULTS)
+    runs = []
+
+    @reactive.effect
+    def _recompute():
+        runs.append(filters())
+
+    flush()
+    runs.clear()
+    yield inputs, filters, runs
+    _recompute.destroy()
+
+
+def flush():
+    asyncio.run(reactive.flush())
+
+
+# ── Tests ──────────────────────────────────────────────────────────────────────
+
+def test_resolve_filters_moves_season_to_teams_latest():
+    """Verifies that a season the team did not play becomes the team's latest season."""
+    assert resolve_filters("Burnley", "2022-23", "Win", SEASONS.get) == ("Burnley", "2023-24", "Win")
+    assert resolve_filters("Burnley", "2021-22", "All", SEASONS.get) == ("Burnley", "2021-22", "All")
+
+
+def test_team_change_with_season_correction_recomputes_once(session):
+    """Verifies that picking a team that did not play the selected season, then the browser echoing
+    the corrected season select back, recomputes the dashboard once rather than twice."""
+    inputs, _, runs = session
+    inputs["team"].set("Brentford")
+    flush()
+    inputs["season"].set("2022-23")
+    flush()
+    assert runs == [("Brentford", "2022-23", "All")]
+
+
+def test_single_input_change_recomputes_once(session):
+    """Verifies that changing one filter recomputes once and an unchanged value never does."""
+    inputs, _, runs = session
+    inputs["result"].set("Win")
+    flush()
+    inputs["result"].set("Win")
+    flush()
+    assert runs == [("Arsenal", "2023-24", "Win")]
+
+
+def test_reset_recomputes_once(session):
+    """Verifies that the reset button's state change and the three select updates echoed back
+    afterwards (the browser sends them as one input batch) add up to one recompute."""
+    inputs, filters, runs = session
+    for name, value in zip(("team", "season", "result"), ("Burnley", "2021-22", "Loss")):
+        inputs[name].set(value)
+    flush()
+    runs.clear()
+
+    set_filters(filters, DEFAULTS)
+    flush()
+    for name, value in zip(("team", "season", "result"), DEFAULTS):
+        inputs[name].set(value)
+    flush()
+    assert runs == [DEFAULTS]
+
+
+def test_set_filters_skips_equal_tuple(session):
+    """Verifies that setting an equal (but not identical) tuple does not invalidate readers."""
+    _, filters, runs = session
+    assert set_filters(filters, tuple(list(DEFAULTS))) is False
+    flush()
+    assert runs == []
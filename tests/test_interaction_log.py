@@ -0,0 +1,326 @@
+"""
+Unit tests for the background interaction logger in src/interaction_log.py.
+Run with: pytest tests/test_interaction_log.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import time
+
+import pandas as pd
+import pytest
+from interaction_log import InteractionLogger, CsvSink, RecentRows, SegmentedLog, sheet_tail, tail_csv
+
+
+# ── Stub sinks ─────────────────────────────────────────────────────────────────
+
+class ListSink:
+    """Stands in for SheetsSink: records each batch it is asked to write."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.batches = []
+        self.delay = delay
+        self.fail = fail
+
+    def write_rows(self, rows):
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("Sheets API unavailable")
+        self.batches.append(list(rows))
+
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+
+class FakeWorksheet:
+    """Stands in for a gspread worksheet: a header, data rows and blank grid rows after them."""
+
+    def __init__(self, rows: int, blank: int):
+        self.values = [["timestamp", "query", "response", "sql"]] + [make_row(i % 60) for i in range(rows)]
+        self.row_count = len(self.values) + blank
+        self.cells_read = 0
+
+    def get_values(self, a1: str) -> list:
+        first, last = (int(ref[1:]) for ref in a1.split(":"))
+        rows = [list(r) for r in self.values[first - 1:last]]
+        self.cells_read += (last - first + 1) * 4
+        return rows
+
+
+def make_row(i: int) -> list:
+    return [f"2026-01-01T00:00:{i:02d}", f"query {i}", "returned 10 rows", f"SELECT * FROM epl_matches LIMIT {i}"]
+
+
+# ── Tests ──────────────────────────────────────────────────────────────────────
+
+def test_rows_are_written_in_batches():
+    """Verifies that queued rows reach the sink in size-limited batches rather than one
+    Sheets call per interaction."""
+    sink = ListSink()
+    logger = InteractionLogger(sink, batch_size=4, flush_interval=60)
+    for i in range(10):
+        logger.log(make_row(i))
+    assert logger.flush(timeout=5)
+    assert sink.rows == [make_row(i) for i in range(10)]
+    assert [len(b) for b in sink.batches][:2] == [4, 4]
+    logger.close()
+
+
+def test_partial_batch_is_written_after_flush_interval():
+    """Verifies that a single interaction is not held back waiting for a full batch."""
+    sink = ListSink()
+    logger = InteractionLogger(sink, batch_size=100, flush_interval=0.05)
+    logger.log(make_row(1))
+    deadline = time.monotonic() + 5
+    while not sink.rows and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sink.rows == [make_row(1)]
+    logger.close()
+
+
+def test_slow_sink_does_not_block_logging():
+    """Verifies that log() returns immediately even while the sink is mid-write, so a
+    slow Sheets API no longer stalls the dashboard."""
+    sink = ListSink(delay=0.5)
+    logger = InteractionLogger(sink, batch_size=1, flush_interval=0)
+    start = time.perf_counter()
+    for i in range(20):
+        logger.log(make_row(i))
+    assert time.perf_counter() - start < 0.1
+    logger.close(timeout=0)
+
+
+@pytest.mark.parametrize("drop, kept", [("oldest", [2, 3, 4]), ("newest", [0, 1, 2])])
+def test_full_queue_applies_drop_policy(drop, kept):
+    """Verifies that a full queue drops rows by the configured policy and counts them,
+    keeping memory bounded during a Sheets outage."""
+    sink = ListSink()
+    logger = InteractionLogger(sink, max_queue=3, batch_size=10, flush_interval=60, drop=drop)
+    for i in range(5):
+        logger.log(make_row(i))
+    assert logger.stats()["dropped"] == 2
+    logger.flush(timeout=5)
+    assert sink.rows == [make_row(i) for i in kept]
+    logger.close()
+
+
+def test_failed_batch_goes_to_fallback(tmp_path):
+    """Verifies that rows are written to the local CSV when the Sheets append fails,
+    as the synchronous logger did."""
+    path = tmp_path / "querychat_log.csv"
+    logger = InteractionLogger(ListSink(fail=True), fallback=CsvSink(path), flush_interval=60)
+    logger.log(make_row(1))
+    logger.log(make_row(2))
+    logger.close()
+
+    df = pd.read_csv(path)
+    assert list(df.columns) == ["timestamp", "query", "response", "sql"]
+    assert df["query"].tolist() == ["query 1", "query 2"]
+    assert logger.stats() == dict(queued=0, written=2, dropped=0, failed=0)
+
+
+def test_close_flushes_and_stops_writer():
+    """Verifies that shutdown writes every queued row before the writer thread exits."""
+    sink = ListSink()
+    logger = InteractionLogger(sink, batch_size=100, flush_interval=60)
+    for i in range(5):
+        logger.log(make_row(i))
+    logger.close()
+    assert len(sink.rows) == 5
+    assert not logger._thread.is_alive()
+    assert logger.log(make_row(6)) is False
+
+
+def test_tail_csv_matches_full_read(tmp_path):
+    """Verifies that reading backwards from the end returns the same last rows as parsing the
+    whole file, across block boundaries and with quoted commas and line breaks."""
+    path = tmp_path / "querychat_log.csv"
+    rows = [make_row(i % 60) for i in range(2_000)]
+    rows[-3][1] = "teams, seasons and \"quotes\"\nover two lines"
+    CsvSink(path).write_rows(rows)
+
+    assert tail_csv(path, 50, block_size=256) == rows[-50:]
+    assert tail_csv(path, 5_000, block_size=256) == rows
+    assert tail_csv(path, 0) == []
+
+
+def test_tail_csv_reads_rows_without_sql_column(tmp_path):
+    """Verifies that a log written before the sql column existed still reads back, with an
+    empty sql value."""
+    path = tmp_path / "querychat_log.csv"
+    path.write_text("timestamp,query,response\n2026-01-01T00:00:01,query 1,returned 10 rows\n")
+    assert tail_csv(path, 5) == [["2026-01-01T00:00:01", "query 1", "returned 10 rows", ""]]
+
+
+def test_recent_rows_seeded_once_then_fed_by_writer():
+    """Verifies that the Sheets ring buffer reads the sheet tail once and then picks up rows
+    from the logger's on_write callback."""
+    seeds = []
+    recent = RecentRows(lambda: seeds.append(1) or [make_row(i) for i in range(4)], capacity=3)
+    logger = InteractionLogger(ListSink(), flush_interval=60, on_write=recent.extend)
+    assert recent.recent()["Query"].tolist() == ["query 3", "query 2", "query 1"]
+
+    logger.log(make_row(9))
+    logger.close()
+    assert recent.recent()["Query"].tolist() == ["query 9", "query 3", "query 2"]
+    assert seeds == [1]
+
+
+def test_recent_rows_reseed_after_ttl():
+    """Verifies that with a ttl the Sheets ring buffer re-reads the sheet tail once it expires,
+    so rows written by other workers show up, and that a failed re-read keeps the rows it had."""
+    sheet = [make_row(i) for i in range(4)]
+
+    def read_tail():
+        if sheet is None:
+            raise ConnectionError("Sheets API unavailable")
+        return list(sheet)
+
+    recent = RecentRows(read_tail, capacity=3, ttl=0.05)
+    assert recent.recent()["Query"].tolist() == ["query 3", "query 2", "query 1"]
+
+    sheet.append(make_row(7))
+    recent.extend([make_row(8)])
+    sheet.append(make_row(8))
+    assert recent.recent()["Query"].tolist() == ["query 8", "query 3", "query 2"]
+    time.sleep(0.06)
+    assert recent.recent()["Query"].tolist() == ["query 8", "query 7", "query 3"]
+
+    sheet = None
+    time.sleep(0.06)
+    assert recent.recent()["Query"].tolist() == ["query 8", "query 7", "query 3"]
+
+
+@pytest.mark.parametrize("rows,blank", [(100_000, 0), (100_000, 900), (30, 970), (0, 999)])
+def test_sheet_tail_reads_a_bounded_range(rows, blank):
+    """Verifies that the Sheets seed finds the last rows without downloading a whole column,
+    including when the grid has blank rows after the data or holds fewer rows than asked for."""
+    sheet = FakeWorksheet(rows, blank)
+    tail = sheet_tail(sheet, 50)
+    assert tail == sheet.values[1:][-50:]
+    assert sheet.cells_read <= 4 * 4 * (50 + blank)
+
+
+def day_row(day: str, i: int) -> list:
+    return [f"{day}T12:00:{i:02d}", f"query {day} {i}", "returned 10 rows"]
+
+
+def test_segments_roll_over_by_day_and_compact_to_parquet(tmp_path):
+    """Verifies that a new day starts a new segment and the closed one is stored as zstd
+    parquet, with every row still readable."""
+    import pyarrow.parquet as pq
+
+    log = SegmentedLog(tmp_path, writer="w")
+    log.write_rows([day_row("2026-01-01", 0), day_row("2026-01-01", 1)])
+    log.write_rows([day_row("2026-01-01", 2), day_row("2026-01-02", 0)])
+
+    assert [p.name for p in log.segments()] == ["2026-01-01_0000_w.parquet", "2026-01-02_0000_w.csv"]
+    meta = pq.ParquetFile(tmp_path / "2026-01-01_0000_w.parquet").metadata
+    assert meta.row_group(0).column(0).compression == "ZSTD"
+    assert log.read()["query"].tolist() == [
+        "query 2026-01-01 0", "query 2026-01-01 1", "query 2026-01-01 2", "query 2026-01-02 0",
+    ]
+
+
+def test_segments_roll_over_by_size(tmp_path):
+    """Verifies that a segment is closed once it reaches max_bytes, even within one day."""
+    log = SegmentedLog(tmp_path, max_bytes=1, writer="w")
+    for i in range(3):
+        log.write_rows([day_row("2026-01-01", i)])
+    assert [p.name for p in log.segments()] == [
+        "2026-01-01_0000_w.parquet", "2026-01-01_0001_w.parquet", "2026-01-01_0002_w.csv",
+    ]
+    assert len(log.read()) == 3
+
+
+def test_time_range_read_opens_only_matching_days(tmp_path, monkeypatch):
+    """Verifies that a time-range read only opens the segments for days in the range."""
+    log = SegmentedLog(tmp_path, writer="w")
+    for day in ["2026-01-01", "2026-01-02", "2026-01-03", "2026-01-04"]:
+        log.write_rows([day_row(day, 0), day_row(day, 1)])
+
+    opened = []
+    real_read = SegmentedLog._read_segment
+    monkeypatch.setattr(SegmentedLog, "_read_segment", staticmethod(lambda p: opened.append(p.name) or real_read(p)))
+
+    df = log.read("2026-01-02", "2026-01-03T12:00:01")
+    assert df["query"].tolist() == ["query 2026-01-02 0", "query 2026-01-02 1", "query 2026-01-03 0"]
+    assert opened == ["2026-01-02_0000_w.parquet", "2026-01-03_0000_w.parquet"]
+
+
+def test_recent_rows_span_segments_and_import_legacy_csv(tmp_path):
+    """Verifies that an existing single-file CSV log is moved into day segments and that the
+    logs tab reads the newest rows across segment boundaries."""
+    legacy = tmp_path / "querychat_log.csv"
+    CsvSink(legacy).write_rows([day_row("2026-01-01", 0), day_row("2026-01-02", 0)])
+
+    log = SegmentedLog(tmp_path / "querychat", capacity=3, writer="w")
+    log.import_csv(legacy)
+    assert not legacy.exists()
+    log.write_rows([day_row("2026-01-03", 0)])
+
+    assert log.recent()["Query"].tolist() == [
+        "query 2026-01-03 0", "query 2026-01-02 0", "query 2026-01-01 0",
+    ]
+    assert len(log.read("2026-01-02")) == 2
+
+
+def test_leftover_csv_segment_is_compacted_on_open(tmp_path):
+    """Verifies that the active segment of a previous run is compacted when the log reopens."""
+    SegmentedLog(tmp_path, writer="w").write_rows([day_row("2026-01-01", 0)])
+    log = SegmentedLog(tmp_path, writer="w")
+    assert [p.name for p in log.segments()] == ["2026-01-01_0000_w.parquet"]
+    log.write_rows([day_row("2026-01-01", 1)])
+    assert [p.name for p in log.segments()][-1] == "2026-01-01_0001_w.csv"
+
+
+def test_workers_sharing_a_directory_keep_every_row(tmp_path):
+    """Verifies that two worker processes logging to the same directory each write their own
+    segments, so one opening the log or rolling over never compacts or overwrites the other's."""
+    a = SegmentedLog(tmp_path, max_bytes=1, writer="web1-100")
+    a.write_rows([day_row("2026-01-01", i) for i in range(3)])
+    b = SegmentedLog(tmp_path, max_bytes=1, writer="web2-200")
+    a.write_rows([day_row("2026-01-01", 3)])
+    b.write_rows([day_row("2026-01-01", 10), day_row("2026-01-01", 11)])
+    a.write_rows([day_row("2026-01-01", 4)])
+    b.write_rows([day_row("2026-01-01", 12)])
+
+    assert sorted(SegmentedLog(tmp_path, writer="web3-300").read()["query"]) == sorted(
+        [f"query 2026-01-01 {i}" for i in (0, 1, 2, 3, 4, 10, 11, 12)]
+    )
+    assert [p.name for p in a.segments() if p.suffix == ".csv"] == [
+        "2026-01-01_0001_web2-200.csv", "2026-01-01_0002_web1-100.csv",
+    ]
+    assert b.tail(2) == [day_row("2026-01-01", 11) + [""], day_row("2026-01-01", 12) + [""]]
+
+
+def test_orphaned_segment_of_dead_process_is_compacted(tmp_path):
+    """Verifies that a CSV segment left by a process on this host that is no longer running is
+    compacted when the log is opened, while a running process's segment is left alone."""
+    import subprocess
+
+    dead = subprocess.Popen(["true"])
+    dead.wait()
+    CsvSink(tmp_path / f"2026-01-01_0000_host-{dead.pid}.csv").write_rows([day_row("2026-01-01", 0)])
+    CsvSink(tmp_path / f"2026-01-01_0000_host-{os.getpid()}.csv").write_rows([day_row("2026-01-01", 1)])
+
+    log = SegmentedLog(tmp_path, writer="host-1")
+    assert {p.name for p in log.segments()} == {
+        f"2026-01-01_0000_host-{os.getpid()}.csv", f"2026-01-01_0000_host-{dead.pid}.parquet",
+    }
+    assert len(log.read()) == 2
+
+
+def test_legacy_csv_is_imported_by_one_worker(tmp_path):
+    """Verifies that when every worker tries to import the old single-file log at startup, only
+    the first one to claim it does, so no row is imported twice."""
+    legacy = tmp_path / "querychat_log.csv"
+    CsvSink(legacy).write_rows([day_row("2026-01-01", 0), day_row("2026-01-02", 0)])
+    a = SegmentedLog(tmp_path / "querychat", writer="web1-100")
+    b = SegmentedLog(tmp_path / "querychat", writer="web2-200")
+    assert a.import_csv(legacy) is True
+    assert b.import_csv(legacy) is False
+    assert len(b.read()) == 2
@@ -0,0 +1,73 @@
+"""
+Unit tests for server-side grid paging in src/paging.py.
+Run with: pytest tests/test_paging.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pandas as pd
+from paging import page_count, page_slice, view_positions
+
+
+def make_frame(n: int = 120) -> pd.DataFrame:
+    return pd.DataFrame({
+        "Date": pd.date_range("2024-08-01", periods=n, freq="D"),
+        "Home": pd.Categorical([["Arsenal", "Chelsea", "Everton"][i % 3] for i in range(n)],
+                               categories=["Everton", "Chelsea", "Arsenal"]),
+        "HG": [i % 5 for i in range(n)],
+    })
+
+
+# ── Tests ──────────────────────────────────────────────────────────────────────
+
+def test_pages_cover_the_result_in_order():
+    """Verifies that consecutive pages return every row exactly once, with the last page
+    partial and out-of-range pages clamped to the nearest page."""
+    df = make_frame()
+    positions = view_positions(df)
+    assert page_count(len(df), 50) == 3
+    pages = [page_slice(df, positions, p, page_size=50) for p in range(3)]
+    assert [len(p) for p in pages] == [50, 50, 20]
+    assert pd.concat(pages)["HG"].tolist() == df["HG"].tolist()
+    assert page_slice(df, positions, 99, page_size=50).equals(pages[-1])
+    assert page_count(0) == 1 and page_slice(df.iloc[0:0], view_positions(df.iloc[0:0]), 0).empty
+
+
+def test_sort_orders_the_whole_result_not_the_page():
+    """Verifies that sorting applies to every row before paging, with the first sort taking
+    precedence and unordered categoricals sorted by name."""
+    df = make_frame()
+    positions = view_positions(df, sort=[{"col": 2, "desc": True}, {"col": 1, "desc": False}])
+    first = page_slice(df, positions, 0, page_size=24)
+    assert (first["HG"] == 4).all()
+    assert first["Home"].astype(str).tolist() == sorted(first["Home"].astype(str))
+    expected = df.sort_values("Date", ascending=False)["Date"].dt.strftime("%Y-%m-%d").tolist()[:10]
+    assert page_slice(df, view_positions(df, sort=[{"col": 0, "desc": True}]), 0, page_size=10)["Date"].tolist() == expected
+
+
+def test_filters_match_substrings_and_ranges():
+    """Verifies that text filters match case-insensitively and numeric filters keep a range."""
+    df = make_frame()
+    positions = view_positions(df, filters=[{"col": 1, "value": "CHEL"}, {"col": 2, "value": (3, None)}])
+    rows = df.iloc[positions]
+    assert set(rows["Home"]) == {"Chelsea"}
+    assert rows["HG"].min() >= 3
+    assert len(rows) == ((df["Home"] == "Chelsea") & (df["HG"] >= 3)).sum()
+
+
+def test_dates_are_formatted_for_the_page_only():
+    """Verifies that datetime columns come back as date strings on the page while the stored
+    result keeps its datetime dtype."""
+    df = make_frame()
+    page = page_slice(df, view_positions(df), 1, page_size=10)
+    assert page["Date"].tolist()[:2] == ["2024-08-11", "2024-08-12"]
+    assert pd.api.types.is_datetime64_any_dtype(df["Date"])
+
+
+def test_stale_grid_state_for_missing_columns_is_ignored():
+    """Verifies that a sort or filter on a column the new result no longer has is skipped."""
+    df = make_frame()[["Date"]]
+    positions = view_positions(df, sort=[{"col": 2, "desc": True}], filters=[{"col": 1, "value": "x"}])
+    assert positions.tolist() == list(range(len(df)))
@@ -0,0 +1,136 @@
+"""
+Unit tests for the matplotlib chart templates in src/plotting.py.
+Run with: pytest tests/test_plotting.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import io
+
+import matplotlib.pyplot as plt
+import pandas as pd
+import pytest
+from plotting import (
+    goals_home_away_figure,
+    winrate_figure,
+    goals_by_period_figure,
+    result_counts_figure,
+    empty_ai_figure,
+)
+
+resource = pytest.importorskip("resource")
+
+# Charts rendered by the memory test in a normal run. The long soak (10,000 charts, several
+# minutes) runs only when EPL_SOAK_RENDERS is set, e.g. EPL_SOAK_RENDERS=10000 pytest tests/test_plotting.py
+QUICK_RENDERS = 300
+SOAK_RENDERS = int(os.environ.get("EPL_SOAK_RENDERS", 0))
+
+
+# ── Helpers ────────────────────────────────────────────────────────────────────
+
+def make_summary(i: int) -> dict:
+    """A summary_home_away()-shaped dict whose values vary with i."""
+    return {
+        venue: {
+            "n": 19,
+            "win_rate": (i * 7 + offset) % 101,
+            "avg_goals_for": (i % 5) * 0.5 + offset / 100,
+            "avg_goals_against": (i % 3) * 0.4,
+        }
+        for venue, offset in [("Home", 3), ("Away", 11)]
+    }
+
+
+def render_png(fig, dpi: int = 20) -> bytes:
+    """Save a figure the way render.plot does, at a low dpi to keep the test fast."""
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=dpi)
+    return buf.getvalue()
+
+
+def render_dashboard(i: int):
+    """Render the three dashboard charts for one filter change."""
+    summary = make_summary(i)
+    render_png(goals_home_away_figure(summary))
+    render_png(winrate_figure(summary))
+    render_png(goals_by_period_figure([i % 4, 1.5, 2.0], [1.0, i % 3, 2.5], [0.5, 1.0, i % 2]))
+
+
+def max_rss_kb() -> int:
+    """Peak resident set size of this process (kilobytes on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def rss_growth_kb(renders: int) -> int:
+    """Peak RSS growth over `renders` dashboard charts, after a warm-up of 30 filter changes."""
+    for i in range(30):
+        render_dashboard(i)
+    baseline = max_rss_kb()
+
+    for i in range(-(-renders // 3)):
+        render_dashboard(i)
+    return max_rss_kb() - baseline
+
+
+# ── Tests ──────────────────────────────────────────────────────────────────────
+
+def test_templates_reuse_one_figure():
+    """Verifies that repeated renders update the same figure rather than building a
+    new one, and that nothing is registered with pyplot's global figure manager."""
+    first = goals_home_away_figure(make_summary(1))
+    second = goals_home_away_figure(make_summary(2))
+    assert first is second
+    assert plt.get_fignums() == []
+
+
+def test_template_updates_bar_heights_and_labels():
+    """Verifies that a template redraw reflects the new filter's values, so a reused
+    figure never shows the previous team's numbers."""
+    summary = make_summary(3)
+    fig = goals_home_away_figure(summary)
+    ax = fig.axes[0]
+    heights = [round(p.get_height(), 2) for p in ax.patches]
+    assert heights == [summary["Home"]["avg_goals_for"], summary["Away"]["avg_goals_for"],
+                       summary["Home"]["avg_goals_against"], summary["Away"]["avg_goals_against"]]
+    assert [t.get_text() for t in ax.texts] == [f"{h:.1f}" for h in heights]
+
+
+def test_template_resets_dpi():
+    """Verifies that each draw restores the template's dpi, since render.plot scales
+    the figure dpi by the pixel ratio on every render."""
+    fig = winrate_figure(make_summary(1))
+    base = fig.get_dpi()
+    fig.set_dpi(base * 2)
+    assert winrate_figure(make_summary(2)).get_dpi() == base
+
+
+def test_empty_gauge_hides_fill():
+    """Verifies that a 0% win rate draws only the gauge background, as before."""
+    summary = make_summary(0)
+    summary["Home"]["win_rate"] = 0
+    fig = winrate_figure(summary)
+    fills = [p for p in fig.axes[0].patches if p.get_visible()]
+    assert len(fills) == 1
+
+
+def test_ai_figures_render():
+    """Verifies that the AI explorer charts render without pyplot."""
+    counts = pd.Series({"Home team win": 5, "Draw": 2})
+    assert render_png(result_counts_figure(counts)).startswith(b"\x89PNG")
+    assert render_png(empty_ai_figure()).startswith(b"\x89PNG")
+    assert plt.get_fignums() == []
+
+
+def test_rendering_charts_does_not_grow_memory():
+    """Verifies that rendering a few hundred dashboard charts keeps resident memory flat, so
+    a long-running server does not accumulate figures between filter changes."""
+    assert rss_growth_kb(QUICK_RENDERS) < 20 * 1024
+
+
+@pytest.mark.skipif(not SOAK_RENDERS, reason="soak test; set EPL_SOAK_RENDERS=10000 to run it")
+def test_rendering_10000_charts_does_not_grow_memory():
+    """Verifies that EPL_SOAK_RENDERS (e.g. 10,000) dashboard charts keep resident memory
+    flat."""
+    assert rss_growth_kb(SOAK_RENDERS) < 20 * 1024
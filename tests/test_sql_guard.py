@@ -0,0 +1,136 @@
+"""
+Unit tests for the guarded QueryChat data source in src/sql_guard.py.
+Run with: pytest tests/test_sql_guard.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import threading
+import time
+
+import ibis
+import pandas as pd
+import pytest
+from db import lock_down
+from sql_guard import GuardedIbisSource, QueryTimeout
+
+
+# ── Fixtures ───────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def source():
+    """A guarded source over a 3,000-row epl_matches table on its own DuckDB connection."""
+    con = ibis.duckdb.connect()
+    df = pd.DataFrame({
+        "HomeTeam": ["Arsenal", "Chelsea", "Liverpool"] * 1_000,
+        "FullTimeHomeGoals": [2, 1, 0] * 1_000,
+    })
+    # A table in the database rather than a memtable, so pooled cursors can query it too
+    con.con.from_df(df).create("epl_matches")
+    tbl = con.table("epl_matches")
+    return GuardedIbisSource(tbl, "epl_matches", row_cap=100, timeout=0.5)
+
+
+# ── Tests ──────────────────────────────────────────────────────────────────────
+
+def test_query_within_cap_is_complete(source):
+    """Verifies that a query under the row cap returns every row, eagerly, and is not
+    flagged as truncated."""
+    df = source.execute_query("SELECT * FROM epl_matches WHERE HomeTeam = 'Arsenal' LIMIT 50")
+    assert isinstance(df, pd.DataFrame)
+    assert len(df) == 50
+    assert df.attrs["truncated"] is False
+
+
+def test_query_over_cap_is_truncated(source):
+    """Verifies that a broad generated query returns at most row_cap rows and is flagged,
+    so the explorer can say the result was cut."""
+    df = source.execute_query("SELECT * FROM epl_matches")
+    assert len(df) == 100
+    assert df.attrs["truncated"] is True
+
+
+def test_write_statements_are_rejected(source):
+    """Verifies that generated SQL cannot modify the shared connection."""
+    for sql in ["DROP VIEW epl_matches", "DELETE FROM epl_matches"]:
+        with pytest.raises(Exception):
+            source.execute_query(sql)
+    assert len(source.execute_query("SELECT * FROM epl_matches LIMIT 5")) == 5
+
+
+def test_expensive_query_is_interrupted(source):
+    """Verifies that a runaway query (a three-way cross join) is stopped at the timeout
+    and the connection stays usable for the next query."""
+    start = time.perf_counter()
+    with pytest.raises(QueryTimeout):
+        source.execute_query(
+            "SELECT count(*) AS n FROM epl_matches a, epl_matches b, epl_matches c "
+            "WHERE a.FullTimeHomeGoals + b.FullTimeHomeGoals + c.FullTimeHomeGoals > 100"
+        )
+    assert time.perf_counter() - start < 5
+    assert len(source.execute_query("SELECT * FROM epl_matches LIMIT 5")) == 5
+    assert list(source.empty_result().columns) == ["HomeTeam", "FullTimeHomeGoals"]
+
+
+def test_query_on_cursor_is_interrupted_on_that_cursor(source):
+    """Verifies that a query run on a pooled cursor is capped and timed out on that cursor, and
+    that the table's own connection keeps answering while it runs."""
+    cursor = ibis.duckdb.from_connection(source.backend.con.cursor())
+    assert source.execute_query("SELECT * FROM epl_matches", backend=cursor).attrs["truncated"] is True
+
+    main = []
+    timer = threading.Timer(0.1, lambda: main.append(len(source.execute_query("SELECT * FROM epl_matches LIMIT 5"))))
+    timer.start()
+    with pytest.raises(QueryTimeout):
+        source.execute_query(
+            "SELECT count(*) AS n FROM epl_matches a, epl_matches b, epl_matches c "
+            "WHERE a.FullTimeHomeGoals + b.FullTimeHomeGoals + c.FullTimeHomeGoals > 100",
+            backend=cursor,
+        )
+    timer.join()
+    assert main == [5]
+    assert len(source.execute_query("SELECT * FROM epl_matches LIMIT 5", backend=cursor)) == 5
+
+
+def test_streamed_query_is_not_capped(source):
+    """Verifies that an export streams the whole result in batches, past the on-screen row cap,
+    and that an empty result still yields its columns."""
+    cursor = source.backend.con.cursor()
+    frames = list(source.stream_query("SELECT * FROM epl_matches;", cursor, batch_rows=1_000))
+    assert sum(len(f) for f in frames) == 3_000
+    assert max(len(f) for f in frames) <= 1_000
+
+    empty = list(source.stream_query("SELECT * FROM epl_matches WHERE HomeTeam = 'Nobody'", cursor))
+    assert len(empty) == 1 and empty[0].empty
+    assert list(empty[0].columns) == ["HomeTeam", "FullTimeHomeGoals"]
+    with pytest.raises(Exception):
+        source.stream_query("DROP TABLE epl_matches", cursor)
+
+
+def test_generated_sql_cannot_read_files(source, tmp_path):
+    """Verifies that on a locked-down database, generated SQL cannot read files outside the
+    allowed directory (e.g. the app's .env) on the main connection, a pooled cursor or an export
+    cursor, cannot turn file access back on, and still reads parquet inside the directory."""
+    allowed = tmp_path / "processed"
+    allowed.mkdir()
+    source.backend.con.execute(f"COPY epl_matches TO '{allowed / 'm.parquet'}' (FORMAT parquet)")
+    secret = tmp_path / ".env"
+    secret.write_text("ANTHROPIC_API_KEY=sk-test\n")
+    cursor = ibis.duckdb.from_connection(source.backend.con.cursor())
+    lock_down(source.backend, [str(allowed)])
+
+    for sql in [f"SELECT content FROM read_text('{secret}')", f"SELECT * FROM read_csv('{secret}')",
+                "SELECT content FROM read_text('/etc/hostname')"]:
+        with pytest.raises(Exception, match="Permission"):
+            source.execute_query(sql)
+        with pytest.raises(Exception, match="Permission"):
+            source.execute_query(sql, backend=cursor)
+        with pytest.raises(Exception, match="Permission"):
+            list(source.stream_query(sql, source.backend.con.cursor()))
+    with pytest.raises(Exception):
+        source.backend.raw_sql("SET enable_external_access = true")
+
+    df = source.execute_query(f"SELECT * FROM read_parquet('{allowed / 'm.parquet'}')", backend=cursor)
+    assert len(df) == 100
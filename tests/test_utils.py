@@ -7,13 +7,22 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
  
+import ibis
 import pandas as pd
 import pytest
-from utils import get_team_matches, assign_period
+from utils import (
+    get_team_matches, assign_period, metrics_cube_from_totals, metrics_totals_ibis,
+    EMPTY_METRICS, compact_dtypes, TeamSeasonIndex, summarize_matches, period_summary,
+)
  
  
 # ── Fixtures ───────────────────────────────────────────────────────────────────
  
+def metrics_cube(df: pd.DataFrame) -> dict:
+    """The KPI cube for df, built as the app builds it: the totals query, then the cube."""
+    return metrics_cube_from_totals(metrics_totals_ibis(ibis.memtable(df)).execute())
+
+
 @pytest.fixture
 def sample_df():
     """Minimal EPL-style DataFrame with two matches."""
@@ -60,6 +69,59 @@ def test_get_team_matches_empty_for_unknown_team(sample_df):
     assert result.empty
  
  
+# ── compact_dtypes tests ───────────────────────────────────────────────────────
+
+def test_compact_dtypes_schema(sample_df):
+    """Verifies that teams, seasons and results become categoricals and goal counts
+    become int8, which is what keeps each worker's copy of the data small."""
+    result = compact_dtypes(sample_df)
+    assert isinstance(result["HomeTeam"].dtype, pd.CategoricalDtype)
+    assert result["HomeTeam"].dtype == result["AwayTeam"].dtype
+    assert isinstance(result["Season"].dtype, pd.CategoricalDtype)
+    assert isinstance(result["FullTimeResult"].dtype, pd.CategoricalDtype)
+    assert result["FullTimeHomeGoals"].dtype == "int8"
+
+
+def test_compact_dtypes_keeps_helpers_working(sample_df):
+    """Verifies that get_team_matches gives the same answers on the compact schema,
+    including for a team outside the categories."""
+    compact = compact_dtypes(sample_df, teams=["Arsenal", "Chelsea"], seasons=["2022-23"])
+    result = get_team_matches(compact, "Arsenal")
+    assert list(result["goals_for"]) == [2, 3]
+    assert list(result["win"]) == [1, 1]
+    assert get_team_matches(compact, "UnknownFC").empty
+
+
+# ── TeamSeasonIndex tests ──────────────────────────────────────────────────────
+
+def test_season_index_both_directions(sample_df):
+    """Verifies that the index answers team -> seasons and season -> teams, which the
+    season dropdown and reset logic rely on."""
+    df = pd.concat([sample_df, sample_df.assign(Season="2023-24", AwayTeam="Fulham")])
+    index = TeamSeasonIndex.from_matches(df)
+    assert index.seasons_for("Fulham") == ["2023-24"]
+    assert index.seasons_for("Arsenal") == ["2022-23", "2023-24"]
+    assert index.teams_for("2022-23") == ["Arsenal", "Chelsea"]
+    assert index.latest_season("Chelsea") == "2023-24"
+
+
+def test_season_index_unknown_team_gets_all_seasons(sample_df):
+    """Verifies that an unknown team falls back to every season, matching the old
+    TEAM_SEASONS.get(team, ALL_SEASONS) behaviour."""
+    index = TeamSeasonIndex.from_matches(sample_df)
+    assert index.seasons_for("Wrexham") == index.seasons == ["2022-23"]
+    assert index.teams_for("1999-00") == []
+
+
+def test_season_index_round_trips_through_mapping(sample_df):
+    """Verifies that an index rebuilt from its stored team -> seasons mapping, as the
+    app does from the manifest, equals one built from the matches."""
+    index = TeamSeasonIndex.from_matches(compact_dtypes(sample_df))
+    rebuilt = TeamSeasonIndex(index.team_seasons)
+    assert rebuilt.season_teams == index.season_teams
+    assert rebuilt.teams == ["Arsenal", "Chelsea"]
+ 
+ 
 # ── assign_period tests ────────────────────────────────────────────────────────
  
 def test_assign_period_labels(sample_df):
@@ -75,4 +137,105 @@ def test_assign_period_empty_df():
     empty = pd.DataFrame(columns=["HomeTeam", "MatchDate"])
     result = assign_period(empty)
     assert "period" in result.columns
-    assert len(result) == 0
\ No newline at end of file
+    assert len(result) == 0
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 10, 38, 100])
+def test_assign_period_matches_position_thirds(n):
+    """Verifies that the vectorized labels equal the original per-row rule (first third Early,
+    second Mid, rest Late) and come back as an ordered categorical without changing the input."""
+    df = pd.DataFrame({"x": range(n)})
+    third = n / 3
+    expected = ["Early" if i < third else ("Mid" if i < 2 * third else "Late") for i in range(n)]
+    result = assign_period(df)
+    assert result["period"].astype(str).tolist() == expected
+    assert list(result["period"].cat.categories) == ["Early", "Mid", "Late"]
+    assert "period" not in df.columns
+
+
+def test_assign_period_configurable_buckets():
+    """Verifies per-N-matchweek and monthly buckets, and a custom number of position buckets."""
+    df = pd.DataFrame({"MatchDate": pd.date_range("2024-08-25", periods=12, freq="W")})
+    assert assign_period(df, every=5)["period"].cat.categories.tolist() == ["1-5", "6-10", "11-12"]
+    assert assign_period(df, freq="M")["period"].value_counts(sort=False).to_dict() == {
+        "2024-08": 1, "2024-09": 5, "2024-10": 4, "2024-11": 2,
+    }
+    quarters = assign_period(df, labels=["Q1", "Q2", "Q3", "Q4"])["period"]
+    assert quarters.value_counts(sort=False).tolist() == [3, 3, 3, 3]
+
+
+def test_period_summary_matches_per_period_masks(sample_df):
+    """Verifies that the np.bincount summary agrees with masking the table per period and venue,
+    and that an empty table gives zeros for every period."""
+    season = pd.concat([sample_df] * 4, ignore_index=True).assign(
+        MatchDate=pd.date_range("2023-01-01", periods=8, freq="W")
+    )
+    matches = assign_period(get_team_matches(season, "Arsenal"))
+    summary = period_summary(matches)
+    for period in ["Early", "Mid", "Late"]:
+        sub = matches[matches["period"] == period]
+        assert summary[period]["n"] == len(sub)
+        assert summary[period]["avg_goals"] == pytest.approx(sub["goals_for"].mean())
+        assert summary[period]["home_avg"] == pytest.approx(sub[sub["venue"] == "Home"]["goals_for"].mean())
+    assert period_summary(assign_period(pd.DataFrame()))["Mid"] == dict(n=0, avg_goals=0, home_avg=0, away_avg=0)
+
+
+# ── metrics cube tests ─────────────────────────────────────────────────────────
+
+def test_metrics_cube_matches_get_team_matches(sample_df):
+    """Verifies that the precomputed cube agrees with get_team_matches for a team and season,
+    so the KPI cards show the same numbers as before the cube was introduced."""
+    cube = metrics_cube(sample_df)
+    expected = get_team_matches(sample_df, "Arsenal")
+    m = cube[("Arsenal", "2022-23", "All")]
+    assert m["n"] == len(expected)
+    assert m["win_rate"] == expected["win"].mean() * 100
+    assert m["avg_goals_for"] == expected["goals_for"].mean()
+    assert m["avg_goals_against"] == expected["goals_against"].mean()
+
+
+def test_metrics_cube_result_keys(sample_df):
+    """Verifies that the cube is also keyed by result, so a Win/Loss breakdown is a
+    lookup rather than another query."""
+    cube = metrics_cube(sample_df)
+    assert cube[("Arsenal", "2022-23", "Win")]["n"] == 2
+    assert cube[("Chelsea", "2022-23", "Loss")]["n"] == 2
+    assert ("Chelsea", "2022-23", "Win") not in cube
+
+
+def test_metrics_cube_empty_df():
+    """Verifies that an empty DataFrame yields an empty cube, so lookups fall back
+    to EMPTY_METRICS instead of crashing when no data is loaded."""
+    empty = pd.DataFrame(columns=[
+        "HomeTeam", "AwayTeam", "Season", "FullTimeHomeGoals",
+        "FullTimeAwayGoals", "FullTimeResult", "MatchDate",
+    ])
+    cube = metrics_cube(empty)
+    assert cube.get(("Arsenal", "2022-23", "All"), EMPTY_METRICS)["n"] == 0
+
+
+# ── summarize_matches tests ────────────────────────────────────────────────────
+
+def test_summarize_matches_aggregates(sample_df):
+    """Verifies that the AI explorer's shared summary holds the same numbers the AI charts
+    used to compute from the result frame one by one."""
+    df = compact_dtypes(sample_df.assign(Result=["Home team win", "Away team win"]),
+                        seasons=["2021-22", "2022-23"])
+    summary = summarize_matches(df)
+    assert summary["n"] == 2
+    assert summary["columns"] == list(df.columns)
+    assert summary["result_counts"].to_dict() == {"Home team win": 1, "Away team win": 1}
+    assert summary["home_goals_mean"] == 1.5
+    assert summary["away_goals_mean"] == 2.0
+    assert summary["season_counts"].to_dict() == {"2022-23": 2}
+
+
+def test_summarize_matches_missing_columns_and_empty(sample_df):
+    """Verifies that aggregates are None when the AI query returned no rows or did not
+    select the columns they need, so the charts fall back to their empty state."""
+    partial = summarize_matches(sample_df[["HomeTeam", "Season"]])
+    assert partial["result_counts"] is None and partial["home_goals_mean"] is None
+    assert partial["season_counts"].to_dict() == {"2022-23": 2}
+
+    empty = summarize_matches(sample_df.iloc[0:0])
+    assert empty["n"] == 0 and empty["season_counts"] is None